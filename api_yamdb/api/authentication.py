@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from rest_framework import permissions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from reviews.generations import (bump_keys, generation_key, read_generations,
+                                 request_generations)
+
+User = get_user_model()
+
+# Поля пользователя, которые кладутся в токен при выдаче.
+CLAIM_FIELDS = ('username', 'role', 'is_superuser')
+VERSION_CLAIM = 'token_version'
+
+
+def token_key(user_id):
+    """Счетчик токенов пользователя в таблице поколений."""
+    return generation_key(User, f'tokens:{user_id}')
+
+
+def revoke_tokens(*user_ids):
+    """
+    Отзывает выданные пользователям токены. Сигналы вызывают ее
+    при смене роли, имени, is_active и удалении; после update()
+    мимо сигналов ее нужно вызвать самому.
+    """
+    bump_keys([token_key(user_id) for user_id in user_ids])
+
+
+def add_user_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    key = token_key(user.pk)
+    token[VERSION_CLAIM] = read_generations([key])[key]
+    return token
+
+
+def has_claims(validated_token):
+    return all(
+        field in validated_token for field in (VERSION_CLAIM, *CLAIM_FIELDS)
+    )
+
+
+class VersionedJWTAuthentication(JWTAuthentication):
+    """
+    Пользователь из БД; отозванный токен (версия или claims
+    не совпадают) не принимается. Токены без claims - как раньше.
+    """
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if not has_claims(validated_token):
+            return user
+        key = token_key(user.pk)
+        if (
+            validated_token[VERSION_CLAIM] != read_generations([key])[key]
+            or tuple(validated_token[field] for field in CLAIM_FIELDS)
+            != tuple(getattr(user, field) for field in CLAIM_FIELDS)
+        ):
+            raise InvalidToken('Токен отозван.')
+        return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Собирает пользователя из claims токена без запроса к таблице
+    пользователей. Отзыв проверяется по счетчику токенов в таблице
+    поколений: для чтения он читается тем же запросом, что и версия
+    данных вьюсета. Остальные поля пользователя отложены (deferred)
+    и будут загружены при первом обращении. Токены без claims
+    проверяются по БД как обычно.
+    """
+    def authenticate(self, request):
+        self.request = request
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not has_claims(validated_token):
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user '
+                               'identification')
+        key = token_key(user_id)
+        generations = request_generations(self.request)
+        generations.prefetch(self.prefetch_keys(key))
+        if validated_token[VERSION_CLAIM] != generations.values[key]:
+            raise InvalidToken('Токен отозван.')
+        values = dict(
+            {field: validated_token[field] for field in CLAIM_FIELDS},
+            id=user_id,
+            is_active=True
+        )
+        field_names = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in values
+        ]
+        return User.from_db(
+            'default', field_names, [values[name] for name in field_names]
+        )
+
+    def prefetch_keys(self, key):
+        """Счетчик токенов и, для чтения, поколения данных вьюсета."""
+        keys = [key]
+        view = self.request.parser_context.get('view')
+        if (
+            self.request.method in permissions.SAFE_METHODS
+            and hasattr(view, 'get_version_keys')
+        ):
+            keys.extend(view.get_version_keys())
+        return keys
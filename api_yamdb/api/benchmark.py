@@ -0,0 +1,389 @@
+import json
+import math
+import random
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, resolve
+from django.utils import timezone
+from reviews.leaderboards import BUILDERS, refresh_leaderboard
+from reviews.management.commands._private import (batched, bulk_insert,
+                                                  reset_sequences)
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.ratings import recalculate_ratings
+from reviews.rollups import rebuild_stats
+
+from . import urls
+from .serializers import MyTokenObtainPairSerializer
+
+User = get_user_model()
+
+SCALES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+CATEGORIES = 10
+GENRES = 20
+WORDS = ('space', 'war', 'love', 'night', 'river', 'city', 'ghost', 'king',
+         'winter', 'dream', 'road', 'storm', 'garden', 'silver', 'shadow')
+
+
+class Dataset(namedtuple('Dataset', 'reviews titles users comments')):
+    """
+    Размеры набора данных: reviews отзывов, на каждое произведение -
+    около 20 отзывов, пользователей вдесятеро меньше, чем отзывов,
+    комментариев - вдвое меньше.
+    """
+    @classmethod
+    def for_scale(cls, reviews):
+        titles = max(reviews // 20, 10)
+        return cls(
+            reviews=reviews, titles=titles,
+            users=max(reviews // 10, 100), comments=reviews // 2
+        )
+
+    def review_author(self, review_id):
+        # Отзывы произведения пишут разные пользователи (unique_review).
+        # Пользователи 1-3 - администратор, модератор и читатель -
+        # отзывов не пишут.
+        title_id, number = self.review_title(review_id)
+        return 4 + (title_id * 7 + number) % (self.users - 3)
+
+    def review_title(self, review_id):
+        """(id произведения, номер отзыва в нем) по id отзыва."""
+        return (review_id - 1) % self.titles + 1, (review_id - 1) // (
+            self.titles
+        )
+
+
+def user_rows(dataset):
+    roles = {1: 'admin', 2: 'moderator'}
+    for pk in range(1, dataset.users + 1):
+        yield {
+            'id': pk, 'username': f'user{pk}', 'email': f'user{pk}@yamdb.fake',
+            'role': roles.get(pk, 'user'), 'password': '!',
+        }
+
+
+def title_rows(dataset, rnd):
+    for pk in range(1, dataset.titles + 1):
+        yield {
+            'id': pk,
+            'name': ' '.join(rnd.sample(WORDS, 3)).capitalize() + f' {pk}',
+            'year': rnd.randint(1950, 2022),
+            'description': ' '.join(rnd.choices(WORDS, k=12)),
+            'category_id': pk % CATEGORIES + 1,
+        }
+
+
+def genre_title_rows(dataset, rnd):
+    for title_id in range(1, dataset.titles + 1):
+        for genre_id in rnd.sample(range(1, GENRES + 1), rnd.randint(1, 3)):
+            yield {'title_id': title_id, 'genre_id': genre_id}
+
+
+def review_rows(dataset, rnd, now):
+    for pk in range(1, dataset.reviews + 1):
+        yield {
+            'id': pk, 'title_id': dataset.review_title(pk)[0],
+            'author_id': dataset.review_author(pk),
+            'text': ' '.join(rnd.choices(WORDS, k=rnd.randint(5, 40))),
+            'score': rnd.randint(1, 10),
+            'pub_date': now - timedelta(seconds=rnd.randint(0, 90 * 86400)),
+        }
+
+
+def comment_rows(dataset, rnd, now):
+    for pk in range(1, dataset.comments + 1):
+        # Первая половина комментариев - по одному к отзывам 1, 2, ...
+        review_id = (pk if pk <= dataset.comments // 2
+                     else rnd.randint(1, dataset.reviews))
+        yield {
+            'id': pk, 'review_id': review_id,
+            'author_id': rnd.randint(1, dataset.users),
+            'text': ' '.join(rnd.choices(WORDS, k=rnd.randint(3, 20))),
+            'pub_date': now - timedelta(seconds=rnd.randint(0, 90 * 86400)),
+        }
+
+
+def seed_dataset(dataset, seed=0, batch_size=5000, report=None):
+    """
+    Заполняет пустую БД набором dataset. Данные зависят только
+    от seed; id задаются явно. Вставка - bulk_create пачками,
+    сигналы не вызываются, поэтому рейтинг произведений, сводки
+    и лидерборды пересчитываются в конце.
+    """
+    rnd = random.Random(seed)
+    now = timezone.now()
+    tables = (
+        (User, user_rows(dataset)),
+        (Category, ({'id': pk, 'name': f'Категория {pk}', 'slug': f'c{pk}'}
+                    for pk in range(1, CATEGORIES + 1))),
+        (Genre, ({'id': pk, 'name': f'Жанр {pk}', 'slug': f'g{pk}'}
+                 for pk in range(1, GENRES + 1))),
+        (Title, title_rows(dataset, rnd)),
+        (GenreTitle, genre_title_rows(dataset, rnd)),
+        (Review, review_rows(dataset, rnd, now)),
+        (Comment, comment_rows(dataset, rnd, now)),
+    )
+    for model, rows in tables:
+        started = time.monotonic()
+        count = 0
+        for batch in batched(rows, batch_size):
+            with transaction.atomic():
+                bulk_insert(model, batch)
+            count += len(batch)
+        reset_sequences(model)
+        if report:
+            report(f'{model._meta.label}: {count} rows '
+                   f'in {time.monotonic() - started:.1f} s')
+    recalculate_ratings()
+    rebuild_stats()
+    for kind in BUILDERS:
+        refresh_leaderboard(kind)
+
+
+def is_seeded(dataset):
+    return (Review.objects.count() == dataset.reviews
+            and Title.objects.count() == dataset.titles)
+
+
+Case = namedtuple('Case', 'name method path roles data')
+Case.__new__.__defaults__ = (None,)
+
+# Запросы на запись выполняются в транзакции, которая откатывается:
+# данные между повторами не меняются. Пишут разные пользователи
+# с разных адресов, чтобы не упереться в лимиты запросов.
+CASES = (
+    Case('api-root', 'GET', 'v1/', ('anonymous', 'user')),
+    Case('categories', 'GET', 'v1/categories/', ('anonymous', 'admin')),
+    Case('genres', 'GET', 'v1/genres/', ('anonymous', 'admin')),
+    Case('titles', 'GET', 'v1/titles/', ('anonymous', 'admin')),
+    Case('titles-page', 'GET', 'v1/titles/?page={page}', ('anonymous',)),
+    Case('titles-cursor', 'GET', 'v1/titles/?cursor=', ('anonymous',)),
+    Case('titles-fields', 'GET', 'v1/titles/?fields=id,name,rating',
+         ('anonymous',)),
+    Case('titles-genre', 'GET', 'v1/titles/?genre=g1', ('anonymous',)),
+    Case('titles-genre-year', 'GET', 'v1/titles/?genre=g2&year=2000',
+         ('anonymous',)),
+    Case('titles-search', 'GET', 'v1/titles/?search=space+war',
+         ('anonymous',)),
+    Case('titles-ids', 'GET', 'v1/titles/?ids=1,2,3,4,5,6,7,8,9,10',
+         ('anonymous',)),
+    Case('title', 'GET', 'v1/titles/{title}/', ('anonymous', 'admin')),
+    Case('title-stats', 'GET', 'v1/titles/{title}/stats/', ('anonymous',)),
+    Case('titles-top', 'GET', 'v1/titles/top/', ('anonymous',)),
+    Case('titles-trending', 'GET', 'v1/titles/trending/', ('anonymous',)),
+    Case('reviews', 'GET', 'v1/titles/{title}/reviews/',
+         ('anonymous', 'user')),
+    Case('review', 'GET', 'v1/titles/{title}/reviews/{review}/',
+         ('anonymous', 'user')),
+    Case('comments', 'GET', 'v1/titles/{title}/reviews/{review}/comments/',
+         ('anonymous', 'user')),
+    Case('comment', 'GET',
+         'v1/titles/{title}/reviews/{review}/comments/{comment}/',
+         ('anonymous', 'user')),
+    Case('users', 'GET', 'v1/users/', ('admin',)),
+    Case('user', 'GET', 'v1/users/user3/', ('admin',)),
+    Case('users-me', 'GET', 'v1/users/me/', ('user',)),
+    Case('db-pool', 'GET', 'v1/admin/db-pool/', ('admin',)),
+    Case('signup', 'POST', 'v1/auth/signup/', ('anonymous',),
+         lambda context: {'username': f'new{context["i"]}',
+                          'email': f'new{context["i"]}@yamdb.fake'}),
+    Case('token', 'POST', 'v1/auth/token/', ('anonymous',),
+         lambda context: {'username': context['writer'].username,
+                          'confirmation_code': default_token_generator
+                          .make_token(context['writer'])}),
+    Case('category-create', 'POST', 'v1/categories/', ('admin',),
+         lambda context: {'name': 'New', 'slug': f'new{context["i"]}'}),
+    Case('category-delete', 'DELETE', 'v1/categories/c1/', ('admin',)),
+    Case('genre-delete', 'DELETE', 'v1/genres/g1/', ('admin',)),
+    Case('title-create', 'POST', 'v1/titles/', ('admin',),
+         lambda context: {'name': f'New {context["i"]}', 'year': 2000,
+                          'category': 'c1', 'genre': ['g1', 'g2']}),
+    Case('titles-bulk', 'POST', 'v1/titles/bulk/', ('admin',),
+         lambda context: [{'id': title_id, 'year': 2001}
+                          for title_id in range(1, 11)]),
+    Case('review-create', 'POST', 'v1/titles/{title}/reviews/', ('writer',),
+         lambda context: {'text': 'Benchmark', 'score': 7}),
+    Case('review-update', 'PATCH', 'v1/titles/{title}/reviews/{review}/',
+         ('moderator',), lambda context: {'score': 3}),
+    Case('review-delete', 'DELETE', 'v1/titles/{title}/reviews/{review}/',
+         ('moderator',)),
+    Case('reviews-bulk-delete', 'POST',
+         'v1/titles/{title}/reviews/bulk-delete/', ('moderator',),
+         lambda context: {'ids': [context['review']]}),
+    Case('comment-create', 'POST',
+         'v1/titles/{title}/reviews/{review}/comments/', ('writer',),
+         lambda context: {'text': 'Benchmark'}),
+    Case('comments-bulk-delete', 'POST',
+         'v1/titles/{title}/reviews/{review}/comments/bulk-delete/',
+         ('moderator',), lambda context: {'authors': ['user3']}),
+)
+
+
+class Runner:
+    """
+    Выполняет сценарии через тестовый клиент Django и собирает
+    время ответа и число SQL-запросов.
+    """
+    def __init__(self, dataset, requests=20, warmup=2):
+        self.dataset = dataset
+        self.requests = requests
+        self.warmup = warmup
+        self.client = Client()
+        self.tokens = {}
+        self.users = {
+            user.pk: user for user in User.objects.filter(pk__in=(1, 2, 3))
+        }
+        title_id = 1
+        review_id = Review.objects.filter(title_id=title_id).order_by(
+            'pk'
+        ).values_list('pk', flat=True).first()
+        self.context = {
+            'title': title_id, 'review': review_id,
+            'page': dataset.titles // 10 + 1,
+            'comment': Comment.objects.filter(review_id=review_id).order_by(
+                'pk'
+            ).values_list('pk', flat=True).first() or 0,
+        }
+        # Пишут пользователи без отзыва на произведение.
+        reviewers = set(Review.objects.filter(
+            title_id=title_id
+        ).values_list('author_id', flat=True))
+        self.writers = list(User.objects.exclude(
+            pk__in=reviewers | set(self.users)
+        ).order_by('pk')[:warmup + requests])
+
+    def get_user(self, role, number):
+        if role == 'anonymous':
+            return None
+        if role == 'writer':
+            return self.writers[number % len(self.writers)]
+        return self.users[{'admin': 1, 'moderator': 2, 'user': 3}[role]]
+
+    def get_token(self, user):
+        if user.pk not in self.tokens:
+            self.tokens[user.pk] = str(
+                MyTokenObtainPairSerializer.get_token(user).access_token
+            )
+        return self.tokens[user.pk]
+
+    def prepare(self, case, role, number):
+        """Аргументы запроса: метод, путь и параметры клиента."""
+        context = dict(
+            self.context, i=number,
+            writer=self.writers[number % len(self.writers)]
+        )
+        extra = {'REMOTE_ADDR': f'10.{number // 65536 % 256}.'
+                                f'{number // 256 % 256}.{number % 256}'}
+        user = self.get_user(role, number)
+        if user is not None:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {self.get_token(user)}'
+        if case.data:
+            extra['data'] = json.dumps(case.data(context))
+            extra['content_type'] = 'application/json'
+        return case.method, '/api/' + case.path.format(**context), extra
+
+    def measure(self, case, role):
+        timings = []
+        queries = 0
+        status = None
+        for number in range(self.warmup + self.requests):
+            method, path, extra = self.prepare(case, role, number)
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = self.client.generic(method, path, **extra)
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            if number < self.warmup:
+                continue
+            timings.append(elapsed * 1000)
+            queries = max(queries, len(captured))
+            status = response.status_code
+        return {
+            'status': status,
+            'queries': queries,
+            'p50': round(percentile(timings, 50), 3),
+            'p95': round(percentile(timings, 95), 3),
+            'p99': round(percentile(timings, 99), 3),
+        }
+
+    def run(self, cases=CASES, only=None):
+        for case in cases:
+            for role in case.roles:
+                key = f'{case.name} [{role}]'
+                if only and only not in key:
+                    continue
+                yield key, self.measure(case, role)
+
+
+def percentile(values, percent):
+    """Процентиль методом ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def compare(baseline, results, tolerance=1.5, slack_ms=5.0,
+            compare_latency=False):
+    """
+    Регрессии относительно базовой линии: больше SQL-запросов
+    или другой код ответа. С compare_latency - еще p50 или p95
+    выше базовых в tolerance раз плюс slack_ms (порог шума:
+    разница меньше него не считается замедлением).
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result['status'] != base['status']:
+            regressions.append(
+                f'{key}: status {result["status"]}, was {base["status"]}'
+            )
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{key}: {result["queries"]} queries, '
+                f'budget {base["queries"]}'
+            )
+        if not compare_latency:
+            continue
+        for metric in ('p50', 'p95'):
+            limit = base[metric] * tolerance + slack_ms
+            if result[metric] > limit:
+                regressions.append(
+                    f'{key}: {metric} {result[metric]:.1f} ms, '
+                    f'was {base[metric]:.1f} ms'
+                )
+    return regressions
+
+
+def iter_routes(patterns, prefix=''):
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern) and 'format' not in route:
+            yield route
+
+
+def uncovered_routes(cases=CASES):
+    """Маршруты api/urls.py, для которых нет сценария."""
+    covered = set()
+    for case in cases:
+        path = case.path.split('?')[0].format(
+            title=1, review=1, comment=1, page=1
+        )
+        # В собранном маршруте Django опускает ^ вложенных шаблонов.
+        covered.add(resolve('/api/' + path).route.replace('^', ''))
+    return sorted(
+        route for route in iter_routes(urls.urlpatterns)
+        if 'api/' + route.replace('^', '') not in covered
+    )
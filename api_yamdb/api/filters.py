@@ -1,22 +1,126 @@
 import django_filters
-from reviews.models import Title
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from reviews.facets import MATCH_ALL, MATCH_ANY, BitmapIds, get_facet_index
+from reviews.models import GenreTitle, Title
+from reviews.search import search_titles
+
+
+def split_values(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
 
 
 class TitleFilter(django_filters.FilterSet):
     """
     Кастомный фильтр для вьюсета 'Title'.
+    Год, категория и жанр (в т.ч. списком через запятую) ищутся
+    по индексу в памяти, в БД уходит только список id.
     """
+    FACET_PARAMS = ('year', 'category', 'genre', 'genre_match')
+
     name = django_filters.CharFilter(lookup_expr='icontains')
-    year = django_filters.NumberFilter(lookup_expr='iexact')
-    category = django_filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
-    )
-    genre = django_filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
+    # ?ids=1,2,3 - пакетное чтение произведений по id
+    ids = NumberInFilter(field_name='id', lookup_expr='in')
+    year = django_filters.NumberFilter(method='filter_facet')
+    category = django_filters.CharFilter(method='filter_facet')
+    genre = django_filters.CharFilter(method='filter_facet')
+    genre_match = django_filters.ChoiceFilter(
+        choices=((MATCH_ANY, 'Любой из жанров'), (MATCH_ALL, 'Все жанры')),
+        method='filter_facet'
     )
 
     class Meta:
         model = Title
-        fields = ('name', 'year', 'category', 'genre')
+        fields = ('name', 'year', 'category', 'genre', 'genre_match')
+
+    def filter_facet(self, queryset, name, value):
+        # Все фасеты применяются вместе в filter_queryset.
+        return queryset
+
+    def facets(self):
+        """
+        Фасетные условия запроса или None, если их нет.
+        """
+        data = self.form.cleaned_data
+        genres = split_values(data.get('genre') or '')
+        categories = split_values(data.get('category') or '')
+        year = data.get('year')
+        if not genres and not categories and year is None:
+            return None
+        return {
+            'genres': genres,
+            'categories': categories,
+            'year': None if year is None else int(year),
+            'genre_match': data.get('genre_match') or MATCH_ANY,
+        }
+
+    def facet_bitmap(self):
+        """
+        Битовая карта подходящих произведений
+        или None, если фасетных условий нет.
+        """
+        facets = self.facets()
+        return None if facets is None else get_facet_index().match(**facets)
+
+    def facet_ids(self):
+        """
+        Id подходящих произведений по убыванию
+        или None, если фасетных условий нет.
+        """
+        bitmap = self.facet_bitmap()
+        return None if bitmap is None else BitmapIds(bitmap)
+
+    def filter_queryset(self, queryset):
+        """
+        Фасеты вместе с другими фильтрами (name, поиск, курсор)
+        проверяет БД: страница из индекса здесь неизвестна, а список
+        всех подходящих id мог бы быть размером с таблицу.
+        """
+        queryset = super().filter_queryset(queryset)
+        facets = self.facets()
+        if facets is None:
+            return queryset
+        return filter_facets(queryset, **facets)
+
+
+def filter_facets(queryset, genres, categories, year, genre_match):
+    """Те же условия, что у TitleFacetIndex.match, в SQL."""
+    if year is not None:
+        queryset = queryset.filter(year=year)
+    if categories:
+        queryset = queryset.filter(category__slug__in=categories)
+    if genres and genre_match == MATCH_ALL:
+        for genre in genres:
+            queryset = queryset.filter(pk__in=GenreTitle.objects.filter(
+                genre__slug=genre
+            ).values('title_id'))
+    elif genres:
+        queryset = queryset.filter(pk__in=GenreTitle.objects.filter(
+            genre__slug__in=genres
+        ).values('title_id'))
+    return queryset
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск по названию и описанию: ?search=.
+    Результаты отсортированы по релевантности, поэтому с курсором
+    (он сортирует по id) поиск не совмещается.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        cursor_param = getattr(view.paginator, 'cursor_query_param', None)
+        if cursor_param in request.query_params:
+            raise ValidationError({
+                self.search_param: 'Поиск не совмещается с ?cursor=, '
+                                   'используйте ?page=.'
+            })
+        return search_titles(queryset, query)
@@ -0,0 +1,157 @@
+import json
+import os
+
+from api.benchmark import (SCALES, Dataset, Runner, compare, is_seeded,
+                           seed_dataset, uncovered_routes)
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+BENCH_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+
+def parse_scale(value):
+    if value.lower() in SCALES:
+        return SCALES[value.lower()]
+    if value.isdigit():
+        return int(value)
+    raise CommandError(f'Scale: {", ".join(SCALES)} or number of reviews')
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a test database and times every API route: latency '
+        'percentiles and SQL query counts against a baseline file. '
+        'Uses the test database of the configured engine (SQLite in '
+        'memory or test_<DB_NAME> on PostgreSQL) and drops it afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', default='1k',
+                            help=f'{", ".join(SCALES)} or number of reviews')
+        parser.add_argument('--requests', type=int, default=20,
+                            help='Timed requests per route and role')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', help='Run routes whose name contains')
+        parser.add_argument(
+            '--baseline',
+            help='Baseline file (default: benchmarks/baseline_<scale>.json)'
+        )
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Save results as the new baseline')
+        parser.add_argument(
+            '--compare-latency', action='store_true',
+            help='Also fail on p50/p95 slowdowns (timings are noisy)'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=1.5,
+            help='Allowed p50/p95 slowdown against the baseline, times'
+        )
+        parser.add_argument(
+            '--slack', type=float, default=5.0,
+            help='Noise floor: latency differences below it in ms are ignored'
+        )
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the test database and its data')
+        parser.add_argument('--cache', action='store_true',
+                            help='Keep API response caching on')
+
+    def handle(self, *args, **options):
+        scale = options['scale'].lower()
+        dataset = Dataset.for_scale(parse_scale(scale))
+        baseline_path = options['baseline'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', f'baseline_{scale}.json'
+        )
+        for route in uncovered_routes():
+            self.stderr.write(f'No benchmark for route {route}')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].creation.set_as_test_mirror(
+                connection.settings_dict
+            )
+        try:
+            with override_settings(
+                CACHES=BENCH_CACHES,
+                API_RESPONSE_CACHE_TIMEOUT=(
+                    settings.API_RESPONSE_CACHE_TIMEOUT
+                    if options['cache'] else 0
+                )
+            ):
+                results = self.run_benchmark(dataset, options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+            teardown_test_environment()
+        self.report(results, baseline_path, options)
+
+    def run_benchmark(self, dataset, options):
+        if not is_seeded(dataset):
+            self.stdout.write(
+                f'Seeding {dataset.reviews} reviews, {dataset.titles} '
+                f'titles, {dataset.users} users, {dataset.comments} comments'
+            )
+            if options['keepdb']:
+                call_command('flush', interactive=False, verbosity=0)
+            seed_dataset(dataset, options['seed'], report=self.stdout.write)
+        runner = Runner(dataset, requests=options['requests'])
+        results = {}
+        self.stdout.write(
+            f'{"route":48} {"status":>6} {"queries":>7} '
+            f'{"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}'
+        )
+        for key, result in runner.run(only=options['only']):
+            results[key] = result
+            self.stdout.write(
+                f'{key:48} {result["status"]:>6} {result["queries"]:>7} '
+                f'{result["p50"]:>8.2f} {result["p95"]:>8.2f} '
+                f'{result["p99"]:>8.2f}'
+            )
+        return results
+
+    def report(self, results, baseline_path, options):
+        engine = connection.vendor
+        if options['update_baseline']:
+            os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+            with open(baseline_path, 'w', encoding='utf-8') as file:
+                json.dump(
+                    {'engine': engine, 'requests': options['requests'],
+                     'results': results},
+                    file, indent=2, sort_keys=True
+                )
+                file.write('\n')
+            self.stdout.write(self.style.SUCCESS(
+                f'Baseline saved to {baseline_path}'
+            ))
+            return
+        if not os.path.exists(baseline_path):
+            self.stdout.write(
+                f'No baseline {baseline_path}; run with --update-baseline'
+            )
+            return
+        with open(baseline_path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        compare_latency = options['compare_latency']
+        if compare_latency and baseline['engine'] != engine:
+            self.stdout.write(
+                f'Baseline was recorded on {baseline["engine"]}: '
+                f'comparing query counts and statuses only'
+            )
+            compare_latency = False
+        regressions = compare(
+            baseline['results'], results, options['tolerance'],
+            options['slack'], compare_latency=compare_latency
+        )
+        if regressions:
+            raise CommandError(
+                'Regressions against the baseline:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('No regressions'))
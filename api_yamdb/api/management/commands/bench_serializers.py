@@ -0,0 +1,157 @@
+import datetime as dt
+import random
+import timeit
+
+from api.serializers import ReviewSerializer, TitleDisplaySerializer
+from api.values_serializers import (ReviewValuesSerializer,
+                                    TitleValuesSerializer)
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Category, Genre, Review, Title
+
+User = get_user_model()
+
+# Порядок колонок - как у полей моделей, его ожидает Model.from_db.
+TITLE_COLUMNS = ('id', 'name', 'year', 'category_id', 'description',
+                 'rating_sum', 'rating_count')
+REVIEW_COLUMNS = ('id', 'text', 'author_id', 'score', 'pub_date')
+
+
+def generate(count, seed):
+    """
+    Строки, какими их вернула бы БД: произведения с категорией
+    и жанрами и отзывы с авторами.
+    """
+    rnd = random.Random(seed)
+    categories = [Category(pk=pk, name=f'Категория {pk}', slug=f'c{pk}')
+                  for pk in range(1, 6)]
+    genres = [Genre(pk=pk, name=f'Жанр {pk}', slug=f'g{pk}')
+              for pk in range(1, 11)]
+    users = [User(pk=pk, username=f'user{pk}') for pk in range(1, 51)]
+    titles = []
+    for pk in range(count, 0, -1):
+        rating_count = rnd.randint(0, 50)
+        category = rnd.choice([None, *categories])
+        titles.append((
+            (pk, f'Произведение {pk}', rnd.randint(1950, 2022),
+             category and category.pk, 'Описание ' * rnd.randint(0, 20),
+             rating_count * rnd.randint(1, 10), rating_count),
+            category,
+            sorted(rnd.sample(genres, rnd.randint(0, 3)),
+                   key=lambda genre: -genre.pk)
+        ))
+    now = dt.datetime(2022, 1, 1, tzinfo=dt.timezone.utc)
+    reviews = []
+    for pk in range(count, 0, -1):
+        author = rnd.choice(users)
+        reviews.append((
+            (pk, 'Отзыв ' * rnd.randint(1, 30), author.pk,
+             rnd.randint(1, 10),
+             now - dt.timedelta(seconds=pk * 37, microseconds=pk)),
+            author
+        ))
+    return titles, reviews
+
+
+def model_titles(titles):
+    """Экземпляры, как после select_related и prefetch_related."""
+    result = []
+    for values, category, genres in titles:
+        title = Title.from_db('default', TITLE_COLUMNS, values)
+        title.category = category
+        title._prefetched_objects_cache = {'genre': genres}
+        result.append(title)
+    return result
+
+
+def model_reviews(reviews):
+    result = []
+    for values, author in reviews:
+        review = Review.from_db('default', REVIEW_COLUMNS, values)
+        review.author = author
+        result.append(review)
+    return result
+
+
+def title_rows(titles):
+    rows = []
+    for values, category, genres in titles:
+        row = dict(zip(TITLE_COLUMNS, values))
+        row['category__name'] = category and category.name
+        row['category__slug'] = category and category.slug
+        row['genre'] = [
+            {'name': genre.name, 'slug': genre.slug} for genre in genres
+        ]
+        rows.append(row)
+    return rows
+
+
+def review_rows(reviews):
+    return [
+        dict(zip(REVIEW_COLUMNS, values), author__username=author.username)
+        for values, author in reviews
+    ]
+
+
+def serialize_models(serializer_class, build):
+    def run(data):
+        return JSONRenderer().render(
+            serializer_class(build(data), many=True).data
+        )
+    return run
+
+
+def serialize_rows(serializer_class, build):
+    def run(data):
+        serializer = serializer_class()
+        # Жанры уже в строках: без запроса к БД из serialize.
+        return JSONRenderer().render(
+            [serializer.to_representation(row) for row in build(data)]
+        )
+    return run
+
+
+BENCHMARKS = (
+    ('titles', 0,
+     serialize_models(TitleDisplaySerializer, model_titles),
+     serialize_rows(TitleValuesSerializer, title_rows)),
+    ('reviews', 1,
+     serialize_models(ReviewSerializer, model_reviews),
+     serialize_rows(ReviewValuesSerializer, review_rows)),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares ModelSerializer and .values() serializers on generated '
+        'data: building objects or rows, serialization and JSON rendering'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000,
+                            help='Objects per run')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs per path; the best one is shown')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        count = options['count']
+        data = generate(count, options['seed'])
+        for name, index, slow, fast in BENCHMARKS:
+            if slow(data[index]) != fast(data[index]):
+                raise CommandError(f'{name}: outputs differ')
+            times = [
+                min(timeit.repeat(
+                    lambda: path(data[index]),
+                    number=1, repeat=options['repeat']
+                ))
+                for path in (slow, fast)
+            ]
+            self.stdout.write(
+                f'{name:8} ModelSerializer {times[0] * 1000:8.1f} ms '
+                f'({times[0] / count * 1e6:6.1f} us/item)  '
+                f'values {times[1] * 1000:8.1f} ms '
+                f'({times[1] / count * 1e6:6.1f} us/item)  '
+                f'x{times[0] / times[1]:.1f}'
+            )
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+from api.warmup import group_by_package, parse_importtime
+from django.core.management.base import BaseCommand, CommandError
+
+# Выполняется в отдельном интерпретаторе, чтобы импорты были холодными.
+BOOT_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - started
+from api.warmup import warm_up
+print(json.dumps(dict(setup=setup, **warm_up())))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Profiles cold start: import time by module and warm-up steps'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Number of slowest modules and packages to show'
+        )
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True, env=os.environ.copy(),
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        imports = parse_importtime(result.stderr.splitlines())
+        limit = options['limit']
+        self.stdout.write('Slowest imports (cumulative, ms):')
+        for module, _, cumulative in sorted(
+                imports, key=lambda item: -item[2])[:limit]:
+            self.stdout.write(f'  {cumulative / 1000:9.1f}  {module}')
+        self.stdout.write('Import time by package (self, ms):')
+        for package, own in group_by_package(imports)[:limit]:
+            self.stdout.write(f'  {own / 1000:9.1f}  {package}')
+        total = sum(own for _, own, _ in imports)
+        self.stdout.write(f'Total import time: {total / 1000:.1f} ms')
+        self.stdout.write('Boot steps (ms):')
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        for step, seconds in timings.items():
+            self.stdout.write(f'  {seconds * 1000:9.1f}  {step}')
@@ -0,0 +1,81 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.permissions import SAFE_METHODS
+
+from api_yamdb.db.routers import (allow_replica_reads, choose_replica,
+                                  reset_replica_reads)
+
+from .queries import QueryInspector, logger
+
+STICKY_COOKIE = 'primary_until'
+STICKY_HEADER = 'X-Primary-Until'
+
+
+class RepeatedQueriesMiddleware:
+    """
+    Логирует повторяющиеся в рамках одного запроса SQL-запросы.
+    Включается настройкой QUERY_INSPECTOR_ENABLED,
+    при QUERY_INSPECTOR_RAISE ответ завершается ошибкой.
+    """
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTOR_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryInspector() as inspector:
+            response = self.get_response(request)
+        return self.report(request, response, inspector)
+
+    def report(self, request, response, inspector):
+        if not inspector.repeated:
+            return response
+        logger.warning(
+            'N+1 in %s %s (%s queries):\n%s',
+            request.method, request.path,
+            inspector.total, inspector.report()
+        )
+        if settings.QUERY_INSPECTOR_RAISE:
+            inspector.check()
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Безопасные запросы читают с реплики, выбранной один раз на весь
+    запрос: его SELECT не переходят между репликами с разным
+    отставанием. После успешной записи клиент получает cookie
+    и заголовок X-Primary-Until: пока они действуют, его чтение
+    идет с основной базы и он видит свои изменения.
+    """
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replica = None
+        if request.method in SAFE_METHODS and not self.is_sticky(request):
+            replica = choose_replica()
+        token = allow_replica_reads(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_replica_reads(token)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            until = int(time.time()) + settings.DB_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE, str(until), max_age=settings.DB_STICKY_SECONDS
+            )
+            response[STICKY_HEADER] = str(until)
+        return response
+
+    def is_sticky(self, request):
+        until = (request.COOKIES.get(STICKY_COOKIE)
+                 or request.headers.get(STICKY_HEADER))
+        try:
+            return int(until) > time.time()
+        except (TypeError, ValueError):
+            return False
@@ -0,0 +1,322 @@
+import hashlib
+import json
+from collections import namedtuple
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from reviews.generations import generation_key, request_generations
+
+from api_yamdb.db.routers import replica_reads_allowed
+
+from .filters import split_values
+from .permissions import IsStaff
+
+NDJSON = 'application/x-ndjson'
+
+
+class FieldSource(namedtuple('FieldSource', 'only select prefetch')):
+    """
+    Что нужно из БД для поля ответа: колонки для only(),
+    связи для select_related и prefetch_related.
+    """
+    def __new__(cls, only=(), select=(), prefetch=()):
+        return super().__new__(cls, only, select, prefetch)
+
+
+class NDJSONRenderer(JSONRenderer):
+    """
+    Позволяет согласовать Accept: application/x-ndjson;
+    обычные ответы (ошибки) отдаются одной JSON-строкой.
+    """
+    media_type = NDJSON
+    format = 'ndjson'
+
+
+class StreamingListMixin:
+    """
+    Потоковая выдача всего списка без пагинации: ?stream=1 (JSON-массив)
+    или заголовок Accept: application/x-ndjson. Только для персонала.
+    Строки читаются из БД пачками, ответ отдается по мере сериализации.
+    """
+    stream_param = 'stream'
+    stream_chunk_size = 500
+
+    def get_renderers(self):
+        return super().get_renderers() + [NDJSONRenderer()]
+
+    def accepts_ndjson(self):
+        return NDJSON in self.request.META.get('HTTP_ACCEPT', '')
+
+    def wants_stream(self):
+        return (
+            self.request.query_params.get(self.stream_param) in ('1', 'true')
+            or self.accepts_ndjson()
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.wants_stream():
+            return super().list(request, *args, **kwargs)
+        if not IsStaff().has_permission(request, self):
+            raise PermissionDenied(
+                'Потоковая выгрузка доступна только персоналу.'
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.accepts_ndjson():
+            return StreamingHttpResponse(
+                (f'{item}\n' for item in self.stream_items(queryset)),
+                content_type=NDJSON
+            )
+        return StreamingHttpResponse(
+            self.stream_array(queryset), content_type='application/json'
+        )
+
+    def stream_chunks(self, queryset):
+        """
+        Объекты пачками в порядке queryset. Id читаются курсором,
+        объекты пачки - одним запросом, с select/prefetch_related.
+        """
+        pks = queryset.values_list('pk', flat=True).iterator(
+            chunk_size=self.stream_chunk_size
+        )
+        while True:
+            chunk = list(islice(pks, self.stream_chunk_size))
+            if not chunk:
+                return
+            objects = queryset.in_bulk(chunk)
+            yield [objects[pk] for pk in chunk if pk in objects]
+
+    def stream_items(self, queryset):
+        for chunk in self.stream_chunks(queryset):
+            for item in self.get_serializer(chunk, many=True).data:
+                yield json.dumps(
+                    item, cls=JSONEncoder, ensure_ascii=False,
+                    separators=(',', ':')
+                )
+
+    def stream_array(self, queryset):
+        yield '['
+        separator = ''
+        for item in self.stream_items(queryset):
+            yield separator + item
+            separator = ','
+        yield ']'
+
+
+def request_role(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    return user.role
+
+
+def request_fingerprint(request, version):
+    """
+    Хеш пути, параметров запроса, согласованного формата ответа,
+    роли пользователя и версии данных.
+    """
+    query = '&'.join(
+        f'{key}={value}'
+        for key, value in sorted(request.query_params.lists())
+    )
+    media_type = getattr(request, 'accepted_media_type', '')
+    raw = (
+        f'{request.path}?{query}|{media_type}|{request_role(request)}'
+        f'|{version}'
+    )
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+class VersionedDataMixin:
+    """
+    Версия данных, которые отдает вьюсет: поколения моделей
+    из cache_models. Вьюсеты с вложенными маршрутами сужают версию
+    до своей части данных.
+    """
+    cache_models = ()
+
+    def get_version_keys(self):
+        return [generation_key(model) for model in self.cache_models]
+
+    @cached_property
+    def data_version(self):
+        """Поколения читаются одним запросом к БД за HTTP-запрос."""
+        return request_generations(self.request).version(
+            self.get_version_keys()
+        )
+
+
+class CachedResponseMixin(VersionedDataMixin):
+    """
+    Кеширует данные ответов list/retrieve. Ключ - путь, параметры
+    запроса, роль пользователя и версия данных: любая запись
+    в модели вьюсета делает старые записи недостижимыми.
+    """
+    def get_response_cache_key(self, request):
+        return 'api-response:' + request_fingerprint(
+            request, self.data_version
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        timeout = settings.API_RESPONSE_CACHE_TIMEOUT
+        if not timeout:
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        # Ответ с отстающей реплики нельзя сохранять под версией
+        # данных основной базы.
+        if (
+            isinstance(response, Response) and response.status_code == 200
+            and not replica_reads_allowed()
+        ):
+            cache.set(key, response.data, timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin(VersionedDataMixin):
+    """
+    ETag для list/retrieve считается из версии данных до запросов
+    к БД и сериализации; если копия клиента актуальна - 304 без тела.
+    В ETag входит формат ответа: JSON и NDJSON - разные представления.
+    Ответ, прочитанный с реплики, ETag не получает.
+    """
+    def get_etag(self, request):
+        # Та же версия, что и у ключа кеша ответов: один раз за запрос.
+        return '"{}"'.format(request_fingerprint(request, self.data_version))
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        client_etags = [
+            tag[2:] if tag.startswith('W/') else tag
+            for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        ]
+        if etag in client_etags or '*' in client_etags:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+        response = handler(request, *args, **kwargs)
+        if (
+            isinstance(response, Response) and response.status_code == 200
+            and not replica_reads_allowed()
+        ):
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=a,b и ?omit=c для list и retrieve. Неотданные поля
+    и не читаются: field_sources задает для каждого поля колонки
+    и связи, get_queryset вьюсета пропускает queryset через
+    sparse_queryset. sparse_always - колонки, которые читаются
+    всегда (например, внешний ключ на родителя во вложенных ресурсах).
+    """
+    field_sources = {}
+    sparse_actions = ('list', 'retrieve')
+    sparse_always = ()
+
+    @cached_property
+    def sparse_fields(self):
+        params = self.request.query_params
+        if (self.action not in self.sparse_actions
+                or not ('fields' in params or 'omit' in params)):
+            return None
+        fields = split_values(params.get('fields', ''))
+        omit = split_values(params.get('omit', ''))
+        unknown = set(fields + omit) - set(self.field_sources)
+        if unknown:
+            raise ValidationError({
+                'fields': 'Неизвестные поля: {}. Доступны: {}.'.format(
+                    ', '.join(sorted(unknown)), ', '.join(self.field_sources)
+                )
+            })
+        return [
+            name for name in self.field_sources
+            if (not fields or name in fields) and name not in omit
+        ]
+
+    def sparse_queryset(self, queryset):
+        if self.sparse_fields is None:
+            return queryset
+        sources = [self.field_sources[name] for name in self.sparse_fields]
+        # Колонки сортировки нужны пагинатору по курсору.
+        only = {'pk', *self.sparse_always} | {
+            name.lstrip('-') for name in getattr(self, 'cursor_ordering', ())
+        }
+        queryset = queryset.select_related(None).prefetch_related(None)
+        for source in sources:
+            only.update(source.only)
+            if source.select:
+                queryset = queryset.select_related(*source.select)
+            queryset = queryset.prefetch_related(*source.prefetch)
+        return queryset.only(*only)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.sparse_fields is not None:
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in list(fields):
+                if name not in self.sparse_fields:
+                    del fields[name]
+        return serializer
+
+
+class ValuesListMixin:
+    """
+    list без ModelSerializer: queryset переводится в .values()
+    до пагинации, страницу сериализует values_serializer_class
+    (см. api.values_serializers). Учитывает ?fields=/?omit=
+    и курсорную пагинацию; потоковая выгрузка и retrieve
+    работают через обычный сериализатор.
+    """
+    values_serializer_class = None
+
+    def get_values_serializer(self):
+        return self.values_serializer_class(
+            getattr(self, 'sparse_fields', None)
+        )
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        queryset = serializer.values(
+            self.filter_queryset(self.get_queryset()),
+            extra=[
+                name.lstrip('-')
+                for name in getattr(self, 'cursor_ordering', ())
+            ]
+        )
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serializer.serialize(queryset))
+        return self.get_paginated_response(serializer.serialize(page))
@@ -0,0 +1,175 @@
+import base64
+import binascii
+import datetime as dt
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+INVALID_CURSOR = 'Неверный курсор.'
+
+
+def encode_cursor(position, reverse=False):
+    """
+    Кодирует позицию (значения полей сортировки) в строку курсора.
+    """
+    payload = {
+        'p': [
+            value.isoformat() if isinstance(value, dt.datetime) else value
+            for value in position
+        ],
+        'r': int(reverse),
+    }
+    return base64.urlsafe_b64encode(
+        json.dumps(payload, separators=(',', ':')).encode()
+    ).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Возвращает (позиция, reverse); для пустого курсора - первая страница.
+    """
+    if not cursor:
+        return None, False
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return list(payload['p']), bool(payload['r'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise NotFound(INVALID_CURSOR)
+
+
+def parse_ordering(ordering):
+    return [
+        (field.lstrip('-'), field.startswith('-')) for field in ordering
+    ]
+
+
+def clean_position(model, ordering, position):
+    """
+    Позиция из курсора - ввод клиента: приводим значения к типам
+    полей сортировки, неподходящий курсор - 404, как в CursorPagination.
+    """
+    fields = [
+        model._meta.get_field(name) for name, _ in parse_ordering(ordering)
+    ]
+    if len(position) != len(fields) or None in position:
+        raise NotFound(INVALID_CURSOR)
+    try:
+        return [
+            field.to_python(value) for field, value in zip(fields, position)
+        ]
+    except (ValidationError, TypeError, ValueError):
+        raise NotFound(INVALID_CURSOR)
+
+
+def keyset_filter(ordering, position, reverse=False):
+    """
+    Условие "строго после позиции" для лексикографической
+    сортировки по нескольким полям.
+    """
+    condition = Q()
+    equal = Q()
+    for (field, descending), value in zip(parse_ordering(ordering),
+                                          position):
+        lookup = 'lt' if descending != reverse else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def get_position(item, ordering):
+    if isinstance(item, dict):
+        return [item[field] for field, _ in parse_ordering(ordering)]
+    return [getattr(item, field) for field, _ in parse_ordering(ordering)]
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """
+    Постраничная пагинация по умолчанию; с параметром ?cursor=
+    (в том числе пустым) - keyset-пагинация по полям cursor_ordering
+    вьюсета. Глубокие страницы стоят столько же, сколько первая.
+    """
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_ordering = getattr(view, 'cursor_ordering', None)
+        self.use_cursor = (
+            self.cursor_ordering is not None
+            and self.cursor_query_param in request.query_params
+        )
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_keyset(queryset, request)
+
+    def paginate_keyset(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        position, reverse = decode_cursor(
+            request.query_params[self.cursor_query_param]
+        )
+        ordering = self.cursor_ordering
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            position = clean_position(
+                queryset.model, self.cursor_ordering, position
+            )
+            queryset = queryset.filter(
+                keyset_filter(self.cursor_ordering, position, reverse)
+            )
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page_results = results
+        return results
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next or not self.page_results:
+            return None
+        return self.get_cursor_link(self.page_results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        if not self.page_results:
+            return replace_query_param(
+                self.request.build_absolute_uri(),
+                self.cursor_query_param, ''
+            )
+        return self.get_cursor_link(self.page_results[0], reverse=True)
+
+    def get_cursor_link(self, item, reverse):
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        cursor = encode_cursor(
+            get_position(item, self.cursor_ordering), reverse
+        )
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
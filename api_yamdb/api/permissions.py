@@ -37,3 +37,11 @@ class IsAuthorOrStaffOrReadOnly(permissions.BasePermission):
                 or obj.author == request.user
                 or request.user.is_admin_or_superuser
                 or request.user.is_moderator)
+
+
+class IsStaff(permissions.BasePermission):
+    """Доступ только модератору, админу и суперюзеру."""
+    def has_permission(self, request, view):
+        return (request.user.is_authenticated
+                and (request.user.is_admin_or_superuser
+                     or request.user.is_moderator))
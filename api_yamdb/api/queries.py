@@ -0,0 +1,92 @@
+import logging
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """
+    Приводит SQL к "форме" запроса: литералы и параметры
+    заменяются на '?', списки IN (...) схлопываются.
+    """
+    shape = sql.replace('%s', '?')
+    shape = STRING_LITERAL.sub('?', shape)
+    shape = NUMBER_LITERAL.sub('?', shape)
+    shape = PLACEHOLDER_LIST.sub('(?)', shape)
+    return WHITESPACE.sub(' ', shape).strip()
+
+
+class RepeatedQueriesError(AssertionError):
+    """
+    Запрос одной формы выполнен больше допустимого числа раз.
+    """
+
+
+class QueryInspector:
+    """
+    Собирает формы SQL-запросов внутри блока with
+    и находит повторяющиеся (признак N+1).
+    """
+    def __init__(self, threshold=None, strict=False, using=None):
+        if threshold is None:
+            threshold = settings.QUERY_INSPECTOR_THRESHOLD
+        self.threshold = threshold
+        self.strict = strict
+        self.connection = connection if using is None else using
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.shapes[normalize_sql(sql)] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._wrapper.__exit__(exc_type, exc_value, traceback)
+        if self.strict and exc_type is None:
+            self.check()
+
+    @property
+    def total(self):
+        return sum(self.shapes.values())
+
+    @property
+    def repeated(self):
+        return {
+            shape: count for shape, count in self.shapes.items()
+            if count >= self.threshold
+        }
+
+    def report(self):
+        return '\n'.join(
+            f'{count} x {shape}'
+            for shape, count in sorted(
+                self.repeated.items(), key=lambda item: -item[1]
+            )
+        )
+
+    def check(self):
+        if self.repeated:
+            raise RepeatedQueriesError(
+                f'Повторяющиеся запросы:\n{self.report()}'
+            )
+
+
+def assert_no_repeated_queries(threshold=None, using=None):
+    """
+    Хелпер для тестов: блок with падает с RepeatedQueriesError,
+    если внутри него есть повторяющиеся запросы.
+    """
+    return QueryInspector(threshold, strict=True, using=using)
@@ -8,8 +8,13 @@ from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from reviews.models import Category, Comment, Genre, Review, Title
 
+from .authentication import add_user_claims
+
 User = get_user_model()
 
+# Максимальный размер пакета в bulk-запросах.
+BULK_MAX_ITEMS = 1000
+
 
 class CategorySerializer(serializers.ModelSerializer):
     """
@@ -99,6 +104,56 @@ class TitleSerializer(serializers.ModelSerializer):
         ]
 
 
+class TitleBulkItemSerializer(serializers.Serializer):
+    """
+    Элемент пакетной записи произведений: без id - создание,
+    с id - обновление переданных полей. Слаги и уникальность
+    проверяются для всего пакета сразу в reviews.bulk.
+    """
+    CREATE_FIELDS = ('name', 'year', 'category', 'genre')
+
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=256, required=False)
+    year = serializers.IntegerField(required=False)
+    description = serializers.CharField(required=False, allow_blank=True)
+    category = serializers.SlugField(required=False)
+    genre = serializers.ListField(
+        child=serializers.SlugField(), required=False
+    )
+
+    validate_year = TitleSerializer.validate_year
+
+    def validate(self, data):
+        if 'id' not in data:
+            missing = [
+                field for field in self.CREATE_FIELDS if field not in data
+            ]
+            if missing:
+                raise serializers.ValidationError(
+                    {field: 'Обязательное поле.' for field in missing}
+                )
+        return data
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    """Удаление отзывов или комментариев по id и/или по авторам."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False,
+        max_length=BULK_MAX_ITEMS
+    )
+    authors = serializers.ListField(
+        child=serializers.CharField(), required=False,
+        max_length=BULK_MAX_ITEMS
+    )
+
+    def validate(self, data):
+        if not data.get('ids') and not data.get('authors'):
+            raise serializers.ValidationError(
+                'Укажите ids или authors.'
+            )
+        return data
+
+
 class TitleDisplaySerializer(serializers.ModelSerializer):
     """
     Обслуживает модель 'Title'.
@@ -106,6 +161,7 @@ class TitleDisplaySerializer(serializers.ModelSerializer):
     """
     category = CategoryDisplaySerializer(read_only=True)
     genre = GenreDisplaySerializer(read_only=True, many=True)
+    # Читается из денормализованных полей rating_sum/rating_count.
     rating = serializers.FloatField(read_only=True)
 
     class Meta:
@@ -183,6 +239,11 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         self.fields['confirmation_code'] = serializers.CharField()
         del self.fields['password']  # Вместо пароля confirmation_code
 
+    @classmethod
+    def get_token(cls, user):
+        # Роль и имя в токене: права проверяются без запроса к БД.
+        return add_user_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         user = get_object_or_404(User, username=attrs['username'])
         refresh = self.get_token(user)
@@ -201,22 +262,10 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
+        # Один отзыв на произведение обеспечивает ограничение
+        # unique_review, см. ReviewViewSet.perform_create.
         fields = ('id', 'text', 'author', 'score', 'pub_date',)
 
-    def validate(self, data):
-        author = self.context.get('request').user
-        title_id = get_object_or_404(
-            Title,
-            id=self.context.get('view').kwargs.get('title_id')
-        )
-        if (self.context.get('request').method == 'POST'
-            and Review.objects.filter(
-                title_id=title_id,
-                author_id=author.id).exists()):
-            raise serializers.ValidationError(
-                'Возможно оставить только один отзыв')
-        return data
-
 
 class CommentSerializer(serializers.ModelSerializer):
     """
@@ -231,11 +280,3 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date',)
-
-    def validate(self, data):
-        get_object_or_404(
-            Review,
-            id=self.context.get('view').kwargs.get('review_id'),
-            title_id=self.context.get('view').kwargs.get('title_id')
-        )
-        return data
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import CLAIM_FIELDS, revoke_tokens
+
+User = get_user_model()
+# Поля, от которых зависят права по токену.
+REVOKING_FIELDS = (*CLAIM_FIELDS, 'is_active')
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_claims(sender, instance, **kwargs):
+    instance._previous_claims = None
+    if instance.pk is not None:
+        instance._previous_claims = User.objects.filter(
+            pk=instance.pk
+        ).values_list(*REVOKING_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_claims(sender, instance, created, **kwargs):
+    """
+    Роль, имя или is_active изменились: счетчик токенов растет
+    в той же транзакции, выданные раньше токены не принимаются.
+    """
+    previous = getattr(instance, '_previous_claims', None)
+    current = tuple(getattr(instance, field) for field in REVOKING_FIELDS)
+    if previous is not None and previous != current:
+        revoke_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user(sender, instance, **kwargs):
+    revoke_tokens(instance.pk)
@@ -0,0 +1,146 @@
+from django.db import connections
+from rest_framework.throttling import SimpleRateThrottle
+from reviews.models import ThrottleBucket, UserRole
+
+# Пополнение и списание токена одним оператором: строка корзины
+# блокируется самим UPDATE, параллельные запросы не тратят один токен.
+# Если токена нет, WHERE не пропускает UPDATE и RETURNING пуст.
+TAKE_TOKEN_SQL = """
+    INSERT INTO {table} AS bucket ({key}, tokens, updated)
+    VALUES (%s, %s, %s)
+    ON CONFLICT ({key}) DO UPDATE SET
+        tokens = {least}(%s, bucket.tokens
+            + (EXCLUDED.updated - bucket.updated) * %s) - 1,
+        updated = EXCLUDED.updated
+    WHERE {least}(%s, bucket.tokens
+        + (EXCLUDED.updated - bucket.updated) * %s) >= 1
+    RETURNING tokens
+"""
+
+
+def take_token(state, now, capacity, period):
+    """
+    Один шаг token bucket. state - (токены, время обновления) или None.
+    Корзина вмещает capacity токенов и равномерно пополняется
+    за period секунд. Возвращает (разрешено, новое состояние, ожидание).
+    """
+    refill_rate = capacity / period
+    tokens, updated = state or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * refill_rate)
+    if tokens >= 1:
+        return True, (tokens - 1, now), 0
+    return False, (tokens, now), (1 - tokens) / refill_rate
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты по token bucket. Корзины хранятся в таблице
+    ThrottleBucket основной базы, поэтому лимиты общие для всех
+    воркеров gunicorn. Запрос стоит один оператор, при отказе -
+    еще один SELECT для заголовка Retry-After.
+    """
+    methods = ('POST',)
+    wait_time = None
+
+    def allow_request(self, request, view):
+        if self.rate is None or request.method not in self.methods:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        now = self.timer()
+        if self.take(now):
+            self.wait_time = 0
+            return True
+        state = ThrottleBucket.objects.using('default').filter(
+            key=self.key
+        ).values_list('tokens', 'updated').first()
+        _, _, self.wait_time = take_token(
+            state, now, self.num_requests, self.duration
+        )
+        return False
+
+    def take(self, now):
+        connection = connections['default']
+        quote = connection.ops.quote_name
+        sql = TAKE_TOKEN_SQL.format(
+            table=quote(ThrottleBucket._meta.db_table),
+            key=quote('key'),
+            least='MIN' if connection.vendor == 'sqlite' else 'LEAST',
+        )
+        capacity = self.num_requests
+        refill_rate = capacity / self.duration
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                self.key, capacity - 1, now,
+                capacity, refill_rate, capacity, refill_rate,
+            ])
+            return cursor.fetchone() is not None
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPThrottle(TokenBucketThrottle):
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)
+        }
+
+
+class UsernameThrottle(TokenBucketThrottle):
+    """Лимит на имя пользователя из тела запроса."""
+    def get_cache_key(self, request, view):
+        if not isinstance(request.data, dict):
+            return None
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return self.cache_format % {
+            'scope': self.scope, 'ident': username.lower()
+        }
+
+
+class SignupIPThrottle(IPThrottle):
+    scope = 'signup_ip'
+
+
+class SignupUsernameThrottle(UsernameThrottle):
+    scope = 'signup_username'
+
+
+class TokenIPThrottle(IPThrottle):
+    scope = 'token_ip'
+
+
+class TokenUsernameThrottle(UsernameThrottle):
+    scope = 'token_username'
+
+
+class WriteIPThrottle(IPThrottle):
+    scope = 'write_ip'
+
+
+class WriteRoleThrottle(TokenBucketThrottle):
+    """
+    Лимит на создание отзывов и комментариев для пользователя.
+    Частота берется из scope write_<роль>.
+    """
+    def __init__(self):
+        # Частота зависит от роли и выбирается в allow_request.
+        pass
+
+    def allow_request(self, request, view):
+        if not request.user.is_authenticated:
+            return True
+        role = (UserRole.ADMIN if request.user.is_superuser
+                else request.user.role)
+        self.scope = f'write_{role}'
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': request.user.pk
+        }
@@ -3,7 +3,8 @@ from rest_framework import routers
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
                     MyTokenObtainPairView, ReviewViewSet, TitleViewSet,
-                    UserDetail, UserList, UserSelfDetail, send_token)
+                    UserDetail, UserList, UserSelfDetail, db_pool_stats,
+                    send_token)
 
 router = routers.DefaultRouter()
 router.register('categories', CategoryViewSet)
@@ -29,6 +30,7 @@ urlpatterns = [
         MyTokenObtainPairView.as_view(),
         name='token_obtain_pair'
     ),
+    path('v1/admin/db-pool/', db_pool_stats),
     path('v1/users/', UserList.as_view()),
     path('v1/users/me/', UserSelfDetail.as_view()),
     re_path(r'v1/users/(?P<username>[\w.@+-]+)/$', UserDetail.as_view()),
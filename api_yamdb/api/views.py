@@ -1,55 +1,238 @@
+import os
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, permissions, status, viewsets
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
-from reviews.models import Category, Genre, Review, Title
-
-from api_yamdb.settings import EMAIL_HOST_USER
-
-from .filters import TitleFilter
-from .permissions import IsAdmin, IsAdminOrReadOnly, IsAuthorOrStaffOrReadOnly
-from .serializers import (CategorySerializer, CommentSerializer,
+from reviews.bulk import (TITLE_FIELDS, delete_comments, delete_reviews,
+                          prepare_titles, save_titles)
+from reviews.generations import generation_key, scoped_keys
+from reviews.leaderboards import TOP, TRENDING, get_leaderboard
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.outbox import enqueue_email
+from reviews.rollups import PERIODS, title_stats
+
+from api_yamdb.db.backends.pooled.base import pool_stats
+from api_yamdb.settings import DB_ENGINE, EMAIL_HOST_USER, POOLED_DB_ENGINE
+
+from .authentication import VersionedJWTAuthentication
+from .filters import TitleFilter, TitleSearchFilter, split_values
+from .mixins import (CachedResponseMixin, ConditionalGetMixin, FieldSource,
+                     SparseFieldsMixin, StreamingListMixin, ValuesListMixin)
+from .permissions import (IsAdmin, IsAdminOrReadOnly,
+                          IsAuthorOrStaffOrReadOnly, IsStaff)
+from .serializers import (BULK_MAX_ITEMS, BulkDeleteSerializer,
+                          CategorySerializer, CommentSerializer,
                           GenreSerializer, MyTokenObtainPairSerializer,
                           ReviewSerializer, SignUpSerializer,
-                          TitleDisplaySerializer, TitleSerializer,
-                          UserSerializer)
+                          TitleBulkItemSerializer, TitleDisplaySerializer,
+                          TitleSerializer, UserSerializer)
+from .throttling import (SignupIPThrottle, SignupUsernameThrottle,
+                         TokenIPThrottle, TokenUsernameThrottle,
+                         WriteIPThrottle, WriteRoleThrottle)
+from .values_serializers import (CommentValuesSerializer,
+                                 ReviewValuesSerializer, TitleValuesSerializer)
 from .viewsets import CreateListDeleteViewSet
 
 User = get_user_model()
 
 
-class CategoryViewSet(CreateListDeleteViewSet):
+class CategoryViewSet(ConditionalGetMixin, CachedResponseMixin,
+                      CreateListDeleteViewSet):
     """Обработка запросов к категориям."""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = (Category,)
 
 
-class GenreViewSet(CreateListDeleteViewSet):
+class GenreViewSet(ConditionalGetMixin, CachedResponseMixin,
+                   CreateListDeleteViewSet):
     """Обработка запросов к жанрам."""
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = (Genre,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, CachedResponseMixin,
+                   SparseFieldsMixin, StreamingListMixin, ValuesListMixin,
+                   viewsets.ModelViewSet):
     """Обработка запросов к произведениям."""
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('-id')
+    queryset = Title.objects.select_related(
+        'category').prefetch_related('genre').order_by('-id')
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter)
     filterset_class = TitleFilter
+    cursor_ordering = ('-id',)
+    values_serializer_class = TitleValuesSerializer
+    # Рейтинг зависит от отзывов.
+    cache_models = (Title, Category, Genre, GenreTitle, Review)
+    field_sources = {
+        'id': FieldSource(),
+        'name': FieldSource(only=('name',)),
+        'year': FieldSource(only=('year',)),
+        'rating': FieldSource(only=('rating_sum', 'rating_count')),
+        'description': FieldSource(only=('description',)),
+        'genre': FieldSource(prefetch=('genre',)),
+        'category': FieldSource(
+            only=('category', 'category__name', 'category__slug'),
+            select=('category',)
+        ),
+    }
+
+    def get_queryset(self):
+        return self.sparse_queryset(super().get_queryset())
 
     def get_serializer_class(self):
         if self.action in ('retrieve', 'list'):
             return TitleDisplaySerializer
         return TitleSerializer
 
+    @cached_property
+    def facet_ids(self):
+        """
+        Id произведений из индекса, если в запросе списка только
+        фильтры по году, категории и жанру.
+        """
+        params = set(self.request.query_params) - {
+            self.paginator.page_query_param
+        }
+        if (self.action != 'list' or not params
+                or params - set(TitleFilter.FACET_PARAMS)
+                or self.wants_stream()):
+            return None
+        filterset = self.filterset_class(
+            self.request.query_params,
+            queryset=self.get_queryset(),
+            request=self.request
+        )
+        if not filterset.is_valid():
+            return None
+        return filterset.facet_ids()
+
+    def filter_queryset(self, queryset):
+        if self.facet_ids is not None:
+            return queryset
+        return super().filter_queryset(queryset)
+
+    def paginate_queryset(self, queryset):
+        """
+        Для фасетных запросов страница нарезается из индекса,
+        из БД читаются только произведения этой страницы
+        (строки .values(), см. ValuesListMixin).
+        """
+        # Пакетное чтение по id отдается целиком, без страниц;
+        # пустой ?ids= - обычный постраничный список.
+        ids = split_values(self.request.query_params.get('ids', ''))
+        if len(ids) > BULK_MAX_ITEMS:
+            raise ValidationError(
+                {'ids': f'Не больше {BULK_MAX_ITEMS} id за запрос.'}
+            )
+        if ids:
+            return None
+        if self.facet_ids is None:
+            return super().paginate_queryset(queryset)
+        page_ids = super().paginate_queryset(self.facet_ids)
+        titles = {
+            row['id']: row for row in queryset.filter(pk__in=page_ids)
+        }
+        return [titles[pk] for pk in page_ids if pk in titles]
+
+    @action(detail=False, methods=['post'], permission_classes=(IsAdmin,))
+    def bulk(self, request):
+        """
+        Создание (без id) и обновление (с id) произведений пакетом.
+        Пакет проверяется целиком и пишется одной транзакцией.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError('Ожидается список произведений.')
+        if len(request.data) > BULK_MAX_ITEMS:
+            raise ValidationError(
+                f'Не больше {BULK_MAX_ITEMS} произведений за запрос.'
+            )
+        serializer = TitleBulkItemSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+        errors, plan = prepare_titles(items)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        fields = sorted({
+            field for item in items if 'id' in item
+            for field in item if field in TITLE_FIELDS
+        })
+        return Response([
+            {'id': pk, 'status': 'created' if created else 'updated'}
+            for pk, created in save_titles(plan, fields)
+        ])
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """
+        Гистограмма оценок, счетчики и активность по дням или неделям.
+        Читаются только сводки reviews.rollups.
+        """
+        period = request.query_params.get('period', 'day')
+        if period not in PERIODS:
+            raise ValidationError({'period': f'Допустимо: {PERIODS}'})
+        try:
+            limit = int(request.query_params.get('limit', 30))
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число.'})
+        stats = pk.isdigit() and title_stats(
+            int(pk), period, min(max(limit, 1), 366)
+        )
+        if not stats:
+            raise NotFound
+        return Response(stats)
+
+    @action(detail=False, methods=['get'])
+    def top(self, request):
+        """Лучшие произведения по байесовскому среднему оценок."""
+        return self.leaderboard_response(request, TOP)
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """Произведения, о которых больше всего пишут сейчас."""
+        return self.leaderboard_response(request, TRENDING)
+
+    def leaderboard_response(self, request, kind):
+        """
+        Первые limit произведений готового рейтинга; фильтры по году,
+        категории и жанру применяются по битовым картам индекса.
+        """
+        filterset = self.filterset_class(
+            request.query_params, queryset=self.get_queryset(),
+            request=request
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число.'})
+        ranked = get_leaderboard(kind).top(
+            min(max(limit, 1), 100), filterset.facet_bitmap()
+        )
+        titles = self.get_queryset().in_bulk(
+            [title_id for title_id, _ in ranked]
+        )
+        data = []
+        for title_id, score in ranked:
+            if title_id in titles:
+                item = TitleDisplaySerializer(titles[title_id]).data
+                item['score'] = round(score, 3)
+                data.append(item)
+        return Response(data)
+
 
 class UserList(generics.ListCreateAPIView):
     """Обработка запросов к пользователям."""
@@ -75,6 +258,8 @@ class UserSelfDetail(generics.RetrieveUpdateAPIView):
     """Обработка запросов к своему пользователю."""
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    # Нужен полный пользователь из БД, а не claims токена.
+    authentication_classes = (VersionedJWTAuthentication,)
 
     def get_object(self):
         queryset = self.get_queryset()
@@ -96,6 +281,7 @@ class MyTokenObtainPairView(TokenObtainPairView):
 
     serializer_class = MyTokenObtainPairSerializer
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (TokenIPThrottle, TokenUsernameThrottle)
 
     def post(self, request, *args, **kwargs):
         serializer = MyTokenObtainPairSerializer(data=request.data)
@@ -116,8 +302,22 @@ class MyTokenObtainPairView(TokenObtainPairView):
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
+@api_view(['GET', ])
+@permission_classes((IsAdmin, ))
+def db_pool_stats(request):
+    """
+    Счетчики пула соединений с БД воркера, обработавшего запрос.
+    """
+    return Response({
+        'enabled': DB_ENGINE == POOLED_DB_ENGINE,
+        'pid': os.getpid(),
+        'pools': pool_stats(),
+    })
+
+
 @api_view(['POST', ])
 @permission_classes((permissions.AllowAny, ))
+@throttle_classes((SignupIPThrottle, SignupUsernameThrottle))
 def send_token(request):
     """
     Отправка кода подтверждения по почте.
@@ -133,67 +333,173 @@ def send_token(request):
         username=serializer.data['username'],
         email=serializer.data['email'],
     )
-    # Отправим письмо с кодом подтверждения
+    # Письмо с кодом подтверждения уходит через очередь send_outbox
     confirmation_code = default_token_generator.make_token(user_obj)
-    send_mail(
+    enqueue_email(
         'Подтверждение регистрации пользователя',
         f'Код подтверждения: {confirmation_code}',
-        EMAIL_HOST_USER,
         [serializer.data['email']],
-        fail_silently=False,
+        EMAIL_HOST_USER,
     )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+def bulk_delete_response(request, queryset, delete):
+    """
+    Удаляет записи queryset с id из ids или от авторов из authors
+    и отвечает списками удаленных и ненайденных id.
+    """
+    serializer = BulkDeleteSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data.get('ids', [])
+    deleted = delete(queryset.filter(
+        Q(pk__in=ids)
+        | Q(author__username__in=serializer.validated_data.get('authors', []))
+    ))
+    found = set(deleted)
+    return Response({
+        'deleted': deleted,
+        'not_found': [pk for pk in ids if pk not in found],
+    })
+
+
+class ReviewViewSet(ConditionalGetMixin, CachedResponseMixin,
+                    SparseFieldsMixin, StreamingListMixin, ValuesListMixin,
+                    viewsets.ModelViewSet):
     """Обработка запросов к отзывам"""
     serializer_class = ReviewSerializer
+    values_serializer_class = ReviewValuesSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAuthorOrStaffOrReadOnly,
     )
+    throttle_classes = (WriteIPThrottle, WriteRoleThrottle)
+    cursor_ordering = ('-pub_date', '-id')
+    # Менеджер title.reviews проставляет title каждому отзыву.
+    sparse_always = ('title',)
+    field_sources = {
+        'id': FieldSource(),
+        'text': FieldSource(only=('text',)),
+        'author': FieldSource(
+            only=('author', 'author__username'), select=('author',)
+        ),
+        'score': FieldSource(only=('score',)),
+        'pub_date': FieldSource(only=('pub_date',)),
+    }
+
+    def get_version_keys(self):
+        # Отзывы одного произведения и имена авторов.
+        return [
+            *scoped_keys(Review, f'title:{self.kwargs["title_id"]}'),
+            generation_key(Title),
+            generation_key(User),
+        ]
+
+    @cached_property
+    def title(self):
+        # Произведение ищется один раз за запрос.
+        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
 
     def get_queryset(self, **kwargs):
-        title = get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id',)
+        if self.action == 'list':
+            queryset = self.title.reviews.select_related('author')
+        else:
+            # Для одного отзыва 404 даст сам запрос отзыва.
+            queryset = Review.objects.filter(
+                title_id=self.kwargs.get('title_id')
+            ).select_related('author')
+        return self.sparse_queryset(queryset)
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete',
+            permission_classes=(IsStaff,))
+    def bulk_delete(self, request, title_id=None):
+        """Удаление отзывов произведения по id или авторам."""
+        return bulk_delete_response(
+            request,
+            Review.objects.filter(title_id=title_id),
+            delete_reviews
         )
-        return title.reviews.all()
 
     def perform_create(self, serializer, **kwargs):
-        title = get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id',)
-        )
-        serializer.save(
-            author=self.request.user,
-            title=title
-        )
-
-
-class CommentViewSet(viewsets.ModelViewSet):
+        try:
+            # Точка сохранения: после ошибки проверяется, чем она вызвана.
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title=self.title)
+        except IntegrityError:
+            # Повторный отзыв - только нарушение unique_review,
+            # остальные ошибки целостности не маскируются.
+            if not Review.objects.filter(
+                title=self.title, author=self.request.user
+            ).exists():
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Возможно оставить только один отзыв'
+                ]
+            })
+
+
+class CommentViewSet(ConditionalGetMixin, SparseFieldsMixin,
+                     StreamingListMixin, ValuesListMixin,
+                     viewsets.ModelViewSet):
     """Обработка запросов к комментариям на произведения"""
     serializer_class = CommentSerializer
+    values_serializer_class = CommentValuesSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
         IsAuthorOrStaffOrReadOnly,
     )
+    throttle_classes = (WriteIPThrottle, WriteRoleThrottle)
+    cursor_ordering = ('-pub_date', '-id')
+    sparse_always = ('review',)
+    field_sources = {
+        'id': FieldSource(),
+        'text': FieldSource(only=('text',)),
+        'author': FieldSource(
+            only=('author', 'author__username'), select=('author',)
+        ),
+        'pub_date': FieldSource(only=('pub_date',)),
+    }
+
+    def get_version_keys(self):
+        # Комментарии к отзыву; отзывы произведения - на случай
+        # удаления отзыва без комментариев.
+        return [
+            *scoped_keys(Comment, f'review:{self.kwargs["review_id"]}'),
+            *scoped_keys(Review, f'title:{self.kwargs["title_id"]}'),
+            generation_key(User),
+        ]
+
+    @cached_property
+    def review(self):
+        # Отзыв ищется один раз за запрос.
+        return get_object_or_404(
+            Review.objects.only('id', 'title_id'),
+            id=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        )
 
     def get_queryset(self, **kwargs):
-        review = get_object_or_404(
-            Review,
-            title__id=self.kwargs.get('title_id'),
-            id=self.kwargs.get('review_id',)
-        )
-        return review.comment.all()
+        if self.action == 'list':
+            queryset = self.review.comment.select_related('author')
+        else:
+            queryset = Comment.objects.filter(
+                review_id=self.kwargs.get('review_id'),
+                review__title_id=self.kwargs.get('title_id')
+            ).select_related('author')
+        return self.sparse_queryset(queryset)
 
     def perform_create(self, serializer, **kwargs):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'),
-            title__id=self.kwargs.get('title_id')
-        )
-        serializer.save(
-            author=self.request.user,
-            review=review
+        serializer.save(author=self.request.user, review=self.review)
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete',
+            permission_classes=(IsStaff,))
+    def bulk_delete(self, request, title_id=None, review_id=None):
+        """Удаление комментариев к отзыву по id или авторам."""
+        return bulk_delete_response(
+            request,
+            Comment.objects.filter(
+                review_id=review_id, review__title_id=title_id
+            ),
+            delete_comments
         )
@@ -0,0 +1,110 @@
+import inspect
+import logging
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import DatabaseError, connection
+from django.urls import get_resolver
+from rest_framework.serializers import BaseSerializer
+from reviews.models import Title
+
+logger = logging.getLogger(__name__)
+
+
+def build_urls():
+    """Строит шаблоны роутера и словари reverse/resolve."""
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+
+
+def build_models():
+    """
+    Заполняет кеши _meta всех моделей (поля, обратные связи).
+    Они общие для процесса и без прогрева строятся первым запросом.
+    """
+    for model in apps.get_models():
+        model._meta.get_fields()
+        model._meta.related_objects
+
+
+def walk_fields(serializer):
+    for field in serializer.fields.values():
+        if isinstance(field, BaseSerializer):
+            walk_fields(getattr(field, 'child', field))
+
+
+def build_serializers():
+    """
+    Один раз собирает поля всех сериализаторов API. Сами поля
+    DRF строит заново для каждого экземпляра, так что прогрев
+    их не сохраняет: шаг импортирует модули полей и валидаторов
+    и заполняет кеши моделей, которые читает ModelSerializer.
+    """
+    from . import serializers
+    for _, cls in inspect.getmembers(serializers, inspect.isclass):
+        if (issubclass(cls, BaseSerializer)
+                and cls.__module__ == serializers.__name__):
+            walk_fields(cls())
+
+
+def build_filters():
+    from .filters import TitleFilter
+    TitleFilter(data={}, queryset=Title.objects.none()).form
+
+
+def open_connection():
+    connection.ensure_connection()
+
+
+WARMUP_STEPS = (
+    ('urls', build_urls),
+    ('models', build_models),
+    ('serializers', build_serializers),
+    ('filters', build_filters),
+    ('database', open_connection),
+)
+
+
+def warm_up():
+    """
+    Выполняет то, что иначе делает первый запрос к воркеру.
+    Возвращает время каждого шага в секундах.
+    """
+    timings = {}
+    for name, step in WARMUP_STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except DatabaseError as error:
+            logger.warning('Warm-up step %s failed: %s', name, error)
+        timings[name] = time.perf_counter() - started
+    logger.info('Worker warm-up: %s', ', '.join(
+        f'{name} {seconds * 1000:.1f} ms' for name, seconds in timings.items()
+    ))
+    return timings
+
+
+def parse_importtime(lines):
+    """
+    Разбирает вывод python -X importtime.
+    Возвращает список (модуль, собственное время, общее время) в мкс.
+    """
+    imports = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, module = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue
+        imports.append((module.strip(), int(own), int(cumulative)))
+    return imports
+
+
+def group_by_package(imports):
+    """Суммирует собственное время импорта по пакетам верхнего уровня."""
+    packages = defaultdict(int)
+    for module, own, _ in imports:
+        packages[module.split('.')[0]] += own
+    return sorted(packages.items(), key=lambda item: -item[1])
@@ -0,0 +1,99 @@
+"""
+PostgreSQL с пулом соединений на процесс (воркер gunicorn).
+Включается через DB_ENGINE=api_yamdb.db.backends.pooled,
+параметры пула - ключ POOL в настройках базы.
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from ...pool import ConnectionPool, PoolTimeoutError
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def check_connection(connection):
+    """
+    SELECT 1 в режиме autocommit: проверка не должна оставлять
+    открытую транзакцию, иначе Django не сможет включить autocommit
+    у выданного соединения.
+    """
+    if connection.closed:
+        return False
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return True
+
+
+def close_connection(connection):
+    if not connection.closed:
+        connection.close()
+
+
+def pool_stats():
+    """Счетчики пулов текущего процесса по алиасам баз."""
+    pid = os.getpid()
+    return {
+        alias: pool.stats()
+        for (alias, pool_pid), pool in _pools.items() if pool_pid == pid
+    }
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def pool_key(self):
+        # После fork соединения родителя не используются.
+        return self.alias, os.getpid()
+
+    def get_pool(self, conn_params):
+        key = self.pool_key()
+        with _pools_lock:
+            if key not in _pools:
+                options = self.settings_dict.get('POOL', {})
+                _pools[key] = ConnectionPool(
+                    lambda: super(DatabaseWrapper, self).get_new_connection(
+                        conn_params
+                    ),
+                    check_connection, close_connection, **options
+                )
+                _pools[key].fill()
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection = self.get_pool(conn_params).checkout()
+        except PoolTimeoutError as error:
+            # Ошибка драйвера: Django превратит ее в OperationalError.
+            raise base.Database.OperationalError(str(error))
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = _pools.get(self.pool_key())
+        with self.wrap_database_errors:
+            if pool is None:
+                # Соединение выдал пул другого процесса (до fork):
+                # закрываем его, а не создаем пул без параметров.
+                self.connection.close()
+                return
+            pool.checkin(self.connection, reusable=self.reset_connection())
+
+    def reset_connection(self):
+        """Откатывает незавершенную транзакцию перед возвратом в пул."""
+        if self.connection.closed:
+            return False
+        status = self.connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        self.connection.rollback()
+        return True
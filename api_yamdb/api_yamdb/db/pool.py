@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import Counter, deque
+
+
+class PoolTimeoutError(Exception):
+    """Все соединения пула заняты дольше timeout секунд."""
+
+
+class ConnectionPool:
+    """
+    Пул соединений одного процесса.
+    connect() открывает соединение, check(conn) проверяет его перед
+    выдачей, close(conn) закрывает. Свободные соединения выдаются
+    в порядке LIFO; простаивающие дольше max_idle (сверх min_size)
+    и живущие дольше max_lifetime закрываются.
+    """
+    def __init__(self, connect, check, close, min_size=1, max_size=10,
+                 timeout=30, max_idle=300, max_lifetime=3600,
+                 clock=time.monotonic):
+        self.connect = connect
+        self.check = check
+        self.close = close
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.clock = clock
+        self.counters = Counter()
+        self._idle = deque()
+        self._created = {}
+        self._size = 0
+        self._lock = threading.Condition()
+
+    def fill(self):
+        """Открывает соединения до min_size."""
+        while True:
+            with self._lock:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            self.checkin(self._open())
+
+    def checkout(self):
+        connection = self._reserve()
+        if connection is not None:
+            if self._healthy(connection):
+                return connection
+            with self._lock:
+                self._discard(connection)
+                self.counters['reconnects'] += 1
+        try:
+            return self._open()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+
+    def checkin(self, connection, reusable=True):
+        now = self.clock()
+        with self._lock:
+            if not reusable or self._expired(connection, now):
+                self._discard(connection)
+                self._size -= 1
+            else:
+                self._idle.append((connection, now))
+            self._prune(now)
+            self._lock.notify()
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self.counters,
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                min_size=self.min_size,
+                max_size=self.max_size,
+            )
+
+    def close_all(self):
+        with self._lock:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
+                self._size -= 1
+
+    def _reserve(self):
+        """
+        Берет свободное соединение или место под новое (тогда None).
+        Если пул заполнен - ждет возврата соединения.
+        """
+        deadline = None
+        with self._lock:
+            self.counters['checkouts'] += 1
+            while True:
+                now = self.clock()
+                while self._idle:
+                    connection, _ = self._idle.pop()
+                    if not self._expired(connection, now):
+                        return connection
+                    self._discard(connection)
+                    self._size -= 1
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+                if deadline is None:
+                    self.counters['waits'] += 1
+                    deadline = now + self.timeout
+                if now >= deadline or not self._lock.wait(deadline - now):
+                    self.counters['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f'No free connection in {self.timeout} s '
+                        f'(max_size={self.max_size})'
+                    )
+
+    def _open(self):
+        connection = self.connect()
+        with self._lock:
+            self._created[id(connection)] = self.clock()
+            self.counters['connects'] += 1
+        return connection
+
+    def _healthy(self, connection):
+        try:
+            return self.check(connection)
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        self._created.pop(id(connection), None)
+        self.counters['closed'] += 1
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+
+    def _expired(self, connection, now):
+        created = self._created.get(id(connection), now)
+        return now - created > self.max_lifetime
+
+    def _prune(self, now):
+        # Самые давно вернувшиеся соединения - в начале очереди.
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0][1] > self.max_idle):
+            connection, _ = self._idle.popleft()
+            self._discard(connection)
+            self._size -= 1
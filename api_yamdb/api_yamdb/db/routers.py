@@ -0,0 +1,75 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Реплика, с которой читает текущий безопасный HTTP-запрос: ее один раз
+# выбирает api.middleware.ReplicaRoutingMiddleware. Команды, сигналы
+# и запросы на запись всегда работают с основной базой (None).
+_replica = ContextVar('replica', default=None)
+# app_label модели таблицы DatabaseCache.
+CACHE_APP_LABEL = 'django_cache'
+
+
+def choose_replica():
+    """Случайная реплика из DATABASE_REPLICAS или None, если их нет."""
+    if not settings.DATABASE_REPLICAS:
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def allow_replica_reads(replica):
+    """
+    Направляет чтение на реплику replica, None - на основную базу.
+    Возвращает токен для reset_replica_reads.
+    """
+    return _replica.set(replica)
+
+
+def replica_reads_allowed():
+    return _replica.get() is not None
+
+
+def reset_replica_reads(token):
+    _replica.reset(token)
+
+
+@contextmanager
+def use_primary():
+    token = allow_replica_reads(None)
+    try:
+        yield
+    finally:
+        reset_replica_reads(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Запись - в default, чтение внутри безопасного запроса -
+    с выбранной для него реплики из DATABASE_REPLICAS.
+    """
+    def __init__(self, replicas=None):
+        if replicas is None:
+            replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        self.replicas = tuple(replicas)
+
+    def db_for_read(self, model, **hints):
+        # Кеш в БД (поколения данных, лимиты) - общее состояние
+        # воркеров, его нельзя читать с отстающей реплики.
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return 'default'
+        replica = _replica.get()
+        if replica is not None and replica in self.replicas:
+            return replica
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
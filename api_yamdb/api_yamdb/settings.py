@@ -26,8 +26,8 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'api',
-    'reviews',
+    'api.apps.ApiConfig',
+    'reviews.apps.ReviewsConfig',
     'rest_framework',
     'django_filters',
 ]
@@ -40,6 +40,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.RepeatedQueriesMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -66,18 +68,86 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
+# DB_ENGINE=api_yamdb.db.backends.pooled - PostgreSQL с пулом соединений
+# на воркер; соединение возвращается в пул в конце каждого запроса.
+POOLED_DB_ENGINE = 'api_yamdb.db.backends.pooled'
+DB_ENGINE = os.getenv('DB_ENGINE', default='django.db.backends.postgresql')
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
+        'ENGINE': DB_ENGINE,
         'NAME': os.getenv('DB_NAME', default='postgres'),
         'USER': os.getenv('POSTGRES_USER', default='db_user'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='db_password'),
         'HOST': os.getenv('DB_HOST', default='127.0.0.1'),
         'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': 0 if DB_ENGINE == POOLED_DB_ENGINE else int(
+            os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'POOL': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', default=1)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', default=10)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', default=30)),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', default=300)),
+            'max_lifetime': float(
+                os.getenv('DB_POOL_MAX_LIFETIME', default=3600)),
+        },
+    }
+}
+
+# Реплики для чтения: DB_REPLICAS=host1,host2:5433 (для SQLite - пути
+# к файлам). Безопасные запросы читают с реплик, а клиент, который только
+# что писал, DB_STICKY_SECONDS секунд читает с основной базы.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', default='').split(',')), 1):
+    host, _, port = replica.strip().partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        HOST=host,
+        PORT=port or DATABASES['default']['PORT'],
+        TEST={'MIRROR': 'default'},
+    )
+    if DB_ENGINE.endswith('sqlite3'):
+        DATABASES[alias].update(NAME=replica.strip(), HOST='', PORT='')
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api_yamdb.db.routers.PrimaryReplicaRouter']
+DB_STICKY_SECONDS = int(os.getenv('DB_STICKY_SECONDS', default=5))
+
+
+# Cache
+# locmem - кеш процесса; file/db - общий для всех воркеров gunicorn.
+# Поколения данных, по которым сбрасываются кеш ответов и ETag,
+# хранятся в таблице reviews.Generation, поэтому кеш процесса
+# тоже видит записи других воркеров.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+}
+CACHE_LOCATIONS = {
+    'locmem': 'yamdb',
+    'file': '/tmp/yamdb_cache',
+    'db': 'yamdb_cache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', default='locmem')
 
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', default=CACHE_LOCATIONS[CACHE_BACKEND]),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', default=10000)),
+        },
     }
 }
 
+API_RESPONSE_CACHE_TIMEOUT = int(
+    os.getenv('API_RESPONSE_CACHE_TIMEOUT', default=300))
+
 
 # Password validation
 
@@ -125,11 +195,26 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageOrCursorPagination',
     'PAGE_SIZE': 5,
+
+    # Частоты для api.throttling, пустое значение отключает лимит
+    'DEFAULT_THROTTLE_RATES': {
+        scope: os.getenv(f'THROTTLE_{scope.upper()}', default=rate) or None
+        for scope, rate in (
+            ('signup_ip', '20/min'),
+            ('signup_username', '3/min'),
+            ('token_ip', '30/min'),
+            ('token_username', '10/min'),
+            ('write_ip', '60/min'),
+            ('write_user', '20/min'),
+            ('write_moderator', '60/min'),
+            ('write_admin', ''),
+        )
+    },
 }
 
 SIMPLE_JWT = {
@@ -138,9 +223,34 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = 'reviews.User'
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_USE_TLS = True
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 EMAIL_PORT = 587
+
+# Рейтинги /titles/top/ и /titles/trending/ (reviews.leaderboards)
+LEADERBOARD_TTL = int(os.getenv('LEADERBOARD_TTL', default=300))
+LEADERBOARD_PRIOR_WEIGHT = float(
+    os.getenv('LEADERBOARD_PRIOR_WEIGHT', default=10))
+TRENDING_HALF_LIFE_DAYS = float(
+    os.getenv('TRENDING_HALF_LIFE_DAYS', default=3))
+
+# Индексы поиска и фасетов в памяти воркера пересобираются при смене
+# поколения данных и не реже раза в INDEX_TTL секунд.
+INDEX_TTL = int(os.getenv('INDEX_TTL', default=60))
+
+# Очередь писем (reviews.outbox), отправляет команда send_outbox
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', default=50))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', default=5))
+OUTBOX_BACKOFF_SECONDS = int(os.getenv('OUTBOX_BACKOFF_SECONDS', default=30))
+
+# Поиск N+1: повторяющиеся в одном запросе SQL-запросы
+QUERY_INSPECTOR_ENABLED = os.getenv(
+    'QUERY_INSPECTOR_ENABLED', default='False') == 'True'
+QUERY_INSPECTOR_RAISE = os.getenv(
+    'QUERY_INSPECTOR_RAISE', default='False') == 'True'
+QUERY_INSPECTOR_THRESHOLD = int(
+    os.getenv('QUERY_INSPECTOR_THRESHOLD', default=3))
@@ -5,3 +5,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
 application = get_wsgi_application()
+
+# Прогрев воркера: URL, сериализаторы, фильтры и соединение с БД
+# строятся до первого запроса.
+if os.getenv('WARMUP_ON_BOOT', default='True') == 'True':
+    from api.warmup import warm_up
+    warm_up()
@@ -1,3 +1,7 @@
 python manage.py makemigrations reviews
 python manage.py migrate
+python manage.py createcachetable
+python manage.py recalculate_ratings
+python manage.py rebuild_stats
+python manage.py refresh_leaderboards
 python manage.py collectstatic --no-input
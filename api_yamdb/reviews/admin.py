@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+from .models import (Category, Comment, Genre, GenreTitle, OutboxEmail, Review,
+                     Title, User)
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -28,6 +29,7 @@ class TitleAdmin(admin.ModelAdmin):
     )
     list_editable = ('category',)
     list_filter = ('year', 'category')
+    readonly_fields = ('rating_sum', 'rating_count')
 
     def genres_names(self, obj):
         return (', '.join([
@@ -72,6 +74,21 @@ class CommentAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'recipients',
+        'created',
+        'attempts',
+        'sent_at',
+    )
+    search_fields = ('recipients',)
+    list_filter = ('sent_at',)
+    readonly_fields = ('created', 'last_error')
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(User, UserAdmin)
 admin.site.register(Title, TitleAdmin)
 admin.site.register(Category, CategoryAdmin)
@@ -79,3 +96,4 @@ admin.site.register(Genre, GenreAdmin)
 admin.site.register(GenreTitle)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
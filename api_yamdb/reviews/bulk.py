@@ -0,0 +1,203 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import connection, transaction
+
+from .generations import bump_generation, invalidate_scopes
+from .models import (Category, Comment, Genre, GenreTitle, Review, Title,
+                     TitleStats)
+from .ratings import recalculate_ratings
+from .rollups import rebuild_chunk
+
+TITLE_FIELDS = ('name', 'year', 'description', 'category')
+REBUILD_CHUNK_SIZE = 500
+
+_deferred = ContextVar('deferred_aggregates', default=False)
+
+
+def skip_when_deferred(handler):
+    """
+    Сигнал не обрабатывается внутри deferred_aggregates:
+    рейтинг, сводки и поколения пересчитываются один раз в конце.
+    """
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if _deferred.get():
+            return None
+        return handler(*args, **kwargs)
+    return wrapper
+
+
+def refresh_titles(title_ids):
+    title_ids = sorted(title_ids)
+    recalculate_ratings(title_ids)
+    for start in range(0, len(title_ids), REBUILD_CHUNK_SIZE):
+        rebuild_chunk(title_ids[start:start + REBUILD_CHUNK_SIZE])
+
+    def bump():
+        for model in (Review, Comment):
+            bump_generation(model)
+            invalidate_scopes(model)
+    transaction.on_commit(bump)
+
+
+@contextmanager
+def deferred_aggregates():
+    """
+    Транзакция для массовых изменений отзывов и комментариев.
+    В переданное множество собираются id затронутых произведений,
+    после блока их рейтинг и сводки пересчитываются пакетно.
+    """
+    touched = set()
+    with transaction.atomic():
+        token = _deferred.set(True)
+        try:
+            yield touched
+        finally:
+            _deferred.reset(token)
+        refresh_titles(touched)
+
+
+def delete_reviews(queryset):
+    """Удаляет отзывы вместе с комментариями; возвращает их id."""
+    with deferred_aggregates() as touched:
+        rows = list(queryset.values_list('id', 'title_id'))
+        touched.update(title_id for _, title_id in rows)
+        queryset.delete()
+    return [review_id for review_id, _ in rows]
+
+
+def delete_comments(queryset):
+    with deferred_aggregates() as touched:
+        rows = list(queryset.values_list('id', 'review__title_id'))
+        touched.update(title_id for _, title_id in rows)
+        queryset.delete()
+    return [comment_id for comment_id, _ in rows]
+
+
+def resolve_title(item, existing, categories, genres):
+    """
+    Произведение и список жанров для элемента пакета
+    или словарь ошибок.
+    """
+    if 'id' in item:
+        title = existing.get(item['id'])
+        if title is None:
+            return None, None, {'id': ['Произведение не найдено.']}
+    else:
+        title = Title()
+    errors = {}
+    for field in TITLE_FIELDS:
+        if field == 'category' and 'category' in item:
+            title.category = categories.get(item['category'])
+            if title.category is None:
+                errors['category'] = ['Категория не найдена.']
+        elif field in item:
+            setattr(title, field, item[field])
+    genre_list = None
+    if 'genre' in item:
+        genre_list = [genres.get(slug) for slug in item['genre']]
+        if None in genre_list:
+            errors['genre'] = ['Жанр не найден.']
+    return title, genre_list, errors
+
+
+def check_unique_titles(titles, errors):
+    """(name, year, category) уникальны в пакете и в БД - один запрос."""
+    keys = {}
+    for title in titles:
+        if title is not None:
+            keys.setdefault(
+                (title.name, title.year, title.category_id), []
+            ).append(title)
+    taken = {
+        (name, year, category_id): pk
+        for pk, name, year, category_id in Title.objects.filter(
+            name__in={key[0] for key in keys},
+            year__in={key[1] for key in keys}
+        ).values_list('pk', 'name', 'year', 'category_id')
+    }
+    for index, title in enumerate(titles):
+        if title is None:
+            continue
+        key = (title.name, title.year, title.category_id)
+        if len(keys[key]) > 1 or taken.get(key, title.pk) != title.pk:
+            errors[index].setdefault('non_field_errors', []).append(
+                'Произведение с такими name, year, category уже есть.'
+            )
+
+
+def prepare_titles(items):
+    """
+    Проверяет пакет произведений целиком: категории, жанры и
+    обновляемые произведения читаются одним запросом на модель.
+    Возвращает ошибки по элементам и (произведение, жанры) для записи.
+    """
+    existing = Title.objects.in_bulk(
+        [item['id'] for item in items if 'id' in item]
+    )
+    categories = Category.objects.in_bulk(
+        {item['category'] for item in items if 'category' in item},
+        field_name='slug'
+    )
+    genres = Genre.objects.in_bulk(
+        {slug for item in items for slug in item.get('genre', ())},
+        field_name='slug'
+    )
+    resolved = [
+        resolve_title(item, existing, categories, genres) for item in items
+    ]
+    errors = [error for _, _, error in resolved]
+    check_unique_titles([title for title, _, _ in resolved], errors)
+    return errors, [(title, genre_list) for title, genre_list, _ in resolved]
+
+
+def create_titles(titles):
+    """
+    Создает произведения; возвращает те, что созданы без сигналов
+    и которым еще нужна строка TitleStats.
+    """
+    features = connection.features
+    # Django 2.2 и 3.x называют признак по-разному.
+    if getattr(features, 'can_return_rows_from_bulk_insert',
+               getattr(features, 'can_return_ids_from_bulk_insert', False)):
+        return Title.objects.bulk_create(titles)
+    # Без RETURNING id новых строк не узнать - сохраняем по одной.
+    for title in titles:
+        title.save()
+    return []
+
+
+def save_titles(plan, fields):
+    """
+    Записывает проверенный пакет одной транзакцией:
+    bulk_create новых, bulk_update измененных, пересоздание связей
+    с жанрами. Возвращает список (id, created).
+    """
+    new = [title for title, _ in plan if title.pk is None]
+    changed = [title for title, _ in plan if title.pk is not None]
+    created = {id(title) for title in new}
+    changed_ids = {title.pk for title in changed}
+    with transaction.atomic():
+        TitleStats.objects.bulk_create(
+            TitleStats(title=title) for title in create_titles(new)
+        )
+        if changed and fields:
+            Title.objects.bulk_update(changed, fields)
+        relinked = [(title, genres) for title, genres in plan
+                    if genres is not None]
+        GenreTitle.objects.filter(
+            title__in=[title.pk for title, _ in relinked
+                       if title.pk in changed_ids]
+        ).delete()
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title=title, genre=genre)
+            for title, genres in relinked for genre in genres
+        )
+
+        def bump():
+            bump_generation(Title)
+            bump_generation(GenreTitle)
+        transaction.on_commit(bump)
+    return [(title.pk, id(title) in created) for title, _ in plan]
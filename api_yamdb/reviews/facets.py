@@ -0,0 +1,133 @@
+from collections import defaultdict
+
+from .generations import GenerationCached
+from .models import Category, Genre, GenreTitle, Title
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+
+def make_bitmap(ids, size):
+    """
+    Битовая карта id произведений: бит N установлен для id = N.
+    """
+    buffer = bytearray(size // 8 + 1)
+    for title_id in ids:
+        buffer[title_id >> 3] |= 1 << (title_id & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class BitmapIds:
+    """
+    Последовательность id из битовой карты по убыванию (как '-id').
+    Поддерживает len() и срезы - подходит для пагинатора.
+    """
+    def __init__(self, bitmap):
+        self.bits = bin(bitmap)[2:] if bitmap else ''
+        self.length = self.bits.count('1')
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return self.iterate()
+
+    def iterate(self, start=0):
+        top = len(self.bits) - 1
+        position = -1
+        skipped = 0
+        while True:
+            position = self.bits.find('1', position + 1)
+            if position == -1:
+                return
+            if skipped >= start:
+                yield top - position
+            skipped += 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            result = []
+            for title_id in self.iterate(start):
+                if len(result) >= stop - start:
+                    break
+                result.append(title_id)
+            return result[::step]
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        return next(self.iterate(index))
+
+
+class TitleFacetIndex:
+    """
+    Индекс в памяти процесса: слаг жанра/категории и год
+    -> битовая карта id произведений.
+    """
+    def __init__(self, titles, genre_links):
+        years = defaultdict(list)
+        categories = defaultdict(list)
+        genres = defaultdict(list)
+        all_ids = []
+        for title_id, year, category_slug in titles:
+            all_ids.append(title_id)
+            years[year].append(title_id)
+            if category_slug:
+                categories[category_slug].append(title_id)
+        for title_id, genre_slug in genre_links:
+            genres[genre_slug].append(title_id)
+        size = max(all_ids, default=0)
+        self.all = make_bitmap(all_ids, size)
+        self.by_year = {
+            key: make_bitmap(ids, size) for key, ids in years.items()
+        }
+        self.by_category = {
+            key: make_bitmap(ids, size) for key, ids in categories.items()
+        }
+        self.by_genre = {
+            key: make_bitmap(ids, size) for key, ids in genres.items()
+        }
+
+    @staticmethod
+    def combine(index, keys, match):
+        bitmaps = [index.get(key, 0) for key in keys]
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result = result & bitmap if match == MATCH_ALL else result | bitmap
+        return result
+
+    def match(self, genres=(), categories=(), year=None,
+              genre_match=MATCH_ANY):
+        """
+        Битовая карта произведений, подходящих под все условия.
+        Жанры объединяются по genre_match, категории - по ИЛИ.
+        """
+        result = self.all
+        if genres:
+            result &= self.combine(self.by_genre, genres, genre_match)
+        if categories:
+            result &= self.combine(self.by_category, categories, MATCH_ANY)
+        if year is not None:
+            result &= self.by_year.get(year, 0)
+        return result
+
+
+INDEX_MODELS = (Title, Genre, Category, GenreTitle)
+
+
+def build_facet_index():
+    # Индекс общий для всех запросов: строится по основной базе.
+    return TitleFacetIndex(
+        Title.objects.using('default').values_list(
+            'id', 'year', 'category__slug'
+        ).order_by().iterator(),
+        GenreTitle.objects.using('default').values_list(
+            'title_id', 'genre__slug'
+        ).order_by().iterator()
+    )
+
+
+facet_index = GenerationCached(INDEX_MODELS, build_facet_index)
+
+
+def get_facet_index():
+    return facet_index.get()
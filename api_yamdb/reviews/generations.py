@@ -0,0 +1,143 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F
+
+from .models import Generation
+
+# Поколение, которого еще нет в таблице.
+MISSING = 0
+
+
+def generation_key(model, scope=None):
+    key = f'generation:{model._meta.label_lower}'
+    return key if scope is None else f'{key}:{scope}'
+
+
+def scoped_keys(model, scope):
+    """Ключи поколения части данных: эпоха модели и сама часть."""
+    return [generation_key(model, 'epoch'), generation_key(model, scope)]
+
+
+def initial_generation():
+    # Начальное значение от времени: если строку счетчика удалят,
+    # новое поколение не совпадет с ранее выданными.
+    return int(time.time() * 1000)
+
+
+def read_generations(keys):
+    """Значения счетчиков keys одним запросом: {ключ: поколение}."""
+    values = dict.fromkeys(keys, MISSING)
+    values.update(Generation.objects.using('default').filter(
+        key__in=values
+    ).values_list('key', 'value'))
+    return values
+
+
+def bump_keys(keys):
+    """
+    Увеличивает счетчики одним UPDATE value = value + 1: параллельные
+    увеличения не теряются. Недостающие строки создаются.
+    """
+    keys = set(keys)
+    counters = Generation.objects.using('default').filter(key__in=keys)
+    if counters.update(value=F('value') + 1) == len(keys):
+        return
+    missing = keys - set(counters.values_list('key', flat=True))
+    Generation.objects.using('default').bulk_create(
+        [Generation(key=key, value=initial_generation()) for key in missing],
+        ignore_conflicts=True
+    )
+    # Строку мог создать параллельный процесс: его значение
+    # не должно совпасть с нашим.
+    counters.filter(key__in=missing).update(value=F('value') + 1)
+
+
+def get_generation(model):
+    """
+    Текущее поколение данных модели. Меняется при любой записи,
+    используется для инвалидации индексов и кешей.
+    """
+    key = generation_key(model)
+    return read_generations([key])[key]
+
+
+def bump_generation(model):
+    bump_keys([generation_key(model)])
+
+
+def get_scoped_generation(model, scope):
+    """
+    Поколение части данных модели, например отзывов одного
+    произведения (scope='title:5'). Массовые операции сбрасывают
+    все части сразу через invalidate_scopes.
+    """
+    values = read_generations(scoped_keys(model, scope))
+    return '.'.join(str(values[key]) for key in scoped_keys(model, scope))
+
+
+def bump_scoped_generation(model, scope):
+    bump_keys([generation_key(model, scope)])
+
+
+def invalidate_scopes(model):
+    bump_keys([generation_key(model, 'epoch')])
+
+
+class GenerationSnapshot:
+    """
+    Поколения, прочитанные за один HTTP-запрос: ключи, нужные
+    запросу, читаются одним SELECT и дальше берутся из памяти.
+    """
+    def __init__(self):
+        self.values = {}
+
+    def prefetch(self, keys):
+        missing = [key for key in keys if key not in self.values]
+        if missing:
+            self.values.update(read_generations(missing))
+
+    def version(self, keys):
+        self.prefetch(keys)
+        return '.'.join(str(self.values[key]) for key in keys)
+
+
+def request_generations(request):
+    """Снимок поколений HTTP-запроса (и DRF Request, и HttpRequest)."""
+    request = getattr(request, '_request', request)
+    if not hasattr(request, 'generations'):
+        request.generations = GenerationSnapshot()
+    return request.generations
+
+
+class GenerationCached:
+    """
+    Значение в памяти процесса (индекс), которое пересобирается
+    при смене поколения моделей и не реже раза в INDEX_TTL секунд:
+    записи мимо сигналов (update(), другая база) видны после TTL.
+    """
+    def __init__(self, models, build):
+        self.models = models
+        self.build = build
+        self.lock = threading.Lock()
+        self.generation = None
+        self.built_at = None
+        self.value = None
+
+    def expired(self, generation):
+        return (
+            generation != self.generation
+            or time.monotonic() - self.built_at >= settings.INDEX_TTL
+        )
+
+    def get(self):
+        keys = [generation_key(model) for model in self.models]
+        values = read_generations(keys)
+        generation = tuple(values[key] for key in keys)
+        with self.lock:
+            if self.built_at is None or self.expired(generation):
+                self.value = self.build()
+                self.generation = generation
+                self.built_at = time.monotonic()
+            return self.value
@@ -0,0 +1,261 @@
+import datetime as dt
+import random
+from collections import namedtuple
+
+from django.utils import timezone
+
+from .models import (Category, Comment, Genre, GenreTitle, Review, Title, User,
+                     UserRole)
+
+WORDS = (
+    'время', 'город', 'дорога', 'история', 'любовь', 'море', 'ночь', 'огонь',
+    'память', 'река', 'сад', 'свет', 'сердце', 'снег', 'тень', 'улица',
+    'ветер', 'война', 'дом', 'звезда', 'зима', 'лето', 'мир', 'небо',
+    'отличный', 'скучный', 'сильный', 'странный', 'добрый', 'долгий',
+    'сюжет', 'герой', 'финал', 'актер', 'автор', 'музыка', 'картина',
+)
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Петр', 'Ольга', 'Сергей', 'Елена',
+               'Дмитрий', 'Наталья', 'Алексей', 'Ирина', 'Андрей')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев',
+              'Соколов', 'Михайлов', 'Новиков', 'Федоров', 'Морозов')
+CATEGORY_NAMES = ('Фильм', 'Книга', 'Музыка', 'Сериал', 'Игра', 'Спектакль',
+                  'Комикс', 'Подкаст', 'Картина', 'Выставка')
+GENRE_NAMES = ('Драма', 'Комедия', 'Триллер', 'Фантастика', 'Детектив',
+               'Ужасы', 'Мелодрама', 'Приключения', 'Документальный',
+               'Фэнтези', 'Роман', 'Поэзия', 'Рок', 'Джаз', 'Классика',
+               'Поп', 'Вестерн', 'Мюзикл', 'Биография', 'Сказка')
+# Доля модераторов среди пользователей.
+MODERATOR_SHARE = 0.01
+
+# Диапазоны id и параметры генерации, общие для всех частей.
+Plan = namedtuple('Plan', (
+    'seed users categories genres titles reviews comments '
+    'comment_skew days end'
+))
+
+
+def chunk_random(plan, kind, index):
+    """
+    Генератор случайных чисел части: зависит только от seed,
+    таблицы и номера части, но не от числа процессов.
+    """
+    return random.Random(f'{plan.seed}:{kind}:{index}')
+
+
+def words(rnd, low, high):
+    return ' '.join(rnd.choices(WORDS, k=rnd.randint(low, high)))
+
+
+def zipf_counts(total, size, skew, cap):
+    """
+    Делит total на size частей пропорционально 1 / rank ** skew
+    (закон Ципфа), каждая часть - не больше cap.
+    """
+    if total > size * cap:
+        raise ValueError(f'{total} не помещается в {size} x {cap}')
+    weights = [1 / rank ** skew for rank in range(1, size + 1)]
+    scale = total / sum(weights)
+    counts = [min(int(weight * scale), cap) for weight in weights]
+    missing = total - sum(counts)
+    # Остаток - по одному, начиная с популярных.
+    while missing:
+        for rank in range(size):
+            if counts[rank] < cap:
+                counts[rank] += 1
+                missing -= 1
+                if not missing:
+                    break
+    return counts
+
+
+def zipf_rank(u, size, skew):
+    """
+    Ранг 1..size по равномерному u из [0, 1): обратная функция
+    распределения непрерывного приближения закона Ципфа.
+    """
+    if abs(skew - 1) < 1e-9:
+        rank = size ** u
+    else:
+        rank = ((size ** (1 - skew) - 1) * u + 1) ** (1 / (1 - skew))
+    return min(int(rank), size)
+
+
+def review_date(plan, review_id):
+    """
+    Дата отзыва - функция его id: по ней комментарии
+    публикуются после отзыва без чтения отзывов из БД.
+    """
+    seconds = plan.days * 86400
+    offset = (review_id * 2654435761 + plan.seed) % seconds
+    return plan.end - dt.timedelta(seconds=seconds - offset)
+
+
+def user_rows(plan, rnd, first, last):
+    rows = []
+    for pk in range(first, last):
+        moderator = rnd.random() < MODERATOR_SHARE
+        rows.append({
+            'id': pk, 'username': f'user{pk}', 'email': f'user{pk}@yamdb.fake',
+            'password': '!', 'first_name': rnd.choice(FIRST_NAMES),
+            'last_name': rnd.choice(LAST_NAMES), 'bio': '',
+            'role': UserRole.MODERATOR if moderator else UserRole.USER,
+            'is_superuser': False, 'is_staff': False, 'is_active': True,
+            'date_joined': plan.end - dt.timedelta(
+                seconds=rnd.randint(0, plan.days * 86400)
+            ),
+        })
+    return [(User, rows)]
+
+
+def dictionary_rows(plan):
+    categories, genres = plan.categories, plan.genres
+    return [
+        (Category, [
+            {'id': pk, 'name': name_for(CATEGORY_NAMES, pk - categories[0]),
+             'slug': f'category-{pk}'}
+            for pk in range(*categories)
+        ]),
+        (Genre, [
+            {'id': pk, 'name': name_for(GENRE_NAMES, pk - genres[0]),
+             'slug': f'genre-{pk}'}
+            for pk in range(*genres)
+        ]),
+    ]
+
+
+def name_for(names, number):
+    if number < len(names):
+        return names[number]
+    return f'{names[number % len(names)]} {number // len(names) + 1}'
+
+
+def title_rows(plan, rnd, first, last):
+    titles, links = [], []
+    current_year = plan.end.year
+    for pk in range(first, last):
+        titles.append({
+            'id': pk, 'name': words(rnd, 1, 4).capitalize(),
+            'year': min(int(rnd.triangular(1900, current_year, 2015)),
+                        current_year),
+            'description': words(rnd, 0, 40),
+            'category_id': rnd.randrange(*plan.categories),
+            'rating_sum': 0, 'rating_count': 0,
+        })
+        links.extend(
+            {'title_id': pk, 'genre_id': genre_id}
+            for genre_id in rnd.sample(
+                range(*plan.genres),
+                min(rnd.randint(1, 3), plan.genres[1] - plan.genres[0])
+            )
+        )
+    return [(Title, titles), (GenreTitle, links)]
+
+
+def review_rows(plan, rnd, titles):
+    """
+    titles - (id произведения, число отзывов, id первого отзыва).
+    Авторы отзывов одного произведения различны (unique_review).
+    """
+    rows = []
+    for title_id, count, first_id in titles:
+        # Средняя оценка своя у каждого произведения.
+        quality = rnd.uniform(3, 9)
+        authors = rnd.sample(range(*plan.users), count)
+        for review_id, author_id in enumerate(authors, first_id):
+            rows.append({
+                'id': review_id, 'title_id': title_id,
+                'author_id': author_id, 'text': words(rnd, 5, 60),
+                'score': max(1, min(10, round(rnd.gauss(quality, 1.5)))),
+                'pub_date': review_date(plan, review_id),
+            })
+    return [(Review, rows)]
+
+
+def comment_rows(plan, rnd, first, last):
+    """
+    Отзывы с меньшими id принадлежат популярным произведениям,
+    поэтому ранг по закону Ципфа сдвигает комментарии к ним.
+    """
+    first_review, last_review = plan.reviews
+    rows = []
+    for pk in range(first, last):
+        review_id = first_review - 1 + zipf_rank(
+            rnd.random(), last_review - first_review, plan.comment_skew
+        )
+        published = review_date(plan, review_id)
+        delay = min(
+            rnd.expovariate(1 / 86400), (plan.end - published).total_seconds()
+        )
+        rows.append({
+            'id': pk, 'review_id': review_id,
+            'author_id': rnd.randrange(*plan.users),
+            'text': words(rnd, 2, 30),
+            'pub_date': published + dt.timedelta(seconds=delay),
+        })
+    return [(Comment, rows)]
+
+
+GENERATORS = {
+    'users': user_rows,
+    'titles': title_rows,
+    'reviews': review_rows,
+    'comments': comment_rows,
+}
+
+
+def generate(plan, kind, index, *args):
+    """Строки части index таблицы kind: список (модель, строки)."""
+    return GENERATORS[kind](plan, chunk_random(plan, kind, index), *args)
+
+
+def id_chunks(first, count, size):
+    """Диапазоны id [начало, конец) по size штук."""
+    return [
+        (start, min(start + size, first + count))
+        for start in range(first, first + count, size)
+    ]
+
+
+def review_chunks(plan, title_count, review_count, skew, size):
+    """
+    Распределяет отзывы по произведениям по закону Ципфа
+    и режет их на части примерно по size отзывов.
+    Популярность произведений перемешана детерминированно.
+    """
+    if not review_count:
+        return []
+    users = plan.users[1] - plan.users[0]
+    counts = zipf_counts(review_count, title_count, skew, users)
+    title_ids = list(range(plan.titles[0], plan.titles[0] + title_count))
+    chunk_random(plan, 'ranks', 0).shuffle(title_ids)
+    chunks, chunk, rows = [], [], 0
+    review_id = plan.reviews[0]
+    for title_id, count in zip(title_ids, counts):
+        if not count:
+            break
+        chunk.append((title_id, count, review_id))
+        review_id += count
+        rows += count
+        if rows >= size:
+            chunks.append(chunk)
+            chunk, rows = [], 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def make_plan(seed, first_ids, volumes, comment_skew=1.0, days=365):
+    """
+    first_ids и volumes - словари по моделям: первый свободный id
+    и сколько строк создать. Даты отсчитываются от начала текущего
+    дня, чтобы повторный запуск с тем же seed давал те же строки.
+    """
+    def id_range(model):
+        return first_ids[model], first_ids[model] + volumes[model]
+    return Plan(
+        seed=seed, users=id_range(User), categories=id_range(Category),
+        genres=id_range(Genre), titles=id_range(Title),
+        reviews=id_range(Review), comments=id_range(Comment),
+        comment_skew=comment_skew, days=days,
+        end=timezone.now().replace(hour=0, minute=0, second=0, microsecond=0),
+    )
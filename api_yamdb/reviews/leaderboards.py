@@ -0,0 +1,160 @@
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .facets import BitmapIds
+from .models import Title, TitleActivity
+
+TOP = 'top'
+TRENDING = 'trending'
+
+
+class Leaderboard:
+    """
+    Готовый рейтинг: id произведений и их баллы по убыванию
+    в двух компактных массивах.
+    """
+    def __init__(self, ranked):
+        self.ids = array('q', (title_id for _, title_id in ranked))
+        self.scores = array('d', (score for score, _ in ranked))
+        self.built = time.time()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def top(self, limit, bitmap=None):
+        """
+        Первые limit пар (id, балл); bitmap - битовая карта
+        фасетного индекса, если нужны только подходящие произведения.
+        """
+        # Сдвиг большого числа на каждый id - квадратичная работа:
+        # карта один раз разворачивается в множество id.
+        allowed = None if bitmap is None else set(BitmapIds(bitmap))
+        result = []
+        for title_id, score in zip(self.ids, self.scores):
+            if len(result) >= limit:
+                break
+            if allowed is None or title_id in allowed:
+                result.append((title_id, score))
+        return result
+
+
+def rank(scores):
+    return sorted(
+        ((score, title_id) for title_id, score in scores.items()),
+        key=lambda item: (-item[0], -item[1])
+    )
+
+
+def bayesian_scores(ratings, prior_weight):
+    """
+    Байесовское среднее: оценки произведения смешиваются со средней
+    оценкой по всем отзывам с весом prior_weight отзывов, поэтому
+    пара десяток не поднимает произведение наверх.
+    ratings - (id, сумма оценок, число оценок).
+    """
+    ratings = [row for row in ratings if row[2]]
+    total = sum(row[2] for row in ratings)
+    if not total:
+        return {}
+    mean = sum(row[1] for row in ratings) / total
+    return {
+        title_id: (prior_weight * mean + score_sum) / (prior_weight + count)
+        for title_id, score_sum, count in ratings
+    }
+
+
+def trending_scores(activity, today, half_life):
+    """
+    Скорость появления отзывов с затуханием: отзыв за день
+    возрастом half_life дней весит вдвое меньше сегодняшнего.
+    activity - (id, день, число отзывов).
+    """
+    scores = defaultdict(float)
+    for title_id, day, count in activity:
+        age = max((today - day).days, 0)
+        scores[title_id] += count * 0.5 ** (age / half_life)
+    return scores
+
+
+def build_top():
+    return Leaderboard(rank(bayesian_scores(
+        Title.objects.using('default').filter(rating_count__gt=0).values_list(
+            'id', 'rating_sum', 'rating_count'
+        ).order_by().iterator(),
+        settings.LEADERBOARD_PRIOR_WEIGHT
+    )))
+
+
+def build_trending():
+    half_life = settings.TRENDING_HALF_LIFE_DAYS
+    today = timezone.localdate()
+    # Старше четырех периодов полураспада вклад меньше 1/16.
+    activity = TitleActivity.objects.using('default').filter(
+        day__gte=today - timedelta(days=4 * half_life),
+        review_count__gt=0
+    ).values_list('title_id', 'day', 'review_count').order_by().iterator()
+    return Leaderboard(rank(trending_scores(activity, today, half_life)))
+
+
+# Рейтинги общие для всех запросов: строятся по основной базе.
+BUILDERS = {TOP: build_top, TRENDING: build_trending}
+
+_boards_lock = threading.Lock()
+_boards = {}
+
+
+def refresh_leaderboard(kind):
+    """
+    Пересчитывает рейтинг и кладет его в общий кеш. Срок хранения
+    не ограничен: устаревший рейтинг отдается, пока строится новый.
+    """
+    board = BUILDERS[kind]()
+    cache.set(f'leaderboard:{kind}', board, None)
+    cache.set(f'leaderboard:{kind}:built', board.built, None)
+    with _boards_lock:
+        _boards[kind] = board
+    return board
+
+
+def loaded_leaderboard(kind):
+    """
+    Рейтинг из кеша или None. В кеше - отметка времени расчета,
+    и пока она не изменилась, процесс использует загруженную копию.
+    """
+    built = cache.get(f'leaderboard:{kind}:built')
+    if built is None:
+        return None
+    with _boards_lock:
+        board = _boards.get(kind)
+        if board is None or board.built != built:
+            board = cache.get(f'leaderboard:{kind}')
+            if board is not None:
+                _boards[kind] = board
+        return board
+
+
+def get_leaderboard(kind):
+    """
+    Рейтинг не старше LEADERBOARD_TTL. Просроченный пересчитывает
+    один запрос - тот, кто взял блокировку в кеше; остальные
+    в это время получают прежний рейтинг. Без рейтинга в кеше
+    (первый запуск) он строится сразу.
+    """
+    board = loaded_leaderboard(kind)
+    if board is None:
+        return refresh_leaderboard(kind)
+    lock_key = f'leaderboard:{kind}:lock'
+    if (time.time() - board.built >= settings.LEADERBOARD_TTL
+            and cache.add(lock_key, 1, settings.LEADERBOARD_TTL)):
+        try:
+            board = refresh_leaderboard(kind)
+        finally:
+            cache.delete(lock_key)
+    return board
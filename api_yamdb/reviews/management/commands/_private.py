@@ -0,0 +1,350 @@
+import csv
+import hashlib
+import io
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import CommandError
+from django.core.management.color import no_style
+from django.db import connection
+from reviews.bulk import refresh_titles
+from reviews.generations import bump_generation, invalidate_scopes
+from reviews.models import Comment, Review, Title
+from reviews.ratings import recalculate_ratings
+from reviews.rollups import rebuild_stats
+
+# Натуральные ключи, по которым можно ссылаться на связанные объекты в CSV.
+NATURAL_KEYS = {
+    'reviews.category': 'slug',
+    'reviews.genre': 'slug',
+    'reviews.user': 'username',
+}
+
+
+def natural_key(model):
+    return NATURAL_KEYS.get(model._meta.label_lower)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+class ForeignKeyMap:
+    """
+    Предзагруженное отображение "значение из CSV -> pk"
+    для внешнего ключа: по pk и по натуральному ключу модели.
+    """
+    def __init__(self, field):
+        self.field = field
+        model = field.related_model
+        key = natural_key(model)
+        self.ids = {}
+        fields = ('pk', key) if key else ('pk',)
+        for row in model.objects.values_list(*fields).iterator():
+            self.ids[str(row[0])] = row[0]
+            if key:
+                self.ids[row[1]] = row[0]
+
+    def __call__(self, value):
+        if value == '' and self.field.null:
+            return None
+        try:
+            return self.ids[value]
+        except KeyError:
+            raise CommandError(
+                f'{self.field.name}: объект "{value}" не найден'
+            )
+
+
+class Column:
+    """
+    Колонка CSV, сопоставленная полю модели.
+    """
+    def __init__(self, model, name):
+        try:
+            # get_field понимает и имя поля, и attname ('category_id').
+            self.field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            self.field = None
+        if self.field is None or not self.field.concrete:
+            raise CommandError(f'Неизвестная колонка: {name}')
+        self.attname = self.field.attname
+        self.convert = (
+            ForeignKeyMap(self.field) if self.field.is_relation
+            else self.convert_value
+        )
+
+    def convert_value(self, value):
+        if value == '' and self.field.null:
+            return None
+        return value
+
+
+def read_rows(csv_file, model):
+    """
+    Потоково читает CSV: словари attname -> значение
+    с уже разрешенными внешними ключами.
+    """
+    reader = csv.reader(csv_file, delimiter=',')
+    columns = [Column(model, name) for name in next(reader)]
+    for line_number, row in enumerate(reader, start=2):
+        try:
+            yield {
+                column.attname: column.convert(value)
+                for column, value in zip(columns, row)
+            }
+        except CommandError as error:
+            raise CommandError(f'Строка {line_number}: {error}')
+
+
+@contextmanager
+def keep_file_dates(model, attnames):
+    """
+    auto_now_add перезаписал бы даты публикации из файла:
+    на время вставки отключаем его для колонок из CSV.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False) and field.attname in attnames
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def bulk_insert(model, rows):
+    with keep_file_dates(model, rows[0]):
+        model.objects.bulk_create([model(**row) for row in rows])
+
+
+def copy_value(value):
+    """
+    Поле COPY ... (FORMAT csv): NULL - пустое поле без кавычек,
+    любое значение, в том числе пустая строка, - в кавычках.
+    """
+    if value is None:
+        return ''
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_line(values):
+    return ','.join(copy_value(value) for value in values) + '\n'
+
+
+def copy_fields(model, attnames):
+    """
+    Колонки COPY: все поля модели, кроме pk, которого нет в файле
+    (его выдаст последовательность). Поля без колонки в CSV получают
+    значение по умолчанию или auto_now_add, как в bulk_create.
+    """
+    return [
+        field for field in model._meta.concrete_fields
+        if field.attname in attnames or not field.primary_key
+    ]
+
+
+def copy_insert(model, rows):
+    """
+    Быстрая загрузка через COPY (только PostgreSQL).
+    """
+    fields = copy_fields(model, rows[0])
+    buffer = io.StringIO()
+    with keep_file_dates(model, rows[0]):
+        for row in rows:
+            instance = model(**{
+                attname: model._meta.get_field(attname).to_python(value)
+                for attname, value in row.items()
+            })
+            buffer.write(copy_line(
+                field.get_db_prep_save(
+                    field.pre_save(instance, add=True), connection
+                )
+                for field in fields
+            ))
+    buffer.seek(0)
+    columns = ', '.join(
+        connection.ops.quote_name(field.column) for field in fields
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+            f'({columns}) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+
+
+def reset_sequences(model):
+    """
+    После вставки с явными id сдвигаем последовательность pk.
+    """
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def after_import(model, title_ids=None):
+    """
+    Массовая вставка не вызывает сигналы: обновляем поколения
+    данных, денормализованный рейтинг и сводки вручную.
+    title_ids - произведения, затронутые инкрементальным импортом:
+    пересчитываются только они, без title_ids - все.
+    """
+    reset_sequences(model)
+    bump_generation(model)
+    invalidate_scopes(model)
+    if title_ids is not None:
+        refresh_titles(title_ids)
+        return
+    if model is Review:
+        recalculate_ratings()
+    if model in (Title, Review, Comment):
+        rebuild_stats()
+
+
+# Путь от записи к произведению, чьи рейтинг и сводки она меняет.
+TITLE_PATHS = {Review: 'title_id', Comment: 'review__title_id'}
+
+
+def row_title_ids(model, rows):
+    """Id произведений по новым значениям строк CSV."""
+    if model is Review:
+        return {row['title_id'] for row in rows if 'title_id' in row}
+    if model is Comment:
+        return set(Review.objects.filter(pk__in={
+            row['review_id'] for row in rows if 'review_id' in row
+        }).values_list('title_id', flat=True))
+    return set()
+
+
+def stored_title_ids(model, pks):
+    """Id произведений по значениям записей в БД."""
+    if model not in TITLE_PATHS or not pks:
+        return set()
+    return set(model.objects.filter(pk__in=pks).values_list(
+        TITLE_PATHS[model], flat=True
+    ))
+
+
+def natural_key_or_pk(model):
+    return natural_key(model) or 'id'
+
+
+def row_digest(fields, values):
+    """
+    Хеш содержимого строки в нормализованном виде:
+    одинаков для значения из CSV и значения из БД.
+    """
+    normalized = []
+    for field, value in zip(fields, values):
+        if value is not None:
+            value = field.to_python(value)
+        normalized.append('' if value is None else str(value))
+    return hashlib.md5('\x1f'.join(normalized).encode()).digest()
+
+
+class Upserter:
+    """
+    Инкрементальный импорт: сопоставляет строки CSV с записями
+    по ключу и пишет только вставки, изменения и (опционально) удаления.
+    """
+    def __init__(self, model, key, delete_missing=False, dry_run=False):
+        self.model = model
+        self.key = model._meta.get_field(key).attname
+        self.delete_missing = delete_missing
+        self.dry_run = dry_run
+        self.existing = None
+        self.seen = set()
+        self.touched = set()
+        self.stats = dict.fromkeys(
+            ('inserted', 'updated', 'unchanged', 'deleted'), 0
+        )
+
+    def prepare(self, attnames):
+        if self.key not in attnames:
+            raise CommandError(f'В CSV нет ключевой колонки {self.key}')
+        self.attnames = [
+            name for name in attnames
+            if name not in (self.key, self.model._meta.pk.attname)
+        ]
+        self.fields = [
+            self.model._meta.get_field(name) for name in self.attnames
+        ]
+        self.existing = {
+            row[1]: (row[0], row_digest(self.fields, row[2:]))
+            for row in self.model.objects.values_list(
+                'pk', self.key, *self.attnames
+            ).order_by().iterator()
+        }
+
+    def key_of(self, row):
+        return self.model._meta.get_field(self.key).to_python(row[self.key])
+
+    def __call__(self, model, rows):
+        if self.existing is None:
+            self.prepare(list(rows[0]))
+        inserts, updates, changed = [], [], []
+        for row in rows:
+            key = self.key_of(row)
+            self.seen.add(key)
+            if key not in self.existing:
+                inserts.append(model(**row))
+                changed.append(row)
+                continue
+            pk, digest = self.existing[key]
+            values = [row[name] for name in self.attnames]
+            if digest == row_digest(self.fields, values):
+                self.stats['unchanged'] += 1
+                continue
+            updates.append(model(pk=pk, **dict(zip(self.attnames, values))))
+            changed.append(row)
+        self.stats['inserted'] += len(inserts)
+        self.stats['updated'] += len(updates)
+        if self.dry_run:
+            return
+        # Отзыв мог переехать к другому произведению: и старое, и новое.
+        self.touched |= stored_title_ids(model, [obj.pk for obj in updates])
+        self.touched |= row_title_ids(model, changed)
+        with keep_file_dates(model, rows[0]):
+            model.objects.bulk_create(inserts)
+        model.objects.bulk_update(updates, self.attnames)
+
+    def finish(self, batch_size):
+        if not self.delete_missing or self.existing is None:
+            return
+        missing = [
+            pk for key, (pk, _) in self.existing.items()
+            if key not in self.seen
+        ]
+        self.stats['deleted'] = len(missing)
+        if self.dry_run:
+            return
+        for chunk in batched(missing, batch_size):
+            self.touched |= stored_title_ids(self.model, chunk)
+            self.model.objects.filter(pk__in=chunk).delete()
+
+    def title_ids(self):
+        """
+        Произведения, чьи рейтинг и сводки нужно пересчитать:
+        затронутые отзывами и комментариями, и новые (без сводок).
+        """
+        if self.model is Title:
+            return self.touched | set(Title.objects.filter(
+                stats__isnull=True
+            ).values_list('pk', flat=True))
+        return self.touched
+
+    def summary(self):
+        prefix = 'Dry run: ' if self.dry_run else ''
+        return prefix + ', '.join(
+            f'{name} {count}' for name, count in self.stats.items()
+        )
@@ -0,0 +1,131 @@
+import csv
+import gzip
+import json
+import os
+import time
+from multiprocessing import get_context
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+# Учетные данные и персональные данные: выгружаются только
+# с --include-sensitive. В письмах очереди - коды подтверждения.
+SENSITIVE_FIELDS = {
+    'reviews.user': ('password', 'email'),
+    'reviews.outboxemail': ('body', 'recipients'),
+}
+
+
+def export_attnames(model, include_sensitive=False):
+    hidden = () if include_sensitive else SENSITIVE_FIELDS.get(
+        model._meta.label_lower, ()
+    )
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if field.name not in hidden
+    ]
+
+
+def open_output(path, compress):
+    if compress:
+        return gzip.open(f'{path}.gz', 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def export_model(task):
+    """
+    Выгружает одну модель в файл. Строки читаются курсором
+    на стороне сервера, память не зависит от размера таблицы.
+    """
+    (model_name, output_dir, file_format, compress, chunk_size,
+     include_sensitive) = task
+    model = apps.get_model('reviews', model_name)
+    attnames = export_attnames(model, include_sensitive)
+    rows = model.objects.order_by('pk').values_list(*attnames).iterator(
+        chunk_size=chunk_size
+    )
+    path = os.path.join(output_dir, f'{model._meta.model_name}.{file_format}')
+    started = time.monotonic()
+    total = 0
+    with open_output(path, compress) as output:
+        if file_format == 'csv':
+            writer = csv.writer(output)
+            writer.writerow(attnames)
+        for row in rows:
+            if file_format == 'csv':
+                writer.writerow(['' if value is None else value
+                                 for value in row])
+            else:
+                output.write(json.dumps(
+                    dict(zip(attnames, row)),
+                    cls=DjangoJSONEncoder, ensure_ascii=False
+                ) + '\n')
+            total += 1
+    return model._meta.object_name, total, time.monotonic() - started
+
+
+class Command(BaseCommand):
+    help = 'Exports reviews models to csv (importcsv format) or ndjson'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', type=str,
+            help='Models to export (default: all)'
+        )
+        parser.add_argument(
+            '--output-dir', type=str, default='.', help='Target directory'
+        )
+        parser.add_argument(
+            '--format', choices=('csv', 'ndjson'), default='csv'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Compress output files'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Rows fetched from the cursor at a time'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Export models in parallel processes'
+        )
+        parser.add_argument(
+            '--include-sensitive', action='store_true',
+            help='Also export password hashes, emails and queued mail'
+        )
+
+    def handle(self, *args, **options):
+        config = apps.get_app_config('reviews')
+        try:
+            models = [
+                config.get_model(name)
+                for name in options['models'] or [
+                    model.__name__ for model in config.get_models()
+                ]
+            ]
+        except LookupError as error:
+            raise CommandError(error)
+        os.makedirs(options['output_dir'], exist_ok=True)
+        tasks = [
+            (model.__name__, options['output_dir'], options['format'],
+             options['gzip'], options['chunk_size'],
+             options['include_sensitive'])
+            for model in models
+        ]
+        if options['workers'] > 1:
+            # Дочерние процессы не должны делить соединение с родителем.
+            connections.close_all()
+            with get_context('fork').Pool(options['workers']) as pool:
+                results = pool.imap_unordered(export_model, tasks)
+                self.report(results)
+        else:
+            self.report(map(export_model, tasks))
+
+    def report(self, results):
+        for model_name, total, elapsed in results:
+            self.stdout.write(self.style.SUCCESS(
+                f'{model_name}: {total} rows, '
+                f'{total / max(elapsed, 1e-6):.0f} rows/s'
+            ))
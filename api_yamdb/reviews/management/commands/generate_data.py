@@ -0,0 +1,163 @@
+import os
+import time
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from reviews.generations import bump_generation, invalidate_scopes
+from reviews.generator import (dictionary_rows, generate, id_chunks, make_plan,
+                               review_chunks)
+from reviews.leaderboards import BUILDERS, refresh_leaderboard
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.ratings import recalculate_ratings
+from reviews.rollups import rebuild_stats
+
+from ._private import batched, bulk_insert, copy_insert, reset_sequences
+
+MODELS = (User, Category, Genre, Title, Review, Comment)
+
+
+def write_rows(tables, copy, batch_size):
+    insert = copy_insert if copy else bulk_insert
+    with transaction.atomic():
+        for model, rows in tables:
+            for batch in batched(rows, batch_size):
+                insert(model, batch)
+
+
+def produce(task):
+    """
+    Часть данных в процессе пула. Если БД принимает параллельную
+    запись, процесс сам вставляет строки, иначе отдает их родителю.
+    """
+    plan, kind, index, args, options = task
+    tables = generate(plan, kind, index, *args)
+    if options['write']:
+        write_rows(tables, options['copy'], options['batch_size'])
+        return [(model, len(rows), None) for model, rows in tables]
+    return [(model, len(rows), rows) for model, rows in tables]
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates synthetic users, categories, genres, titles, reviews '
+        'and comments with Zipf-distributed activity, in parallel processes'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in (
+                ('users', 10000), ('categories', 10), ('genres', 30),
+                ('titles', 10000), ('reviews', 100000), ('comments', 50000)):
+            parser.add_argument(f'--{name}', type=int, default=default,
+                                help=f'How many {name} to add')
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Zipf exponent of reviews per title, 0 - uniform'
+        )
+        parser.add_argument(
+            '--comment-skew', type=float, default=1.0,
+            help='Zipf exponent of comments per review, 0 - uniform'
+        )
+        parser.add_argument('--days', type=int, default=365,
+                            help='Reviews and comments span, days')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Generator processes')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per chunk and per bulk insert')
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Use COPY FROM STDIN (PostgreSQL only)'
+        )
+
+    def handle(self, *args, **options):
+        self.check_options(options)
+        volumes = {
+            User: options['users'], Category: options['categories'],
+            Genre: options['genres'], Title: options['titles'],
+            Review: options['reviews'], Comment: options['comments'],
+        }
+        plan = make_plan(
+            options['seed'], self.first_ids(), volumes,
+            options['comment_skew'], options['days']
+        )
+        size = options['batch_size']
+        # SQLite не выдерживает параллельных писателей.
+        options['write'] = connection.vendor != 'sqlite'
+        phases = (
+            ('users', id_chunks(plan.users[0], volumes[User], size)),
+            ('titles', id_chunks(plan.titles[0], volumes[Title], size)),
+            ('reviews', [(chunk,) for chunk in review_chunks(
+                plan, volumes[Title], volumes[Review], options['skew'], size
+            )]),
+            ('comments', id_chunks(plan.comments[0], volumes[Comment], size)),
+        )
+        started = time.monotonic()
+        write_rows(dictionary_rows(plan), options['copy'], size)
+        # Соединение родителя не должно достаться процессам пула.
+        connections.close_all()
+        with Pool(options['workers']) as pool:
+            for kind, chunks in phases:
+                tasks = [(plan, kind, index, chunk, options)
+                         for index, chunk in enumerate(chunks)]
+                self.run_phase(pool, tasks, options)
+        self.stdout.write('Ratings, stats and leaderboards...')
+        self.finish()
+        total = sum(volumes.values())
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {total} rows in {elapsed:.1f} s, '
+            f'{total / max(elapsed, 1e-6):.0f} rows/s'
+        ))
+
+    def check_options(self, options):
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy доступен только для PostgreSQL')
+        if min(options['categories'], options['genres'],
+               options['workers'], options['batch_size']) < 1:
+            raise CommandError(
+                'Нужны хотя бы одна категория, один жанр и один процесс'
+            )
+        if options['reviews'] > options['titles'] * options['users']:
+            raise CommandError(
+                'Отзывов больше, чем пар произведение - автор (unique_review)'
+            )
+        if options['comments'] and not options['reviews']:
+            raise CommandError('Комментариям нужны отзывы')
+
+    def first_ids(self):
+        """Данные дописываются: id - после существующих."""
+        return {
+            model: (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+            for model in MODELS
+        }
+
+    def run_phase(self, pool, tasks, options):
+        started = time.monotonic()
+        counts = {}
+        for tables in pool.imap(produce, tasks):
+            if not options['write']:
+                write_rows(
+                    [(model, rows) for model, _, rows in tables],
+                    options['copy'], options['batch_size']
+                )
+            for model, count, _ in tables:
+                counts[model] = counts.get(model, 0) + count
+        elapsed = max(time.monotonic() - started, 1e-6)
+        for model, count in counts.items():
+            self.stdout.write(
+                f'{model._meta.label}: {count} rows in {elapsed:.1f} s, '
+                f'{count / elapsed:.0f} rows/s'
+            )
+
+    def finish(self):
+        """Массовая вставка не вызывает сигналы: как после importcsv."""
+        for model in MODELS:
+            reset_sequences(model)
+            bump_generation(model)
+            invalidate_scopes(model)
+        recalculate_ratings()
+        rebuild_stats()
+        for kind in BUILDERS:
+            refresh_leaderboard(kind)
@@ -1,7 +1,12 @@
-import csv
+import time
+from contextlib import nullcontext
 
 from django.apps import apps
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from ._private import (Upserter, after_import, batched, bulk_insert,
+                       copy_insert, natural_key_or_pk, read_rows)
 
 
 class Command(BaseCommand):
@@ -10,20 +15,99 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('file_path', type=str, help='Define file path')
         parser.add_argument('model', type=str, help='Define model')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per bulk insert'
+        )
+        parser.add_argument(
+            '--atomic', choices=('file', 'batch'), default='file',
+            help='One transaction per file or per batch'
+        )
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Use COPY FROM STDIN (PostgreSQL only)'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Insert new rows, update changed rows, skip unchanged'
+        )
+        parser.add_argument(
+            '--key', type=str,
+            help='Column to match rows by in upsert mode '
+                 '(default: slug/username or id)'
+        )
+        parser.add_argument(
+            '--delete-missing', action='store_true',
+            help='In upsert mode delete rows absent from the file'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='In upsert mode only report the counts'
+        )
 
     def handle(self, *args, **options):
         file_path = options["file_path"]
         model_cl = apps.get_model('reviews', options["model"])
+        writer = self.get_writer(model_cl, options)
+        file_atomic = (
+            transaction.atomic() if options['atomic'] == 'file'
+            else nullcontext()
+        )
+        try:
+            with open(file_path, "r", encoding="utf-8") as csv_file:
+                with file_atomic:
+                    total = self.import_rows(
+                        csv_file, model_cl, writer, options
+                    )
+                    if isinstance(writer, Upserter):
+                        writer.finish(options['batch_size'])
+        finally:
+            if not options['dry_run']:
+                after_import(model_cl, (
+                    writer.title_ids() if isinstance(writer, Upserter)
+                    else None
+                ))
 
-        with open(file_path, "r", encoding="utf-8") as csv_file:
-            reader = csv.reader(csv_file, delimiter=',')
-            header = next(reader)
-            for row in reader:
-                obj_dict = {key: value for key, value in zip(header, row)}
-                model_cl.objects.create(**obj_dict)
-
+        if isinstance(writer, Upserter):
+            self.stdout.write(writer.summary())
+        if options['dry_run']:
+            return
         self.stdout.write(
             self.style.SUCCESS(
-                'File successfully imported'
+                f'File successfully imported: {total} rows'
             )
         )
+
+    def get_writer(self, model_cl, options):
+        if options['upsert']:
+            if options['copy']:
+                raise CommandError('--copy не работает вместе с --upsert')
+            return Upserter(
+                model_cl,
+                options['key'] or natural_key_or_pk(model_cl),
+                delete_missing=options['delete_missing'],
+                dry_run=options['dry_run']
+            )
+        if options['dry_run'] or options['delete_missing']:
+            raise CommandError(
+                '--dry-run и --delete-missing работают только с --upsert'
+            )
+        if options['copy']:
+            if connection.vendor != 'postgresql':
+                raise CommandError('--copy доступен только для PostgreSQL')
+            return copy_insert
+        return bulk_insert
+
+    def import_rows(self, csv_file, model_cl, writer, options):
+        started = time.monotonic()
+        total = 0
+        rows = read_rows(csv_file, model_cl)
+        for batch in batched(rows, options['batch_size']):
+            with transaction.atomic(savepoint=False):
+                writer(model_cl, batch)
+            total += len(batch)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{total} rows, {total / max(elapsed, 1e-6):.0f} rows/s'
+            )
+        return total
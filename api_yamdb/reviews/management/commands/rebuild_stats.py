@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from reviews.rollups import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds per-title review/comment statistics rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Titles rebuilt per transaction'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = rebuild_stats(options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Stats rebuilt for {total} titles '
+                f'in {time.monotonic() - started:.1f} s'
+            )
+        )
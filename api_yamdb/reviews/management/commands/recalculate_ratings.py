@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from reviews.ratings import recalculate_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recalculates denormalized title ratings from reviews'
+
+    def handle(self, *args, **options):
+        updated = recalculate_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Ratings recalculated for {updated} titles'
+            )
+        )
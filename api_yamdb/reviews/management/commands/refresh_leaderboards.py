@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from reviews.leaderboards import BUILDERS, refresh_leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Recomputes top-rated and trending leaderboards into the cache'
+
+    def handle(self, *args, **options):
+        for kind in BUILDERS:
+            board = refresh_leaderboard(kind)
+            self.stdout.write(
+                self.style.SUCCESS(f'Leaderboard {kind}: {len(board)} titles')
+            )
@@ -0,0 +1,46 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from reviews.outbox import outbox_stats, send_pending
+
+
+class Command(BaseCommand):
+    help = 'Sends queued emails from the outbox over one SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of sending one pass'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help='Seconds to sleep when the outbox is empty (with --loop)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Emails sent per SMTP connection'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Print queue depth and last batch latency, then exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(outbox_stats(), indent=2))
+            return
+        while True:
+            self.drain(options['batch_size'])
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def drain(self, batch_size):
+        batch = send_pending(batch_size)
+        while batch:
+            self.stdout.write(
+                f"Sent {batch['sent']}, failed {batch['failed']}, "
+                f"avg {batch['avg_latency_ms']} ms"
+            )
+            batch = send_pending(batch_size)
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from .utils import max_value_current_year
 
@@ -111,10 +112,28 @@ class Title(models.Model):
         through='GenreTitle'
     )
     description = models.TextField(blank=True)
+    # Денормализованный рейтинг: поддерживается сигналами модели 'Review',
+    # пересчитывается командой recalculate_ratings.
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
 
 class GenreTitle(models.Model):
     """
@@ -180,6 +199,17 @@ class Review(models.Model):
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        # Запись отзыва и пересчет рейтинга произведения - одна транзакция.
+        # Внутри чужой транзакции точка сохранения не нужна: ошибку
+        # обрабатывает внешний atomic (см. ReviewViewSet.perform_create).
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
 
 class Comment(models.Model):
     """
@@ -208,3 +238,103 @@ class Comment(models.Model):
 
     def __str__(self):
         return self.text
+
+
+class TitleStats(models.Model):
+    """
+    Счетчики отзывов и комментариев произведения.
+    Обновляются сигналами при записи, пересобираются командой
+    rebuild_stats.
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Title stats'
+
+
+class TitleScoreCount(models.Model):
+    """Число отзывов произведения с данной оценкой."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_counts'
+    )
+    score = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'score'],
+                                    name='unique_title_score')
+        ]
+
+
+class TitleActivity(models.Model):
+    """Число отзывов и комментариев к произведению за день."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='activity'
+    )
+    day = models.DateField()
+    review_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Title activity'
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'day'],
+                                    name='unique_title_day')
+        ]
+
+
+class Generation(models.Model):
+    """
+    Счетчик поколения данных (см. reviews.generations).
+    Растет атомарным UPDATE в БД, общий для всех процессов.
+    """
+    key = models.CharField(max_length=200, primary_key=True)
+    value = models.BigIntegerField()
+
+    def __str__(self):
+        return f'{self.key} = {self.value}'
+
+
+class ThrottleBucket(models.Model):
+    """
+    Корзина token bucket (api.throttling): токены и время
+    последнего пополнения в секундах Unix. Полную корзину
+    можно удалить в любой момент - она создастся заново.
+    """
+    key = models.CharField(max_length=200, primary_key=True)
+    tokens = models.FloatField()
+    updated = models.FloatField()
+
+
+class OutboxEmail(models.Model):
+    """
+    Письмо в очереди на отправку.
+    Отправляет команда send_outbox, запрос не ждет SMTP-сервер.
+    """
+    subject = models.CharField(max_length=256)
+    body = models.TextField()
+    from_email = models.CharField(max_length=256, blank=True)
+    recipients = models.TextField(help_text='Адреса через запятую')
+    created = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(default=timezone.now, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    sent_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['send_after', 'id']
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipients}'
@@ -0,0 +1,168 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+LAST_BATCH_KEY = 'outbox:last-batch'
+# Время, на которое взятые в работу письма скрыты от других воркеров.
+LEASE_SECONDS = 300
+# Тело письма с кодом подтверждения не хранится после отправки.
+REDACTED = ''
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    """
+    Кладет письмо в очередь. Отправка - командой send_outbox.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or '',
+        recipients=','.join(recipients),
+    )
+
+
+def backoff_delay(attempts, base=None, cap=3600):
+    """
+    Задержка перед повторной отправкой в секундах: растет вдвое
+    с каждой неудачной попыткой, но не больше cap.
+    """
+    if base is None:
+        base = settings.OUTBOX_BACKOFF_SECONDS
+    return min(cap, base * 2 ** max(attempts - 1, 0))
+
+
+def build_message(email, connection=None):
+    return EmailMessage(
+        email.subject,
+        email.body,
+        email.from_email or None,
+        [address for address in email.recipients.split(',') if address],
+        connection=connection,
+    )
+
+
+def pending_emails(max_attempts=None):
+    if max_attempts is None:
+        max_attempts = settings.OUTBOX_MAX_ATTEMPTS
+    return OutboxEmail.objects.filter(
+        sent_at__isnull=True, attempts__lt=max_attempts
+    )
+
+
+def claim_batch(batch_size, max_attempts=None):
+    """
+    Забирает пачку готовых к отправке писем и откладывает их
+    на LEASE_SECONDS, чтобы параллельный воркер их не взял.
+    """
+    now = timezone.now()
+    queryset = pending_emails(max_attempts).filter(send_after__lte=now)
+    with transaction.atomic():
+        if db_connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        emails = list(queryset[:batch_size])
+        OutboxEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(send_after=now + timedelta(seconds=LEASE_SECONDS))
+    return emails
+
+
+def defer(email, error):
+    """
+    Откладывает письмо; после последней попытки тело
+    больше не нужно и стирается.
+    """
+    email.attempts += 1
+    email.send_after = timezone.now() + timedelta(
+        seconds=backoff_delay(email.attempts)
+    )
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.body = REDACTED
+    email.save(
+        update_fields=('attempts', 'send_after', 'last_error', 'body')
+    )
+
+
+def deliver(emails, connection):
+    """
+    Отправляет письма через одно открытое соединение.
+    Возвращает число отправленных и время отправки каждого письма.
+    """
+    sent, latencies = [], []
+    for email in emails:
+        started = time.monotonic()
+        try:
+            build_message(email, connection).send()
+        except Exception as error:
+            defer(email, error)
+            continue
+        latencies.append(time.monotonic() - started)
+        sent.append(email.pk)
+    OutboxEmail.objects.filter(pk__in=sent).update(
+        sent_at=timezone.now(), last_error='', body=REDACTED
+    )
+    return len(sent), latencies
+
+
+def send_pending(batch_size=None, connection=None):
+    """
+    Отправляет одну пачку писем из очереди.
+    Неудачные письма откладываются с экспоненциальной задержкой.
+    """
+    emails = claim_batch(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not emails:
+        return None
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            defer(email, error)
+        sent, latencies = 0, []
+    else:
+        try:
+            sent, latencies = deliver(emails, connection)
+        finally:
+            connection.close()
+    batch = {
+        'sent': sent,
+        'failed': len(emails) - sent,
+        'avg_latency_ms': round(
+            1000 * sum(latencies) / len(latencies), 2
+        ) if latencies else None,
+        'max_latency_ms': round(
+            1000 * max(latencies), 2
+        ) if latencies else None,
+        'finished': timezone.now().isoformat(),
+    }
+    cache.set(LAST_BATCH_KEY, batch, timeout=None)
+    return batch
+
+
+def outbox_stats():
+    """
+    Метрики очереди: глубина, возраст самого старого письма,
+    письма с исчерпанными попытками и итоги последней пачки.
+    """
+    pending = pending_emails()
+    oldest = pending.aggregate(oldest=Min('created'))['oldest']
+    return {
+        'pending': pending.count(),
+        'oldest_pending_seconds': round(
+            (timezone.now() - oldest).total_seconds(), 1
+        ) if oldest else None,
+        'failed': OutboxEmail.objects.filter(
+            sent_at__isnull=True,
+            attempts__gte=settings.OUTBOX_MAX_ATTEMPTS
+        ).count(),
+        'last_batch': cache.get(LAST_BATCH_KEY),
+    }
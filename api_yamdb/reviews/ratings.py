@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .generations import bump_generation
+from .models import Review, Title
+
+
+def change_rating(title_id, score_delta, count_delta):
+    """
+    Атомарно изменяет сумму и количество оценок произведения.
+    """
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta
+    )
+
+
+def recalculate_ratings(title_ids=None):
+    """
+    Пересчитывает рейтинг произведений по таблице отзывов.
+    Если title_ids не передан - пересчитываются все произведения.
+    """
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    with transaction.atomic():
+        transaction.on_commit(lambda: bump_generation(Title))
+        return titles.update(
+            rating_sum=Coalesce(
+                Subquery(
+                    reviews.annotate(total=Sum('score')).values('total'),
+                    output_field=IntegerField()
+                ),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(
+                    reviews.annotate(total=Count('id')).values('total'),
+                    output_field=IntegerField()
+                ),
+                0
+            )
+        )
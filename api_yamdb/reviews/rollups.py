@@ -0,0 +1,211 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (Comment, Review, Title, TitleActivity, TitleScoreCount,
+                     TitleStats)
+
+PERIODS = ('day', 'week')
+SCORES = range(1, 11)
+
+
+# Строки нет - она создается со счетчиками deltas, есть - счетчики
+# увеличиваются. Один оператор без точки сохранения и повторной попытки.
+UPSERT_COUNTS_SQL = """
+    INSERT INTO {table} ({columns}) VALUES ({values})
+    ON CONFLICT ({keys}) DO UPDATE SET {changes}
+"""
+
+
+def upsert_counts(model, lookup, deltas):
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    instance = model(**lookup, **deltas)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.attname in lookup or not field.primary_key
+    ]
+    changes = [
+        quote(model._meta.get_field(name).column) for name in deltas
+    ]
+    sql = UPSERT_COUNTS_SQL.format(
+        table=table,
+        columns=', '.join(quote(field.column) for field in fields),
+        values=', '.join(['%s'] * len(fields)),
+        keys=', '.join(
+            quote(model._meta.get_field(name).column) for name in lookup
+        ),
+        changes=', '.join(
+            f'{column} = {table}.{column} + EXCLUDED.{column}'
+            for column in changes
+        ),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            field.get_db_prep_save(
+                field.pre_save(instance, add=True), connection
+            )
+            for field in fields
+        ])
+
+
+def add_counts(model, lookup, **deltas):
+    """
+    Прибавляет deltas к счетчикам строки одним оператором. Нет строки -
+    она создается; уменьшение отсутствующей строки или счетчика ниже
+    нуля пропускается, такие расхождения исправляет rebuild_stats.
+    """
+    guards = {
+        f'{field}__gte': -delta
+        for field, delta in deltas.items() if delta < 0
+    }
+    if not guards:
+        upsert_counts(model, lookup, deltas)
+        return
+    model.objects.filter(**lookup, **guards).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def activity_day(moment):
+    return timezone.localdate(moment) if timezone.is_aware(moment) else (
+        moment.date()
+    )
+
+
+def count_review(title_id, score, pub_date, sign=1):
+    add_counts(TitleStats, {'title_id': title_id}, review_count=sign)
+    add_counts(
+        TitleScoreCount, {'title_id': title_id, 'score': score}, count=sign
+    )
+    add_counts(
+        TitleActivity,
+        {'title_id': title_id, 'day': activity_day(pub_date)},
+        review_count=sign
+    )
+
+
+def comment_title_id(comment):
+    if Comment.review.is_cached(comment):
+        return comment.review.title_id
+    return Review.objects.filter(
+        pk=comment.review_id
+    ).values_list('title_id', flat=True).first()
+
+
+def count_comment(comment, sign=1):
+    title_id = comment_title_id(comment)
+    if title_id is None:
+        return
+    add_counts(TitleStats, {'title_id': title_id}, comment_count=sign)
+    add_counts(
+        TitleActivity,
+        {'title_id': title_id, 'day': activity_day(comment.pub_date)},
+        comment_count=sign
+    )
+
+
+def period_start(day, period):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def title_stats(title_id, period='day', limit=30):
+    """
+    Статистика произведения только из таблиц-сводок: гистограмма
+    оценок, счетчики и активность за последние limit дней или недель.
+    """
+    stats = TitleStats.objects.filter(title_id=title_id).values_list(
+        'review_count', 'comment_count'
+    ).first()
+    if stats is None:
+        return None
+    scores = dict(TitleScoreCount.objects.filter(
+        title_id=title_id
+    ).values_list('score', 'count'))
+    step = timedelta(weeks=1) if period == 'week' else timedelta(days=1)
+    last = period_start(timezone.localdate(), period)
+    first = last - step * (limit - 1)
+    activity = {
+        first + step * number: [0, 0] for number in range(limit)
+    }
+    for day, reviews, comments in TitleActivity.objects.filter(
+            title_id=title_id, day__gte=first
+    ).values_list('day', 'review_count', 'comment_count'):
+        bucket = activity[period_start(day, period)]
+        bucket[0] += reviews
+        bucket[1] += comments
+    return {
+        'id': title_id,
+        'review_count': stats[0],
+        'comment_count': stats[1],
+        'scores': {str(score): scores.get(score, 0) for score in SCORES},
+        'period': period,
+        'activity': [
+            {'start': start, 'reviews': reviews, 'comments': comments}
+            for start, (reviews, comments) in activity.items()
+        ],
+    }
+
+
+def rebuild_chunk(title_ids):
+    reviews = Review.objects.filter(title_id__in=title_ids).order_by()
+    comments = Comment.objects.filter(
+        review__title_id__in=title_ids
+    ).order_by()
+    review_counts = dict(reviews.values('title_id').annotate(
+        n=Count('id')
+    ).values_list('title_id', 'n'))
+    comment_counts = dict(comments.values('review__title_id').annotate(
+        n=Count('id')
+    ).values_list('review__title_id', 'n'))
+    activity = defaultdict(lambda: [0, 0])
+    for column, queryset, title_field in (
+            (0, reviews, 'title_id'), (1, comments, 'review__title_id')):
+        for title_id, day, count in queryset.annotate(
+                day=TruncDate('pub_date')
+        ).values(title_field, 'day').annotate(
+                n=Count('id')
+        ).values_list(title_field, 'day', 'n'):
+            activity[title_id, day][column] += count
+    with transaction.atomic():
+        for model in (TitleStats, TitleScoreCount, TitleActivity):
+            model.objects.filter(title_id__in=title_ids).delete()
+        TitleStats.objects.bulk_create(
+            TitleStats(
+                title_id=title_id,
+                review_count=review_counts.get(title_id, 0),
+                comment_count=comment_counts.get(title_id, 0)
+            ) for title_id in title_ids
+        )
+        TitleScoreCount.objects.bulk_create(
+            TitleScoreCount(title_id=title_id, score=score, count=count)
+            for title_id, score, count in reviews.values(
+                'title_id', 'score'
+            ).annotate(n=Count('id')).values_list('title_id', 'score', 'n')
+        )
+        TitleActivity.objects.bulk_create(
+            TitleActivity(
+                title_id=title_id, day=day,
+                review_count=counts[0], comment_count=counts[1]
+            ) for (title_id, day), counts in activity.items()
+        )
+
+
+def rebuild_stats(chunk_size=500):
+    """
+    Пересобирает сводки по отзывам и комментариям пачками
+    по chunk_size произведений, каждая пачка - своя транзакция.
+    """
+    title_ids = list(Title.objects.order_by('pk').values_list(
+        'pk', flat=True
+    ))
+    for start in range(0, len(title_ids), chunk_size):
+        rebuild_chunk(title_ids[start:start + chunk_size])
+    return len(title_ids)
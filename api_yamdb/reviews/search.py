@@ -0,0 +1,124 @@
+import re
+from collections import defaultdict
+
+from django.db import connection, connections
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+
+from .generations import GenerationCached
+from .models import Title
+
+SEARCH_CONFIG = 'russian'
+SEARCH_INDEX_NAME = 'reviews_title_search_idx'
+SEARCH_DOCUMENT = (
+    "coalesce({table}name, '') || ' ' || coalesce({table}description, '')"
+)
+SEARCH_VECTOR = "to_tsvector('{config}', {document})"
+SEARCH_QUERY = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+TOKEN = re.compile(r'\w+')
+# Без PostgreSQL ранжированный список id уходит в SQL целиком:
+# берутся только самые релевантные совпадения.
+SEARCH_MAX_RESULTS = 200
+
+
+def search_vector(table=''):
+    return SEARCH_VECTOR.format(
+        config=SEARCH_CONFIG,
+        document=SEARCH_DOCUMENT.format(table=table)
+    )
+
+
+def create_search_index(using='default', **kwargs):
+    """
+    GIN-индекс по tsvector названия и описания произведения.
+    Выражение индекса совпадает с выражением в search_titles.
+    """
+    db = connections[using]
+    if db.vendor != 'postgresql':
+        return
+    with db.cursor() as cursor:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX_NAME} '
+            f'ON {Title._meta.db_table} USING gin (({search_vector()}))'
+        )
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+class TitleSearchIndex:
+    """
+    Инвертированный индекс в памяти процесса: токен -> {id: частота}.
+    Используется вместо полнотекстового поиска PostgreSQL на других БД.
+    """
+    def __init__(self, rows):
+        self.postings = defaultdict(dict)
+        for title_id, name, description in rows:
+            for token in tokenize(f'{name} {description or ""}'):
+                postings = self.postings[token]
+                postings[title_id] = postings.get(title_id, 0) + 1
+
+    def search(self, query):
+        """
+        Список (id, релевантность) произведений, содержащих
+        все слова запроса, по убыванию релевантности.
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        postings = sorted(
+            (self.postings.get(token, {}) for token in tokens), key=len
+        )
+        scores = {}
+        for title_id in postings[0]:
+            if all(title_id in posting for posting in postings[1:]):
+                scores[title_id] = sum(
+                    posting[title_id] for posting in postings
+                )
+        return sorted(
+            scores.items(), key=lambda item: (-item[1], -item[0])
+        )
+
+
+def build_search_index():
+    # Индекс общий для всех запросов: строится по основной базе.
+    return TitleSearchIndex(
+        Title.objects.using('default').values_list(
+            'id', 'name', 'description'
+        ).iterator()
+    )
+
+
+search_index = GenerationCached((Title,), build_search_index)
+
+
+def get_search_index():
+    return search_index.get()
+
+
+def search_titles(queryset, query):
+    """
+    Фильтрует произведения по поисковому запросу
+    и сортирует по релевантности (поле search_rank).
+    Без PostgreSQL - не больше SEARCH_MAX_RESULTS лучших совпадений.
+    """
+    if connection.vendor == 'postgresql':
+        table = f'"{Title._meta.db_table}".'
+        vector = search_vector(table)
+        return queryset.annotate(
+            search_rank=RawSQL(f'ts_rank({vector}, {SEARCH_QUERY})', (query,))
+        ).extra(
+            where=[f'{vector} @@ {SEARCH_QUERY}'], params=[query]
+        ).order_by('-search_rank', '-id')
+    matches = get_search_index().search(query)[:SEARCH_MAX_RESULTS]
+    return queryset.filter(
+        pk__in=[title_id for title_id, _ in matches]
+    ).annotate(
+        search_rank=Case(
+            *[When(pk=title_id, then=Value(score))
+              for title_id, score in matches],
+            default=Value(0),
+            output_field=FloatField()
+        )
+    ).order_by('-search_rank', '-id')
@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .bulk import skip_when_deferred
+from .generations import bump_generation, bump_keys, generation_key
+from .models import (Category, Comment, Genre, GenreTitle, Review, Title,
+                     TitleStats, User)
+from .ratings import change_rating
+from .rollups import count_comment, count_review
+
+# Модели, для которых ведется счетчик поколений данных. У отзывов
+# и комментариев он меняется вместе с поколением их части (ниже).
+VERSIONED_MODELS = (Title, Genre, Category, GenreTitle, User)
+
+
+def after_commit(bump, *args):
+    """
+    Поколение меняется после фиксации транзакции: иначе параллельный
+    читатель мог бы закешировать старые данные под новым поколением.
+    """
+    transaction.on_commit(lambda: bump(*args))
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, **kwargs):
+    """
+    Запоминаем прежнюю оценку, чтобы при обновлении отзыва
+    изменить рейтинг на разницу.
+    """
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = Review.objects.filter(
+            pk=instance.pk
+        ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+@skip_when_deferred
+def update_rating_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    if created or previous is None:
+        change_rating(instance.title_id, instance.score, 1)
+        return
+    previous_title_id, previous_score = previous
+    if previous_title_id != instance.title_id:
+        change_rating(previous_title_id, -previous_score, -1)
+        change_rating(instance.title_id, instance.score, 1)
+    elif previous_score != instance.score:
+        change_rating(instance.title_id, instance.score - previous_score, 0)
+
+
+@receiver(post_delete, sender=Review)
+@skip_when_deferred
+def update_rating_on_delete(sender, instance, **kwargs):
+    change_rating(instance.title_id, -instance.score, -1)
+
+
+@receiver(post_save, sender=Title)
+def create_title_stats(sender, instance, created, **kwargs):
+    if created:
+        TitleStats.objects.create(title=instance)
+
+
+@receiver(post_save, sender=Review)
+@skip_when_deferred
+def update_stats_on_review_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    if not created and previous is not None:
+        if previous == (instance.title_id, instance.score):
+            return
+        count_review(*previous, instance.pub_date, sign=-1)
+    count_review(instance.title_id, instance.score, instance.pub_date)
+
+
+@receiver(post_delete, sender=Review)
+@skip_when_deferred
+def update_stats_on_review_delete(sender, instance, **kwargs):
+    count_review(
+        instance.title_id, instance.score, instance.pub_date, sign=-1
+    )
+
+
+@receiver(post_save, sender=Comment)
+@skip_when_deferred
+def update_stats_on_comment_save(sender, instance, created, **kwargs):
+    if created:
+        count_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+@skip_when_deferred
+def update_stats_on_comment_delete(sender, instance, **kwargs):
+    count_comment(instance, sign=-1)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@skip_when_deferred
+def bump_review_generations(sender, instance, **kwargs):
+    # Поколения модели и отзывов произведения - одним UPDATE.
+    keys = [
+        generation_key(Review),
+        generation_key(Review, f'title:{instance.title_id}'),
+    ]
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is not None and previous[0] != instance.title_id:
+        keys.append(generation_key(Review, f'title:{previous[0]}'))
+    after_commit(bump_keys, keys)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@skip_when_deferred
+def bump_comment_generations(sender, instance, **kwargs):
+    after_commit(bump_keys, [
+        generation_key(Comment),
+        generation_key(Comment, f'review:{instance.review_id}'),
+    ])
+
+
+@skip_when_deferred
+def bump_model_generation(sender, **kwargs):
+    after_commit(bump_generation, sender)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_model_generation, sender=model)
+    post_delete.connect(bump_model_generation, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_genre_links_generation(sender, action, **kwargs):
+    # Жанры произведения меняются через Title.genre.set() - без post_save.
+    if action.startswith('post_'):
+        after_commit(bump_generation, sender)
@@ -1,9 +1,31 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кеш процесса не откатывается вместе с транзакцией теста.
+    from django.core.cache import cache
+    cache.clear()
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create_user(
+        username='author', email='author@yamdb.fake'
+    )
+
+
+@pytest.fixture
+def title():
+    from reviews.models import Title
+    return Title.objects.create(name='Произведение', year=2000)
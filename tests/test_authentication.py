@@ -0,0 +1,127 @@
+import pytest
+from api.authentication import revoke_tokens
+from api.serializers import MyTokenObtainPairSerializer
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import User, UserRole
+
+
+def token_client(user):
+    client = APIClient()
+    token = MyTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def create_category(client, slug):
+    return client.post(
+        '/api/v1/categories/', {'name': 'Фильм', 'slug': slug}
+    ).status_code
+
+
+@pytest.mark.django_db
+class TestTokenRevocation:
+
+    @pytest.fixture
+    def admin(self, django_user_model):
+        return django_user_model.objects.create_user(
+            username='admin', email='admin@yamdb.fake', role=UserRole.ADMIN
+        )
+
+    def test_demotion(self, admin):
+        client = token_client(admin)
+        assert create_category(client, 'film') == 201
+        admin.role = UserRole.USER
+        admin.save()
+        assert create_category(client, 'book') == 401
+        # Версия токенов хранится в БД, а не только в кеше.
+        cache.clear()
+        assert create_category(client, 'book') == 401
+
+    def test_demotion_by_update(self, admin, django_user_model):
+        client = token_client(admin)
+        django_user_model.objects.filter(pk=admin.pk).update(
+            role=UserRole.USER
+        )
+        # update() идет мимо сигналов: токены отзываются явно.
+        revoke_tokens(admin.pk)
+        assert create_category(client, 'film') == 401
+
+    def test_deletion(self, admin):
+        client = token_client(admin)
+        admin.delete()
+        assert create_category(client, 'film') == 401
+
+    def test_deactivation(self, admin):
+        client = token_client(admin)
+        admin.is_active = False
+        admin.save()
+        assert create_category(client, 'film') == 401
+
+    def test_reader_deactivation(self, author, title):
+        client = token_client(author)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        assert client.get(url).status_code == 200
+        author.is_active = False
+        author.save()
+        assert client.get(url).status_code == 401
+
+    def test_reader_deactivation_by_update(
+            self, author, title, django_user_model):
+        client = token_client(author)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        assert client.get(url).status_code == 200
+        django_user_model.objects.filter(pk=author.pk).update(
+            is_active=False
+        )
+        revoke_tokens(author.pk)
+        assert client.get(url).status_code == 401
+
+    def test_reader_deletion(self, author, title):
+        client = token_client(author)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        assert client.get(url).status_code == 200
+        author.delete()
+        assert client.get(url).status_code == 401
+
+    def test_new_token_after_change(self, admin):
+        admin.role = UserRole.USER
+        admin.save()
+        admin.role = UserRole.ADMIN
+        admin.save()
+        assert create_category(token_client(admin), 'film') == 201
+
+
+@pytest.mark.django_db
+class TestStatelessAuthentication:
+
+    def test_read_costs_no_extra_query(self, client, author, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        with CaptureQueriesContext(connection) as anonymous:
+            assert client.get(url).status_code == 200
+        cache.clear()
+        user_client = token_client(author)
+        with CaptureQueriesContext(connection) as authenticated:
+            assert user_client.get(url).status_code == 200
+        # Счетчик токенов читается вместе с версией данных.
+        assert len(authenticated) == len(anonymous)
+
+    @pytest.mark.parametrize('role', (UserRole.ADMIN, UserRole.MODERATOR))
+    def test_staff_write_skips_user_row(self, role, author, title):
+        author.role = role
+        author.save()
+        client = token_client(author)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                {'text': 'Отзыв', 'score': 5}
+            )
+        assert response.status_code == 201
+        user_table = User._meta.db_table
+        assert not [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and f'FROM "{user_table}"' in query['sql']
+        ]
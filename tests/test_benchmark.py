@@ -0,0 +1,50 @@
+from api.benchmark import Dataset, compare, percentile, uncovered_routes
+
+
+class TestBenchmark:
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values[::-1], 99) == 99
+        assert percentile([7], 99) == 7
+        assert percentile([], 50) == 0.0
+
+    def test_unique_review_authors(self):
+        dataset = Dataset.for_scale(1000)
+        authors = {}
+        for review_id in range(1, dataset.reviews + 1):
+            title_id, _ = dataset.review_title(review_id)
+            author = dataset.review_author(review_id)
+            assert 4 <= author <= dataset.users
+            authors.setdefault(title_id, []).append(author)
+        assert len(authors) == dataset.titles
+        for title_authors in authors.values():
+            assert len(title_authors) == len(set(title_authors))
+
+    def test_compare(self):
+        base = {'status': 200, 'queries': 3, 'p50': 10.0, 'p95': 20.0}
+        assert compare({'titles': base}, {
+            'titles': dict(base, p50=19.0, p95=34.0), 'new': base
+        }, compare_latency=True) == []
+        regressions = compare({'titles': base}, {
+            'titles': dict(base, status=500, queries=4, p95=40.0)
+        }, compare_latency=True)
+        assert len(regressions) == 3
+
+    def test_latency_is_opt_in(self):
+        base = {'status': 200, 'queries': 3, 'p50': 10.0, 'p95': 20.0}
+        results = {'titles': dict(base, p50=100.0, p95=200.0)}
+        assert compare({'titles': base}, results) == []
+        assert len(compare({'titles': base}, results,
+                           compare_latency=True)) == 2
+
+    def test_noise_floor(self):
+        base = {'status': 200, 'queries': 3, 'p50': 0.5, 'p95': 1.0}
+        assert compare({'titles': base}, {
+            'titles': dict(base, p50=5.0, p95=6.0)
+        }, compare_latency=True) == []
+
+    def test_every_route_has_a_case(self):
+        assert uncovered_routes() == []
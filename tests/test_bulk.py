@@ -0,0 +1,70 @@
+import pytest
+from api.serializers import BULK_MAX_ITEMS
+from reviews.bulk import resolve_title
+from reviews.models import Category, Genre, Title
+
+
+class TestResolveTitle:
+
+    categories = {'film': Category(pk=1, slug='film')}
+    genres = {'drama': Genre(pk=1, slug='drama')}
+
+    def test_new_title(self):
+        title, genres, errors = resolve_title(
+            {'name': 'A', 'year': 2000, 'category': 'film',
+             'genre': ['drama']},
+            {}, self.categories, self.genres
+        )
+        assert errors == {}
+        assert title.pk is None
+        assert title.category_id == 1
+        assert genres == [self.genres['drama']]
+
+    def test_update_keeps_missing_fields(self):
+        existing = {5: Title(pk=5, name='Old', year=1999)}
+        title, genres, errors = resolve_title(
+            {'id': 5, 'name': 'New'}, existing, self.categories, self.genres
+        )
+        assert (title.name, title.year, genres, errors) == (
+            'New', 1999, None, {}
+        )
+
+    def test_unknown_references(self):
+        _, _, errors = resolve_title(
+            {'name': 'A', 'year': 2000, 'category': 'book',
+             'genre': ['drama', 'horror']},
+            {}, self.categories, self.genres
+        )
+        assert set(errors) == {'category', 'genre'}
+        _, _, errors = resolve_title(
+            {'id': 7}, {}, self.categories, self.genres
+        )
+        assert set(errors) == {'id'}
+
+
+@pytest.mark.django_db
+class TestTitleIds:
+
+    @pytest.fixture
+    def titles(self):
+        return [
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+            for number in range(7)
+        ]
+
+    def test_ids_are_returned_without_pages(self, client, titles):
+        ids = ','.join(str(title.pk) for title in titles)
+        response = client.get(f'/api/v1/titles/?ids={ids}')
+        assert response.status_code == 200
+        assert len(response.json()) == 7
+
+    def test_empty_ids_are_paginated(self, client, titles):
+        response = client.get('/api/v1/titles/?ids=')
+        assert response.status_code == 200
+        assert response.json()['count'] == 7
+        assert len(response.json()['results']) == 5
+
+    def test_too_many_ids(self, client, titles):
+        ids = ','.join(map(str, range(1, BULK_MAX_ITEMS + 2)))
+        response = client.get(f'/api/v1/titles/?ids={ids}')
+        assert response.status_code == 400
@@ -0,0 +1,26 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from reviews.management.commands.exportdata import export_attnames
+from reviews.models import OutboxEmail, User
+
+
+class TestExportData:
+
+    def test_sensitive_fields_are_hidden(self):
+        assert 'password' not in export_attnames(User)
+        assert 'email' not in export_attnames(User)
+        assert 'body' not in export_attnames(OutboxEmail)
+        assert 'password' in export_attnames(User, include_sensitive=True)
+
+    @pytest.mark.django_db
+    def test_export_users(self, tmp_path, author):
+        author.set_password('secret-password')
+        author.save()
+        call_command('exportdata', 'User', '--output-dir', str(tmp_path),
+                     stdout=io.StringIO())
+        exported = (tmp_path / 'user.csv').read_text(encoding='utf-8')
+        assert 'author' in exported
+        assert author.password not in exported
+        assert 'author@yamdb.fake' not in exported
@@ -0,0 +1,80 @@
+import pytest
+from api.filters import filter_facets
+from reviews.facets import (MATCH_ALL, MATCH_ANY, BitmapIds, TitleFacetIndex,
+                            get_facet_index)
+from reviews.models import Category, Genre, Title
+
+
+class TestTitleFacetIndex:
+
+    index = TitleFacetIndex(
+        [(1, 2000, 'film'), (2, 2001, 'book'), (3, 2000, None),
+         (10, 2000, 'film')],
+        [(1, 'drama'), (2, 'drama'), (2, 'comedy'), (10, 'comedy')]
+    )
+
+    def test_match(self):
+        assert list(BitmapIds(self.index.match(year=2000))) == [10, 3, 1]
+        assert list(BitmapIds(self.index.match(
+            genres=['drama', 'comedy']))) == [10, 2, 1]
+        assert list(BitmapIds(self.index.match(
+            genres=['drama', 'comedy'], genre_match=MATCH_ALL))) == [2]
+        assert list(BitmapIds(self.index.match(
+            categories=['film', 'book'], genres=['comedy']))) == [10, 2]
+        assert list(BitmapIds(self.index.match(genres=['horror']))) == []
+
+    def test_bitmap_ids_slicing(self):
+        ids = BitmapIds(self.index.all)
+        assert len(ids) == 4
+        assert ids[1:3] == [3, 2]
+        assert ids[3] == 1
+        assert ids[3:10] == [1]
+
+
+@pytest.mark.django_db
+class TestFacetFilters:
+
+    FACETS = (
+        {'year': 2000}, {'genres': ['drama', 'comedy']},
+        {'genres': ['drama', 'comedy'], 'genre_match': MATCH_ALL},
+        {'categories': ['film', 'book'], 'genres': ['comedy']},
+        {'genres': ['horror']},
+    )
+
+    @pytest.fixture
+    def titles(self):
+        film = Category.objects.create(name='Фильм', slug='film')
+        book = Category.objects.create(name='Книга', slug='book')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        for year, category, genres in ((2000, film, [drama]),
+                                       (2001, book, [drama, comedy]),
+                                       (2000, None, []),
+                                       (2000, film, [comedy])):
+            title = Title.objects.create(
+                name='Произведение', year=year, category=category
+            )
+            title.genre.set(genres)
+
+    def test_sql_matches_index(self, settings, titles):
+        # Поколения меняются после фиксации, а тест идет в транзакции.
+        settings.INDEX_TTL = 0
+        index = get_facet_index()
+        for facets in self.FACETS:
+            facets = dict(
+                {'genres': [], 'categories': [], 'year': None,
+                 'genre_match': MATCH_ANY}, **facets
+            )
+            queryset = filter_facets(Title.objects.order_by('-id'), **facets)
+            assert list(queryset.values_list('id', flat=True)) == list(
+                BitmapIds(index.match(**facets))
+            ), facets
+
+    def test_facets_with_name_filter(self, client, titles):
+        response = client.get(
+            '/api/v1/titles/?genre=drama,comedy&genre_match=all&name=изв'
+        )
+        assert response.status_code == 200
+        assert [title['year'] for title in response.json()['results']] == [
+            2001
+        ]
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection
+from reviews.generations import (GenerationCached, bump_generation,
+                                 bump_scoped_generation, get_generation,
+                                 get_scoped_generation, invalidate_scopes)
+from reviews.models import Review
+
+
+@pytest.mark.django_db
+class TestGenerations:
+
+    def test_bump_generation(self):
+        generation = get_generation(Review)
+        assert get_generation(Review) == generation
+        bump_generation(Review)
+        assert get_generation(Review) != generation
+
+    def test_scoped_generation(self):
+        first = get_scoped_generation(Review, 'title:1')
+        second = get_scoped_generation(Review, 'title:2')
+        bump_scoped_generation(Review, 'title:1')
+        assert get_scoped_generation(Review, 'title:1') != first
+        assert get_scoped_generation(Review, 'title:2') == second
+        invalidate_scopes(Review)
+        assert get_scoped_generation(Review, 'title:2') != second
+
+    def test_generation_cached_expires(self, settings):
+        builds = []
+        cached = GenerationCached((Review,), lambda: builds.append(1))
+        settings.INDEX_TTL = 60
+        cached.get()
+        cached.get()
+        assert len(builds) == 1
+        bump_generation(Review)
+        cached.get()
+        assert len(builds) == 2
+        # Запись без сигнала (другой процесс, update()) видна после TTL.
+        settings.INDEX_TTL = 0
+        cached.get()
+        assert len(builds) == 3
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    connection.vendor == 'sqlite', reason='SQLite не пишет параллельно'
+)
+def test_concurrent_bumps_are_not_lost():
+    bump_generation(Review)
+    generation = get_generation(Review)
+
+    def bump(_):
+        try:
+            for _ in range(10):
+                bump_generation(Review)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(bump, range(8)))
+    assert get_generation(Review) == generation + 80
@@ -0,0 +1,58 @@
+from reviews.generator import (generate, id_chunks, make_plan, review_chunks,
+                               review_date, zipf_counts, zipf_rank)
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+def plan(reviews=2000, comments=500):
+    volumes = {User: 50, Category: 3, Genre: 5, Title: 40,
+               Review: reviews, Comment: comments}
+    return make_plan(7, dict.fromkeys(volumes, 1), volumes)
+
+
+class TestGenerator:
+
+    def test_zipf_counts(self):
+        counts = zipf_counts(1000, 100, 1.1, 60)
+        assert sum(counts) == 1000
+        assert max(counts) == 60
+        assert counts == sorted(counts, reverse=True)
+        assert zipf_counts(10, 5, 0, 10) == [2] * 5
+
+    def test_zipf_rank(self):
+        ranks = [zipf_rank(u / 1000, 100, 1.0) for u in range(1000)]
+        assert min(ranks) == 1 and max(ranks) <= 100
+        assert ranks.count(1) > ranks.count(50)
+        assert zipf_rank(0.5, 100, 0) == 50
+
+    def test_unique_review_authors(self):
+        generator_plan = plan()
+        authors = {}
+        for index, chunk in enumerate(review_chunks(
+                generator_plan, 40, 2000, 1.1, 300)):
+            [(model, rows)] = generate(generator_plan, 'reviews', index, chunk)
+            assert model is Review
+            for row in rows:
+                authors.setdefault(row['title_id'], []).append(
+                    row['author_id']
+                )
+        assert sum(map(len, authors.values())) == 2000
+        for title_authors in authors.values():
+            assert len(title_authors) == len(set(title_authors))
+
+    def test_chunks_are_deterministic(self):
+        generator_plan = plan()
+        chunks = id_chunks(1, 500, 120)
+        assert chunks[-1] == (481, 501)
+        first = [generate(generator_plan, 'comments', index, *chunk)
+                 for index, chunk in enumerate(chunks)]
+        # Части не зависят друг от друга: порядок обработки не важен.
+        second = [generate(generator_plan, 'comments', index, *chunk)
+                  for index, chunk in reversed(list(enumerate(chunks)))]
+        assert first == second[::-1]
+
+    def test_comments_after_reviews(self):
+        generator_plan = plan()
+        [(_, rows)] = generate(generator_plan, 'comments', 0, 1, 501)
+        for row in rows:
+            published = review_date(generator_plan, row['review_id'])
+            assert published <= row['pub_date'] <= generator_plan.end
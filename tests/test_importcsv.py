@@ -0,0 +1,118 @@
+import io
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from reviews.management.commands._private import copy_insert, copy_line
+from reviews.models import Category, Review, Title, TitleScoreCount, TitleStats
+
+
+class TestCopyInsert:
+
+    def test_copy_line(self):
+        assert copy_line([1, None, '', 'a"b', 'c,\nd']) == (
+            '"1",,"","a""b","c,\nd"\n'
+        )
+
+    @pytest.mark.django_db
+    def test_null_foreign_key(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('COPY есть только в PostgreSQL')
+        # rating_sum и rating_count в файле нет: их заполнит copy_insert.
+        copy_insert(Title, [
+            {'id': 1, 'name': 'Без категории', 'year': 2000,
+             'category_id': None, 'description': ''},
+            {'id': 2, 'name': 'С "кавычками"', 'year': 2001,
+             'category_id': None, 'description': 'Строка\nвторая'},
+        ])
+        assert list(Title.objects.order_by('id').values_list(
+            'name', 'category_id', 'description'
+        )) == [
+            ('Без категории', None, ''),
+            ('С "кавычками"', None, 'Строка\nвторая'),
+        ]
+
+
+@pytest.mark.django_db
+class TestCopyImport:
+
+    @pytest.fixture(autouse=True)
+    def postgresql_only(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('COPY есть только в PostgreSQL')
+
+    def test_missing_columns_get_defaults(self, tmp_path, author):
+        import_csv(tmp_path, 'Title', 'id,name,year\n5,Новое,2000\n',
+                   '--copy')
+        assert Title.objects.values_list(
+            'description', 'rating_sum', 'rating_count'
+        ).get(pk=5) == ('', 0, 0)
+        import_csv(
+            tmp_path, 'Review',
+            'id,title,text,author,score\n1,5,Отзыв,author,7\n',
+            '--copy'
+        )
+        assert Review.objects.get(pk=1).pub_date is not None
+
+
+def import_csv(tmp_path, model, text, *args):
+    path = tmp_path / f'{model}.csv'
+    path.write_text(text, encoding='utf-8')
+    out = io.StringIO()
+    call_command('importcsv', str(path), model, *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+class TestUpsert:
+
+    def test_counts(self, tmp_path):
+        import_csv(tmp_path, 'Category', 'name,slug\nA,a\nB,b\nC,c\n')
+        out = import_csv(
+            tmp_path, 'Category', 'name,slug\nAA,a\nB,b\nD,d\n',
+            '--upsert', '--delete-missing', '--dry-run'
+        )
+        assert 'inserted 1, updated 1, unchanged 1, deleted 1' in out
+        assert sorted(Category.objects.values_list('slug', flat=True)) == [
+            'a', 'b', 'c'
+        ]
+        out = import_csv(
+            tmp_path, 'Category', 'name,slug\nAA,a\nB,b\nD,d\n',
+            '--upsert', '--delete-missing'
+        )
+        assert 'inserted 1, updated 1, unchanged 1, deleted 1' in out
+        assert sorted(Category.objects.values_list('slug', 'name')) == [
+            ('a', 'AA'), ('b', 'B'), ('d', 'D')
+        ]
+
+    def test_refreshes_only_touched_titles(self, tmp_path, title, author):
+        other = Title.objects.create(name='Другое', year=2001)
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=4
+        )
+        Review.objects.create(title=other, author=author, text='Да', score=6)
+        # Расхождение, которое исправил бы только полный пересчет.
+        Title.objects.filter(pk=other.pk).update(rating_sum=100)
+        import_csv(
+            tmp_path, 'Review',
+            f'id,title,text,author,score\n'
+            f'{review.pk},{title.pk},Отзыв,author,9\n',
+            '--upsert'
+        )
+        assert Title.objects.values_list('rating_sum', 'rating_count').get(
+            pk=title.pk
+        ) == (9, 1)
+        assert TitleScoreCount.objects.filter(title=title).values_list(
+            'score', 'count'
+        ).get() == (9, 1)
+        assert Title.objects.get(pk=other.pk).rating_sum == 100
+
+    def test_new_titles_get_stats(self, tmp_path):
+        import_csv(tmp_path, 'Title', 'id,name,year\n5,Новое,2000\n',
+                   '--upsert')
+        assert TitleStats.objects.filter(title_id=5).exists()
+
+    def test_copy_with_upsert_is_rejected(self, tmp_path):
+        with pytest.raises(CommandError):
+            import_csv(tmp_path, 'Category', 'name,slug\nA,a\n',
+                       '--upsert', '--copy')
@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+import pytest
+from django.core.cache import cache
+from reviews import leaderboards
+from reviews.facets import make_bitmap
+from reviews.leaderboards import (TOP, Leaderboard, bayesian_scores,
+                                  get_leaderboard, rank, refresh_leaderboard,
+                                  trending_scores)
+
+
+class TestLeaderboards:
+
+    def test_bayesian_average_damps_few_reviews(self):
+        scores = bayesian_scores(
+            [(1, 10, 1), (2, 80, 10), (3, 0, 0), (4, 20, 10)],
+            prior_weight=5
+        )
+        assert 3 not in scores
+        assert [title_id for _, title_id in rank(scores)] == [2, 1, 4]
+
+    def test_trending_decays_with_age(self):
+        today = date(2022, 3, 10)
+        scores = trending_scores(
+            [(1, date(2022, 3, 10), 2), (2, date(2022, 3, 7), 4)],
+            today, half_life=3
+        )
+        assert scores[1] == 2
+        assert scores[2] == 2
+
+    def test_top_filters_by_bitmap(self):
+        board = Leaderboard(rank({1: 9.0, 2: 8.0, 3: 7.0, 4: 6.0}))
+        assert [pk for pk, _ in board.top(2)] == [1, 2]
+        bitmap = make_bitmap([2, 4], 4)
+        assert board.top(10, bitmap) == [(2, 8.0), (4, 6.0)]
+
+    def test_top_with_sparse_bitmap(self):
+        board = Leaderboard(rank({10 ** 5: 9.0, 7: 8.0, 3: 7.0}))
+        bitmap = make_bitmap([3, 10 ** 5], 10 ** 5)
+        assert board.top(10, bitmap) == [(10 ** 5, 9.0), (3, 7.0)]
+        assert board.top(10, 0) == []
+
+
+class TestGetLeaderboard:
+
+    @pytest.fixture
+    def builds(self, monkeypatch, settings):
+        settings.LEADERBOARD_TTL = 60
+        builds = []
+        self.release = threading.Event()
+
+        def build():
+            builds.append(1)
+            if len(builds) > 1:
+                # Пересчет идет, пока остальные запросы не получат ответ.
+                self.release.wait(5)
+            return Leaderboard(rank({len(builds): 1.0}))
+
+        monkeypatch.setitem(leaderboards.BUILDERS, TOP, build)
+        monkeypatch.setattr(leaderboards, '_boards', {})
+        return builds
+
+    def make_stale(self):
+        board = refresh_leaderboard(TOP)
+        board.built -= 60
+        cache.set(f'leaderboard:{TOP}', board, None)
+        cache.set(f'leaderboard:{TOP}:built', board.built, None)
+        return board
+
+    def test_fresh_board_is_not_rebuilt(self, builds):
+        board = get_leaderboard(TOP)
+        assert get_leaderboard(TOP) is board
+        assert len(builds) == 1
+
+    def test_stale_board_is_served_while_rebuilt(self, builds):
+        stale = self.make_stale()
+        boards = []
+        with ThreadPoolExecutor(8) as pool:
+            futures = [pool.submit(get_leaderboard, TOP) for _ in range(8)]
+            for future in as_completed(futures):
+                boards.append(future.result())
+                if len(boards) == 7:
+                    self.release.set()
+        assert len(builds) == 2
+        assert boards[:7] == [stale] * 7
+        assert get_leaderboard(TOP).ids.tolist() == [2]
+        assert cache.get(f'leaderboard:{TOP}:lock') is None
@@ -0,0 +1,43 @@
+import pytest
+from reviews.models import OutboxEmail
+from reviews.outbox import (backoff_delay, build_message, defer, enqueue_email,
+                            send_pending)
+
+
+class TestOutbox:
+
+    def test_backoff_delay(self):
+        assert [backoff_delay(n, base=30) for n in (1, 2, 3)] == [30, 60, 120]
+        assert backoff_delay(20, base=30, cap=3600) == 3600
+
+    def test_build_message(self):
+        email = OutboxEmail(
+            subject='Код', body='123', from_email='',
+            recipients='a@a.ru,b@b.ru'
+        )
+        message = build_message(email)
+        assert message.to == ['a@a.ru', 'b@b.ru']
+        assert message.subject == 'Код'
+
+
+@pytest.mark.django_db
+class TestSendPending:
+
+    def test_sent_body_is_redacted(self, mailoutbox):
+        email = enqueue_email('Код', 'Код подтверждения: 123', ['a@a.ru'])
+        assert send_pending()['sent'] == 1
+        assert mailoutbox[0].body == 'Код подтверждения: 123'
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        assert email.body == ''
+
+    def test_failed_body_is_redacted(self, settings):
+        settings.OUTBOX_MAX_ATTEMPTS = 2
+        email = enqueue_email('Код', 'Код подтверждения: 123', ['a@a.ru'])
+        defer(email, OSError('timeout'))
+        email.refresh_from_db()
+        assert email.body == 'Код подтверждения: 123'
+        defer(email, OSError('timeout'))
+        email.refresh_from_db()
+        assert email.attempts == 2
+        assert email.body == ''
@@ -0,0 +1,43 @@
+import datetime as dt
+
+import pytest
+from api.pagination import (clean_position, decode_cursor, encode_cursor,
+                            keyset_filter)
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+
+
+class TestKeysetPagination:
+
+    def test_cursor_roundtrip(self):
+        pub_date = dt.datetime(2021, 9, 1, 12, 30, tzinfo=dt.timezone.utc)
+        cursor = encode_cursor([pub_date, 42], reverse=True)
+        assert decode_cursor(cursor) == ([pub_date.isoformat(), 42], True)
+        assert decode_cursor('') == (None, False)
+        with pytest.raises(NotFound):
+            decode_cursor('not-a-cursor')
+
+    def test_keyset_filter(self):
+        assert keyset_filter(('-pub_date', '-id'), ['d', 7]) == (
+            Q(pub_date__lt='d') | Q(pub_date='d') & Q(id__lt=7)
+        )
+        assert keyset_filter(('-id',), [7], reverse=True) == Q(id__gt=7)
+
+    def test_clean_position(self):
+        from reviews.models import Review
+        ordering = ('-pub_date', '-id')
+        assert clean_position(
+            Review, ordering, ['2021-09-01T12:30:00+00:00', '7']
+        ) == [dt.datetime(2021, 9, 1, 12, 30, tzinfo=dt.timezone.utc), 7]
+        for position in (['not-a-date', 7], ['2021-09-01', 'x'],
+                         [None, 7], [[1], 7], ['2021-09-01']):
+            with pytest.raises(NotFound):
+                clean_position(Review, ordering, position)
+
+    @pytest.mark.django_db
+    def test_crafted_cursor_is_not_found(self, client, title):
+        cursor = encode_cursor(['not-a-date', 1])
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/?cursor={cursor}'
+        )
+        assert response.status_code == 404
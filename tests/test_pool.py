@@ -0,0 +1,128 @@
+import os
+
+import pytest
+from django.db import connection
+from django.db.utils import load_backend
+
+from api_yamdb.db.backends.pooled import base
+from api_yamdb.db.backends.pooled.base import _pools, pool_stats
+from api_yamdb.db.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def make_pool(**kwargs):
+    clock = Clock()
+    pool = ConnectionPool(
+        FakeConnection,
+        check=lambda connection: connection.healthy,
+        close=lambda connection: setattr(connection, 'closed', True),
+        clock=clock, **kwargs
+    )
+    return pool, clock
+
+
+class TestConnectionPool:
+
+    def test_reuses_connection(self):
+        pool, _ = make_pool(min_size=1, max_size=2)
+        pool.fill()
+        first = pool.checkout()
+        pool.checkin(first)
+        assert pool.checkout() is first
+        assert pool.stats()['connects'] == 1
+        assert pool.stats()['checkouts'] == 2
+
+    def test_unhealthy_connection_is_replaced(self):
+        pool, _ = make_pool()
+        connection = pool.checkout()
+        pool.checkin(connection)
+        connection.healthy = False
+        assert pool.checkout() is not connection
+        assert connection.closed
+        assert pool.stats()['reconnects'] == 1
+        assert pool.stats()['size'] == 1
+
+    def test_lifetime_and_idle_limits(self):
+        pool, clock = make_pool(min_size=1, max_idle=10, max_lifetime=100)
+        first, second = pool.checkout(), pool.checkout()
+        pool.checkin(first)
+        clock.now = 20
+        pool.checkin(second)
+        assert first.closed
+        assert pool.stats()['size'] == 1
+        clock.now = 200
+        assert pool.checkout() is not second
+        assert second.closed
+
+    def test_timeout_when_exhausted(self):
+        pool, _ = make_pool(max_size=1, timeout=0)
+        pool.checkout()
+        with pytest.raises(PoolTimeoutError):
+            pool.checkout()
+        assert pool.stats()['waits'] == 1
+        assert pool.stats()['in_use'] == 1
+
+
+def pooled_database():
+    settings_dict = dict(
+        connection.settings_dict, ENGINE='api_yamdb.db.backends.pooled',
+        POOL={'min_size': 1, 'max_size': 2}
+    )
+    return load_backend(settings_dict['ENGINE']).DatabaseWrapper(
+        settings_dict, alias='pooled-test'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='Пул - только для PostgreSQL'
+)
+def test_pooled_backend_reuses_connection():
+    database = pooled_database()
+    try:
+        for _ in range(2):
+            with database.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                assert cursor.fetchone() == (1,)
+            assert database.get_autocommit()
+            database.close()
+        stats = pool_stats()['pooled-test']
+        assert stats['connects'] == 1
+        assert stats.get('reconnects', 0) == 0
+    finally:
+        database.get_pool(None).close_all()
+        _pools.pop(('pooled-test', os.getpid()))
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='Пул - только для PostgreSQL'
+)
+def test_close_after_fork_skips_pool(monkeypatch):
+    database = pooled_database()
+    try:
+        database.ensure_connection()
+        raw = database.connection
+        monkeypatch.setattr(base.os, 'getpid', lambda: -1)
+        database.close()
+        assert raw.closed
+        assert ('pooled-test', -1) not in _pools
+    finally:
+        monkeypatch.undo()
+        database.get_pool(None).close_all()
+        _pools.pop(('pooled-test', os.getpid()))
@@ -0,0 +1,34 @@
+import pytest
+from api.queries import QueryInspector, RepeatedQueriesError, normalize_sql
+
+
+def execute(sql, params, many, context):
+    return sql
+
+
+class TestQueryInspector:
+
+    def test_normalize_sql(self):
+        assert normalize_sql(
+            'SELECT * FROM "reviews_genre" WHERE "id" IN (%s, %s,  %s)'
+        ) == normalize_sql(
+            "SELECT * FROM \"reviews_genre\" WHERE \"id\" IN (%s)"
+        )
+        assert normalize_sql(
+            "SELECT 1 FROM t WHERE name = 'x' LIMIT 21"
+        ) == 'SELECT ? FROM t WHERE name = ? LIMIT ?'
+
+    def test_repeated_queries(self):
+        inspector = QueryInspector(threshold=3)
+        for title_id in range(5):
+            inspector(
+                execute,
+                'SELECT * FROM "reviews_category" WHERE "id" = %s',
+                (title_id,), False, {}
+            )
+        inspector(execute, 'SELECT COUNT(*) FROM "reviews_title"', (),
+                  False, {})
+        assert inspector.total == 6
+        assert list(inspector.repeated.values()) == [5]
+        with pytest.raises(RepeatedQueriesError):
+            inspector.check()
@@ -0,0 +1,95 @@
+import pytest
+from reviews.models import (Comment, Review, Title, TitleActivity,
+                            TitleScoreCount, TitleStats, User)
+from reviews.ratings import recalculate_ratings
+from reviews.rollups import rebuild_stats
+
+
+def rating(title):
+    title.refresh_from_db()
+    return title.rating_sum, title.rating_count
+
+
+def stats(title):
+    counts = TitleStats.objects.values_list(
+        'review_count', 'comment_count'
+    ).get(title=title)
+    scores = dict(TitleScoreCount.objects.filter(
+        title=title, count__gt=0
+    ).values_list('score', 'count'))
+    activity = sorted(TitleActivity.objects.filter(title=title).values_list(
+        'day', 'review_count', 'comment_count'
+    ))
+    return counts, scores, activity
+
+
+@pytest.mark.django_db
+class TestRatingSignals:
+
+    def test_create_update_delete(self, title, author):
+        other = User.objects.create_user(username='other')
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=8
+        )
+        assert rating(title) == (8, 1)
+        assert title.rating == 8
+        review.score = 4
+        review.save()
+        assert rating(title) == (4, 1)
+        Review.objects.create(title=title, author=other, text='Еще', score=10)
+        assert rating(title) == (14, 2)
+        review.delete()
+        assert rating(title) == (10, 1)
+
+    def test_move_review_to_another_title(self, title, author):
+        second = Title.objects.create(name='Второе', year=2001)
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=6
+        )
+        review.title = second
+        review.save()
+        assert rating(title) == (0, 0)
+        assert rating(second) == (6, 1)
+
+    def test_recalculate_matches_signals(self, title, author):
+        Review.objects.create(title=title, author=author, text='Отзыв',
+                              score=7)
+        expected = rating(title)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        recalculate_ratings()
+        assert rating(title) == expected
+
+
+@pytest.mark.django_db
+class TestStatsSignals:
+
+    def test_counters_follow_writes(self, title, author):
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=8
+        )
+        comment = Comment.objects.create(
+            review=review, author=author, text='Комментарий'
+        )
+        (counts, scores, activity) = stats(title)
+        assert counts == (1, 1)
+        assert scores == {8: 1}
+        assert [row[1:] for row in activity] == [(1, 1)]
+        review.score = 3
+        review.save()
+        assert stats(title)[1] == {3: 1}
+        comment.delete()
+        assert stats(title)[0] == (1, 0)
+        review.delete()
+        assert stats(title)[:2] == ((0, 0), {})
+
+    def test_rebuild_matches_signals(self, title, author):
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=9
+        )
+        Comment.objects.create(review=review, author=author, text='Да')
+        expected = stats(title)
+        TitleStats.objects.all().delete()
+        TitleScoreCount.objects.all().delete()
+        TitleActivity.objects.all().delete()
+        rebuild_stats()
+        assert stats(title) == expected
@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.generations import bump_scoped_generation, get_generation
+from reviews.models import Category, Generation, Review, UserRole
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_key_depends_on_negotiated_format(self, client, settings, title):
+        settings.API_RESPONSE_CACHE_TIMEOUT = 300
+        assert client.get('/api/v1/titles/').status_code == 200
+        # Поток NDJSON - только персоналу: кешированная страница JSON
+        # не должна отдаваться вместо него.
+        response = client.get(
+            '/api/v1/titles/', HTTP_ACCEPT='application/x-ndjson'
+        )
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_etag_depends_on_negotiated_format(django_user_model, title):
+    client = APIClient()
+    client.force_authenticate(django_user_model.objects.create_user(
+        username='admin', email='admin@yamdb.fake',
+        role=UserRole.ADMIN
+    ))
+    etag = client.get('/api/v1/titles/')['ETag']
+    assert client.get(
+        '/api/v1/titles/', HTTP_IF_NONE_MATCH=etag
+    ).status_code == 304
+    # ETag страницы JSON не подтверждает копию потока NDJSON.
+    response = client.get(
+        '/api/v1/titles/', HTTP_ACCEPT='application/x-ndjson',
+        HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_etag_changes_after_commit(client):
+    etag = client.get('/api/v1/categories/')['ETag']
+    with transaction.atomic():
+        Category.objects.create(name='Фильм', slug='film')
+        # До коммита другие запросы видят старые данные и старый ETag.
+        assert client.get('/api/v1/categories/')['ETag'] == etag
+    assert client.get('/api/v1/categories/')['ETag'] != etag
+
+
+@pytest.mark.django_db(transaction=True)
+def test_generation_changes_after_commit():
+    generation = get_generation(Category)
+    with transaction.atomic():
+        Category.objects.create(name='Фильм', slug='film')
+        assert get_generation(Category) == generation
+    assert get_generation(Category) != generation
+
+
+@pytest.mark.django_db
+def test_versions_are_read_once(client, settings, title, author):
+    settings.API_RESPONSE_CACHE_TIMEOUT = 300
+    Review.objects.create(title=title, author=author, text='Отзыв', score=5)
+    url = f'/api/v1/titles/{title.pk}/reviews/'
+    with CaptureQueriesContext(connection) as miss:
+        assert client.get(url).status_code == 200
+    with CaptureQueriesContext(connection) as hit:
+        assert client.get(url).status_code == 200
+    generation_reads = [
+        query for query in miss.captured_queries
+        if Generation._meta.db_table in query['sql']
+    ]
+    assert len(generation_reads) == 1
+    assert len(miss) <= 4
+    # Из кеша: только чтение поколений.
+    assert len(hit) == 1
+
+
+@pytest.mark.django_db
+def test_not_modified_costs_one_query(client, title, author):
+    url = f'/api/v1/titles/{title.pk}/reviews/'
+    etag = client.get(url)['ETag']
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert len(context) == 1
+    Review.objects.create(title=title, author=author, text='Отзыв', score=5)
+    # Поколения меняются после коммита; в тесте - вручную.
+    bump_scoped_generation(Review, f'title:{title.pk}')
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
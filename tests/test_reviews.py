@@ -0,0 +1,81 @@
+import pytest
+from api.serializers import MyTokenObtainPairSerializer, ReviewSerializer
+from django.db import IntegrityError
+from rest_framework.test import APIClient
+from reviews.generations import bump_keys, generation_key
+from reviews.models import Review, Title, User
+
+
+@pytest.mark.django_db
+class TestReviewCreate:
+
+    @pytest.fixture
+    def client(self, author):
+        client = APIClient()
+        client.force_authenticate(author)
+        return client
+
+    def test_duplicate_review(self, client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+        assert client.post(url, data).status_code == 201
+        response = client.post(url, data)
+        assert response.status_code == 400
+        assert response.json()['non_field_errors'] == [
+            'Возможно оставить только один отзыв'
+        ]
+        assert Review.objects.count() == 1
+
+    def test_other_integrity_error_is_not_hidden(
+            self, client, title, monkeypatch):
+        def save(self, **kwargs):
+            raise IntegrityError('null value in column "text"')
+
+        monkeypatch.setattr(ReviewSerializer, 'save', save)
+        with pytest.raises(IntegrityError):
+            client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                {'text': 'Отзыв', 'score': 7}
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReviewCreateQueries:
+    """
+    Запросы POST отзыва вместе с изменением поколений после фиксации:
+    версия токена, две корзины лимитов, произведение, INSERT,
+    рейтинг и три счетчика, поколения - одним UPDATE. SQLite
+    вдобавок пишет в список запросов BEGIN, PostgreSQL - нет.
+    """
+
+    @pytest.fixture
+    def client(self, author, title):
+        # Счетчики поколений уже есть, как на работающем сервере.
+        bump_keys([
+            generation_key(User, f'tokens:{author.pk}'),
+            generation_key(Review),
+            generation_key(Review, f'title:{title.pk}'),
+        ])
+        client = APIClient()
+        token = MyTokenObtainPairSerializer.get_token(author).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def test_create(self, client, title, django_assert_max_num_queries):
+        with django_assert_max_num_queries(11):
+            response = client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                {'text': 'Отзыв', 'score': 7}
+            )
+        assert response.status_code == 201
+        title = Title.objects.get(pk=title.pk)
+        assert (title.rating_sum, title.rating_count) == (7, 1)
+        assert title.stats.review_count == 1
+
+    def test_duplicate(self, client, title, django_assert_max_num_queries):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        client.post(url, {'text': 'Отзыв', 'score': 7})
+        with django_assert_max_num_queries(7):
+            response = client.post(url, {'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 400
+        assert Review.objects.count() == 1
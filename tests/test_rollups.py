@@ -0,0 +1,16 @@
+from datetime import date, datetime, timezone
+
+from reviews.rollups import activity_day, period_start
+
+
+class TestRollups:
+
+    def test_period_start(self):
+        day = date(2022, 3, 10)
+        assert period_start(day, 'day') == day
+        assert period_start(day, 'week') == date(2022, 3, 7)
+
+    def test_activity_day_uses_current_timezone(self):
+        # TIME_ZONE проекта - Europe/Moscow (UTC+3).
+        moment = datetime(2022, 3, 10, 22, 30, tzinfo=timezone.utc)
+        assert activity_day(moment) == date(2022, 3, 11)
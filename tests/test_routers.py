@@ -0,0 +1,122 @@
+import pytest
+from api.middleware import ReplicaRoutingMiddleware
+from django.core.cache.backends.db import BaseDatabaseCache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from reviews.facets import build_facet_index
+from reviews.leaderboards import BUILDERS
+from reviews.models import Review, Title
+from reviews.search import build_search_index
+
+from api_yamdb.db import routers
+from api_yamdb.db.routers import (PrimaryReplicaRouter, allow_replica_reads,
+                                  reset_replica_reads, use_primary)
+
+# Модель таблицы кеша, ее строит DatabaseCache.
+CacheEntry = BaseDatabaseCache('yamdb_cache', {}).cache_model_class
+
+
+class TestPrimaryReplicaRouter:
+
+    def test_reads_go_to_replica_only_when_allowed(self):
+        router = PrimaryReplicaRouter(replicas=('replica_1', 'replica_2'))
+        assert router.db_for_read(Review) == 'default'
+        token = allow_replica_reads('replica_1')
+        try:
+            assert router.db_for_read(Review) == 'replica_1'
+            assert router.db_for_write(Review) == 'default'
+            with use_primary():
+                assert router.db_for_read(Review) == 'default'
+        finally:
+            reset_replica_reads(token)
+        assert router.db_for_read(Review) == 'default'
+
+    def test_cache_table_is_read_from_primary(self):
+        router = PrimaryReplicaRouter(replicas=('replica_1',))
+        token = allow_replica_reads('replica_1')
+        try:
+            assert router.db_for_read(CacheEntry) == 'default'
+        finally:
+            reset_replica_reads(token)
+
+    def test_without_replicas(self):
+        router = PrimaryReplicaRouter(replicas=())
+        token = allow_replica_reads('replica_1')
+        try:
+            assert router.db_for_read(Review) == 'default'
+        finally:
+            reset_replica_reads(token)
+        assert router.allow_migrate('replica_1', 'reviews') is False
+
+
+class TestReplicaRoutingMiddleware:
+
+    @pytest.fixture
+    def choices(self, settings, monkeypatch):
+        settings.DATABASE_REPLICAS = ['replica_1', 'replica_2']
+        choices = []
+
+        def choice(replicas):
+            choices.append(replicas)
+            return replicas[-1]
+
+        monkeypatch.setattr(routers.random, 'choice', choice)
+        return choices
+
+    def reads(self, request):
+        router = PrimaryReplicaRouter()
+        reads = []
+
+        def view(request):
+            reads.extend(router.db_for_read(Review) for _ in range(3))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(view)(request)
+        return reads
+
+    def test_replica_is_chosen_once_per_request(self, choices):
+        request = RequestFactory().get('/api/v1/titles/')
+        assert self.reads(request) == ['replica_2'] * 3
+        assert len(choices) == 1
+
+    def test_writes_and_sticky_reads_use_primary(self, choices):
+        request = RequestFactory().post('/api/v1/titles/')
+        assert self.reads(request) == ['default'] * 3
+        request = RequestFactory().get(
+            '/api/v1/titles/', HTTP_X_PRIMARY_UNTIL=str(2 ** 40)
+        )
+        assert self.reads(request) == ['default'] * 3
+        assert choices == []
+
+
+@pytest.mark.django_db
+class TestReplicaReads:
+
+    @pytest.fixture
+    def replica_reads(self):
+        token = allow_replica_reads('replica_1')
+        yield
+        reset_replica_reads(token)
+
+    def test_replica_response_is_not_cached(
+            self, client, settings, title, replica_reads):
+        settings.API_RESPONSE_CACHE_TIMEOUT = 300
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'ETag' not in response
+        Title.objects.filter(pk=title.pk).update(name='Новое название')
+        with use_primary():
+            response = client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['name'] == 'Новое название'
+        assert 'ETag' in response
+
+    def test_indexes_are_built_from_primary(self, monkeypatch, title):
+        # Любое чтение через роутер ушло бы на несуществующую реплику.
+        monkeypatch.setattr(
+            PrimaryReplicaRouter, 'db_for_read',
+            lambda self, model, **hints: 'replica'
+        )
+        build_facet_index()
+        build_search_index()
+        for build in BUILDERS.values():
+            build()
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import pytest
+from reviews import search
+from reviews.models import Title
+from reviews.search import TitleSearchIndex, get_search_index
+
+
+class TestTitleSearchIndex:
+
+    def test_search_ranking(self):
+        index = TitleSearchIndex([
+            (1, 'Война и мир', 'Роман о войне'),
+            (2, 'Мир', None),
+            (3, 'Мир и мир', 'Мир'),
+        ])
+        assert index.search('МИР') == [(3, 3), (2, 1), (1, 1)]
+        assert index.search('война мир') == [(1, 2)]
+        assert index.search('нет') == []
+        assert index.search('  ') == []
+
+
+@pytest.mark.django_db
+class TestSearchIndexRefresh:
+
+    def test_update_without_signal_visible_after_ttl(self, settings, title):
+        settings.INDEX_TTL = 0
+        assert get_search_index().search('Произведение') == [(title.pk, 1)]
+        Title.objects.filter(pk=title.pk).update(name='Повесть')
+        assert get_search_index().search('Произведение') == []
+        assert get_search_index().search('повесть') == [(title.pk, 1)]
+
+
+@pytest.mark.django_db
+class TestSearchTitles:
+
+    def test_fallback_is_capped(self, settings, monkeypatch):
+        settings.INDEX_TTL = 0
+        monkeypatch.setattr(search, 'SEARCH_MAX_RESULTS', 3)
+        monkeypatch.setattr(search, 'connection', SimpleNamespace(
+            vendor='sqlite'
+        ))
+        titles = [
+            Title.objects.create(name='мир ' * count, year=2000)
+            for count in range(1, 6)
+        ]
+        found = search.search_titles(Title.objects.all(), 'мир')
+        assert [title.pk for title in found] == [
+            title.pk for title in titles[:1:-1]
+        ]
+
+    def test_search_with_cursor_is_rejected(self, client, title):
+        response = client.get('/api/v1/titles/?search=мир&cursor=')
+        assert response.status_code == 400
+        assert 'search' in response.json()
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pytest
+from api.views import ReviewViewSet, TitleViewSet
+from django.http import QueryDict
+from rest_framework.exceptions import ValidationError
+from reviews.models import Review
+
+
+def make_view(viewset, query, action='list'):
+    view = viewset()
+    view.action = action
+    view.request = SimpleNamespace(query_params=QueryDict(query))
+    return view
+
+
+class TestSparseFields:
+
+    def test_fields_and_omit(self):
+        assert make_view(TitleViewSet, 'fields=name,id').sparse_fields == [
+            'id', 'name'
+        ]
+        assert make_view(
+            TitleViewSet, 'omit=genre,description'
+        ).sparse_fields == ['id', 'name', 'year', 'rating', 'category']
+        assert make_view(TitleViewSet, '').sparse_fields is None
+        assert make_view(
+            TitleViewSet, 'fields=id', action='create'
+        ).sparse_fields is None
+
+    def test_unknown_field(self):
+        with pytest.raises(ValidationError):
+            make_view(TitleViewSet, 'fields=id,secret').sparse_fields
+
+    def test_queryset_is_pruned(self):
+        view = make_view(TitleViewSet, 'fields=id,name')
+        queryset = view.sparse_queryset(TitleViewSet.queryset)
+        assert queryset.query.deferred_loading == ({'id', 'name'}, False)
+        assert queryset.query.select_related is False
+        assert not queryset._prefetch_related_lookups
+
+        view = make_view(TitleViewSet, 'fields=genre,category')
+        queryset = view.sparse_queryset(TitleViewSet.queryset)
+        assert queryset.query.select_related == {'category': {}}
+        assert queryset._prefetch_related_lookups == ('genre',)
+
+    def test_parent_key_is_kept(self):
+        view = make_view(ReviewViewSet, 'fields=score')
+        queryset = view.sparse_queryset(Review.objects.all())
+        assert {'title', 'score'} <= queryset.query.deferred_loading[0]
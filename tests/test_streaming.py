@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from api.mixins import NDJSON, StreamingListMixin
+from rest_framework.test import APIClient
+from reviews.models import Category, Review, Title, UserRole
+
+
+def streamed(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestStreamingList:
+
+    @pytest.fixture(autouse=True)
+    def small_chunks(self, monkeypatch):
+        # Несколько пачек даже на маленьком наборе данных.
+        monkeypatch.setattr(StreamingListMixin, 'stream_chunk_size', 2)
+
+    @pytest.fixture
+    def admin_client(self, django_user_model):
+        client = APIClient()
+        client.force_authenticate(django_user_model.objects.create_user(
+            username='admin', email='admin@yamdb.fake', role=UserRole.ADMIN
+        ))
+        return client
+
+    @pytest.fixture
+    def titles(self):
+        film = Category.objects.create(name='Фильм', slug='film')
+        return [
+            Title.objects.create(
+                name=f'Произведение {number}', year=2000 + number % 2,
+                category=film if number % 2 else None
+            )
+            for number in range(5)
+        ]
+
+    def test_json_array(self, admin_client, titles):
+        response = admin_client.get('/api/v1/titles/?stream=1')
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/json'
+        items = json.loads(streamed(response))
+        # Порядок и поля - как у постраничного списка (страница - 5).
+        page = admin_client.get('/api/v1/titles/').json()
+        assert items == page['results']
+        assert [item['id'] for item in items] == [
+            title.pk for title in reversed(titles)
+        ]
+
+    def test_ndjson(self, admin_client, titles):
+        response = admin_client.get(
+            '/api/v1/titles/', HTTP_ACCEPT=NDJSON
+        )
+        assert response.status_code == 200
+        assert response['Content-Type'] == NDJSON
+        lines = streamed(response).splitlines()
+        assert len(lines) == len(titles)
+        assert {json.loads(line)['id'] for line in lines} == {
+            title.pk for title in titles
+        }
+
+    def test_filters_apply(self, admin_client, titles):
+        response = admin_client.get(
+            '/api/v1/titles/?stream=1&year=2001&category=film'
+        )
+        assert [item['id'] for item in json.loads(streamed(response))] == [
+            title.pk for title in reversed(titles) if title.year == 2001
+        ]
+
+    def test_nested_route_is_scoped(self, admin_client, titles, author):
+        for title in titles[:2]:
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        response = admin_client.get(
+            f'/api/v1/titles/{titles[0].pk}/reviews/', HTTP_ACCEPT=NDJSON
+        )
+        lines = streamed(response).splitlines()
+        assert len(lines) == 1
+
+    def test_only_staff(self, client, author, titles):
+        assert client.get('/api/v1/titles/?stream=1').status_code == 403
+        user_client = APIClient()
+        user_client.force_authenticate(author)
+        response = user_client.get(
+            f'/api/v1/titles/{titles[0].pk}/reviews/', HTTP_ACCEPT=NDJSON
+        )
+        assert response.status_code == 403
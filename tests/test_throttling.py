@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from api.throttling import (SignupUsernameThrottle, TokenBucketThrottle,
+                            take_token)
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class TestTokenBucket:
+
+    def test_burst_then_refill(self):
+        state = None
+        for _ in range(3):
+            allowed, state, wait = take_token(state, 0, 3, 60)
+            assert allowed
+        allowed, state, wait = take_token(state, 0, 3, 60)
+        assert not allowed
+        assert wait == 20
+        allowed, state, wait = take_token(state, 20, 3, 60)
+        assert allowed
+
+    def test_capacity_is_limit(self):
+        allowed, state, wait = take_token((0, 0), 10 ** 6, 3, 60)
+        assert allowed
+        assert state == (2, 10 ** 6)
+
+
+class BucketThrottle(TokenBucketThrottle):
+    rate = '3/min'
+
+    def get_cache_key(self, request, view):
+        return 'bucket'
+
+
+@pytest.mark.django_db
+class TestTokenBucketThrottle:
+
+    def test_take_and_wait(self):
+        request = SimpleNamespace(method='POST')
+        throttle = BucketThrottle()
+        throttle.timer = lambda: 1000.0
+        for _ in range(3):
+            assert throttle.allow_request(request, None)
+        assert not throttle.allow_request(request, None)
+        assert throttle.wait() == pytest.approx(20)
+        throttle.timer = lambda: 1020.0
+        assert throttle.allow_request(request, None)
+        assert not throttle.allow_request(request, None)
+
+    def test_one_statement_per_request(self):
+        request = SimpleNamespace(method='POST')
+        with CaptureQueriesContext(connection) as queries:
+            BucketThrottle().allow_request(request, None)
+        assert len(queries) == 1
+
+    def test_username_from_list_body(self):
+        throttle = SignupUsernameThrottle.__new__(SignupUsernameThrottle)
+        throttle.scope = 'signup_username'
+        request = SimpleNamespace(data=[{'username': 'user'}])
+        assert throttle.get_cache_key(request, None) is None
+        request = SimpleNamespace(data={'username': 'User'})
+        assert throttle.get_cache_key(request, None).endswith('_user')
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    connection.vendor == 'sqlite', reason='SQLite не пишет параллельно'
+)
+def test_concurrent_requests_share_tokens():
+    request = SimpleNamespace(method='POST')
+
+    def allow(_):
+        try:
+            return BucketThrottle().allow_request(request, None)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(allow, range(8)))
+    assert results.count(True) == 3
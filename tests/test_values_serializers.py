@@ -0,0 +1,87 @@
+import datetime as dt
+
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleDisplaySerializer)
+from api.values_serializers import (CommentValuesSerializer,
+                                    ReviewValuesSerializer,
+                                    TitleValuesSerializer)
+from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Category, Comment, Genre, Review, Title
+
+User = get_user_model()
+
+PUB_DATE = dt.datetime(2022, 3, 1, 21, 30, 5, 123456, tzinfo=dt.timezone.utc)
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+def make_title(pk, category=None, genres=(), rating=(0, 0)):
+    title = Title(
+        pk=pk, name=f'Title {pk}', year=2000 + pk, description='',
+        category=category, rating_sum=rating[0], rating_count=rating[1]
+    )
+    title._prefetched_objects_cache = {'genre': list(genres)}
+    return title
+
+
+def title_row(title):
+    return {
+        'id': title.pk, 'name': title.name, 'year': title.year,
+        'description': title.description,
+        'rating_sum': title.rating_sum, 'rating_count': title.rating_count,
+        'category_id': title.category_id,
+        'category__name': title.category and title.category.name,
+        'category__slug': title.category and title.category.slug,
+        'genre': [
+            {'name': genre.name, 'slug': genre.slug}
+            for genre in title._prefetched_objects_cache['genre']
+        ],
+    }
+
+
+class TestValuesSerializers:
+
+    def test_titles(self):
+        film = Category(pk=1, name='Фильм', slug='film')
+        genres = [Genre(pk=2, name='Comedy', slug='comedy'),
+                  Genre(pk=1, name='Drama', slug='drama')]
+        titles = [
+            make_title(1),
+            make_title(2, film, genres, rating=(17, 3)),
+            make_title(3, film, genres[1:], rating=(10, 1)),
+        ]
+        # Жанры уже в строках: serialize дочитал бы их из БД.
+        serializer = TitleValuesSerializer()
+        assert render([
+            serializer.to_representation(title_row(title))
+            for title in titles[::-1]
+        ]) == render(TitleDisplaySerializer(titles[::-1], many=True).data)
+
+    def test_sparse_titles(self):
+        serializer = TitleValuesSerializer(['category', 'rating'])
+        assert serializer.get_columns(extra=['id']) == [
+            'id', 'rating_sum', 'rating_count',
+            'category_id', 'category__name', 'category__slug'
+        ]
+        assert serializer.to_representation(
+            title_row(make_title(1, rating=(3, 2)))
+        ) == {'rating': 1.5, 'category': None}
+
+    def test_reviews_and_comments(self):
+        author = User(pk=1, username='reader')
+        review = Review(pk=5, text='Текст', author=author, score=7,
+                        pub_date=PUB_DATE)
+        comment = Comment(pk=6, text='', author=author, pub_date=PUB_DATE)
+        row = {'id': 5, 'text': 'Текст', 'author__username': 'reader',
+               'score': 7, 'pub_date': PUB_DATE}
+        assert render(ReviewValuesSerializer().serialize([row])) == render(
+            ReviewSerializer([review], many=True).data
+        )
+        row = {'id': 6, 'text': '', 'author__username': 'reader',
+               'pub_date': PUB_DATE}
+        assert render(CommentValuesSerializer().serialize([row])) == render(
+            CommentSerializer([comment], many=True).data
+        )
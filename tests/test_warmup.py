@@ -0,0 +1,42 @@
+import pytest
+from api import warmup
+from api.warmup import group_by_package, parse_importtime, warm_up
+from django.db import DatabaseError
+from reviews.models import Title
+
+IMPORTTIME = '''import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     django.utils
+import time:       250 |        350 |   django.db
+import time:        50 |         50 | yaml
+'''
+
+
+class TestBootProfile:
+
+    def test_parse_importtime(self):
+        imports = parse_importtime(IMPORTTIME.splitlines())
+        assert imports[1] == ('django.db', 250, 350)
+        assert len(imports) == 3
+
+    def test_group_by_package(self):
+        imports = parse_importtime(IMPORTTIME.splitlines())
+        assert group_by_package(imports) == [('django', 350), ('yaml', 50)]
+
+
+@pytest.mark.django_db
+class TestWarmUp:
+
+    def test_steps_fill_process_caches(self):
+        Title._meta._expire_cache()
+        timings = warm_up()
+        assert list(timings) == [name for name, _ in warmup.WARMUP_STEPS]
+        assert Title._meta._get_fields_cache
+
+    def test_failed_step_does_not_stop_boot(self, monkeypatch):
+        def fail():
+            raise DatabaseError('нет соединения')
+
+        monkeypatch.setattr(warmup, 'WARMUP_STEPS', (
+            ('database', fail), ('urls', warmup.build_urls)
+        ))
+        assert list(warm_up()) == ['database', 'urls']